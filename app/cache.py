@@ -0,0 +1,101 @@
+"""
+In-memory TTL cache for Taiga data
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe cache with per-entry expiry
+
+    get_or_load() is single-flight: concurrent callers asking for the same
+    missing key wait for one loader instead of each hitting Taiga.
+
+    With max_entries the cache is bounded: expired entries are pruned when
+    it fills up, then the least recently used ones are evicted.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._loading: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            if self.max_entries is not None:
+                # Most recently used last
+                self._entries[key] = self._entries.pop(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix: Tuple) -> int:
+        """Drop every tuple key starting with prefix; returns how many"""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if isinstance(key, tuple) and key[:len(prefix)] == prefix]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value, loading it once if missing"""
+        missing = object()
+        while True:
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+
+            with self._lock:
+                event = self._loading.get(key)
+                owner = event is None
+                if owner:
+                    event = threading.Event()
+                    self._loading[key] = event
+
+            if not owner:
+                event.wait()
+                continue
+
+            try:
+                value = loader()
+                self.set(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+                event.set()
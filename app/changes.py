@@ -0,0 +1,152 @@
+"""
+Per-project change feeds for tasks, user stories and epics
+
+Every change the server learns about (our own writes, and differences found
+when a cached task/story set is refreshed from Taiga) is appended to the
+project's feed with a sequence number. Clients keep the cursor of the last
+response and ask for what changed since; changes to the same item are
+collapsed to its latest state. Cursors carry the feed's epoch, so cursors
+from before a restart (or older than the retained window) come back with
+reset=True, meaning "reload the full lists".
+"""
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Changes kept per project; older cursors get a reset
+FEED_RETENTION = int(os.getenv("CHANGE_FEED_RETENTION", 5000))
+
+# Response key per kind
+GROUPS = {"task": "tasks", "userstory": "userstories", "epic": "epics"}
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+
+class Change:
+    __slots__ = ("seq", "kind", "op", "item_id", "data")
+
+    def __init__(self, seq: int, kind: str, op: str, item_id: int, data: Optional[Dict]):
+        self.seq = seq
+        self.kind = kind
+        self.op = op
+        self.item_id = item_id
+        self.data = data
+
+
+def diff(previous: Mapping[int, Dict], current: Mapping[int, Dict]) -> List[Tuple[str, int, Optional[Dict]]]:
+    """(op, id, data) turning previous into current; items with a version compare by it"""
+    changes = []
+    for item_id, item in current.items():
+        before = previous.get(item_id)
+        if before is None:
+            changes.append((CREATED, item_id, item))
+        elif item.get("version") is not None and before.get("version") is not None:
+            if (item["version"], item.get("modified_date")) != (before["version"], before.get("modified_date")):
+                changes.append((UPDATED, item_id, item))
+        elif item != before:
+            changes.append((UPDATED, item_id, item))
+    for item_id, before in previous.items():
+        if item_id not in current:
+            changes.append((DELETED, item_id, {"id": item_id, "ref": before.get("ref")}))
+    return changes
+
+
+class ChangeFeed:
+    """Bounded per-project change logs sharing one sequence"""
+
+    def __init__(self, retention: int = FEED_RETENTION):
+        self.retention = retention
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._logs: Dict[int, Deque[Change]] = {}
+        # Highest seq dropped from each project's log
+        self._dropped: Dict[int, int] = {}
+        self._cond = threading.Condition()
+
+    def cursor(self, seq: Optional[int] = None) -> str:
+        return f"{self.epoch}-{self._seq if seq is None else seq}"
+
+    def _parse(self, cursor: Optional[str]) -> Optional[int]:
+        """Sequence number of a cursor from this feed, else None"""
+        epoch, _, seq = (cursor or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        return int(seq)
+
+    def publish(self, project_id: int, kind: str, changes: Iterable[Tuple[str, int, Optional[Dict]]]) -> int:
+        """Append (op, id, data) changes of one kind; returns how many"""
+        count = 0
+        with self._cond:
+            log = self._logs.setdefault(project_id, deque())
+            for op, item_id, data in changes:
+                self._seq += 1
+                log.append(Change(self._seq, kind, op, item_id, data))
+                count += 1
+            while len(log) > self.retention:
+                self._dropped[project_id] = log.popleft().seq
+            if count:
+                self._cond.notify_all()
+        return count
+
+    def reset(self, project_id: int) -> None:
+        """Forget a project's history: its earlier cursors get reset=True"""
+        with self._cond:
+            self._logs.pop(project_id, None)
+            self._dropped[project_id] = self._seq
+            self._cond.notify_all()
+
+    def since(self, project_id: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Changes to a project after cursor, collapsed per item
+
+        Without a cursor only the current one is returned (the caller has
+        just loaded the full lists).
+        """
+        with self._cond:
+            head = self.cursor()
+            if cursor is None:
+                return self._result(head, False, [])
+            seq = self._parse(cursor)
+            if seq is None or seq < self._dropped.get(project_id, 0):
+                return self._result(head, True, [])
+            log = self._logs.get(project_id, ())
+            changes = [change for change in log if change.seq > seq]
+        return self._result(head, False, changes)
+
+    def wait(self, project_id: int, cursor: str, timeout: float) -> bool:
+        """Block until the project has changes after cursor (True) or timeout passes (False)"""
+        def pending() -> bool:
+            seq = self._parse(cursor)
+            log = self._logs.get(project_id)
+            if seq is None or seq < self._dropped.get(project_id, 0):
+                return True
+            return bool(log) and log[-1].seq > seq
+
+        with self._cond:
+            return self._cond.wait_for(pending, timeout)
+
+    @staticmethod
+    def _result(cursor: str, reset: bool, changes: List[Change]) -> Dict:
+        first: Dict[Tuple[str, int], str] = {}
+        last: Dict[Tuple[str, int], Change] = {}
+        for change in changes:
+            key = (change.kind, change.item_id)
+            first.setdefault(key, change.op)
+            last[key] = change
+
+        result = {"cursor": cursor, "reset": reset}
+        for group in GROUPS.values():
+            result[group] = {CREATED: [], UPDATED: [], DELETED: []}
+        for (kind, _), change in last.items():
+            if change.op == DELETED:
+                if first[(kind, change.item_id)] != CREATED:
+                    result[GROUPS[kind]][DELETED].append(change.data)
+            else:
+                op = CREATED if first[(kind, change.item_id)] == CREATED else UPDATED
+                result[GROUPS[kind]][op].append(change.data)
+        return result
+
+    @staticmethod
+    def has_changes(result: Dict) -> bool:
+        return result["reset"] or any(items for group in GROUPS.values() for items in result[group].values())
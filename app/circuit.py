@@ -0,0 +1,131 @@
+"""
+Circuit breaker per Taiga host
+
+Closed: calls go through and their outcomes are kept in a rolling window.
+When enough recent calls failed (errors, 5xx or slower than the slow-call
+threshold) the breaker opens and calls fail immediately for a cooldown.
+Then it goes half-open and lets one probe through at a time: a success
+closes it, a failure opens it again.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from taiga.exceptions import TaigaRestException
+
+BREAKER_WINDOW = int(os.getenv("TAIGA_BREAKER_WINDOW", 20))
+BREAKER_MIN_CALLS = int(os.getenv("TAIGA_BREAKER_MIN_CALLS", 5))
+BREAKER_FAILURE_RATIO = float(os.getenv("TAIGA_BREAKER_FAILURE_RATIO", 0.5))
+BREAKER_COOLDOWN = float(os.getenv("TAIGA_BREAKER_COOLDOWN", 30))
+BREAKER_SLOW_CALL = float(os.getenv("TAIGA_BREAKER_SLOW_CALL", 10))
+
+# Statuses meaning Taiga could not serve the request (as opposed to rejecting it)
+UNAVAILABLE_STATUSES = {429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The host's breaker is open; the call was not attempted"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Taiga at {host} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def is_unavailable(error: Exception) -> bool:
+    """True when error means Taiga was unreachable or failing, not that it refused the request"""
+    if isinstance(error, (CircuitOpenError, requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in UNAVAILABLE_STATUSES
+    if isinstance(error, TaigaRestException):
+        # PolicyRequestMaker reports transport errors as "Network error!"
+        return error.status_code in UNAVAILABLE_STATUSES or str(error) == "Network error!"
+    return False
+
+
+class CircuitBreaker:
+    """Failure-ratio breaker with a rolling window of call outcomes"""
+
+    def __init__(self, host: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_ratio: float = BREAKER_FAILURE_RATIO, cooldown: float = BREAKER_COOLDOWN,
+                 slow_call: float = BREAKER_SLOW_CALL, clock: Callable[[], float] = time.monotonic):
+        self.host = host
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.slow_call = slow_call
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._outcomes: deque = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless the call may go ahead"""
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.cooldown - self.clock()
+                if retry_in > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.host, retry_in)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.host, 0)
+                self._probing = True
+
+    def record(self, success: bool, duration: float = 0.0) -> None:
+        """Record a finished call (slow successes count as failures)"""
+        failed = not success or duration > self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_ratio):
+                self._open()
+
+    def cancel_call(self) -> None:
+        """A call allowed by before_call was abandoned without an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.trips += 1
+        self._outcomes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in: Optional[float] = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.cooldown - self.clock()), 1)
+            return {
+                "state": self.state,
+                "recent_failures": sum(self._outcomes),
+                "recent_calls": len(self._outcomes),
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "retry_in": retry_in,
+            }
@@ -0,0 +1,91 @@
+"""
+Coalescing of rapid successive writes to the same record
+
+The first edit to a key opens a short window; edits arriving meanwhile
+merge their fields into it (later values win). When the window closes the
+merged fields are written once and every caller gets the same result (or
+error). Writes to one key never overlap: while one is in flight, new edits
+gather in the next batch.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+COALESCE_WINDOW = float(os.getenv("TASK_WRITE_COALESCE_WINDOW", 0.5))
+
+
+class _Batch:
+    __slots__ = ("fields", "requests", "done", "result", "error")
+
+    def __init__(self):
+        self.fields: Dict = {}
+        self.requests = 0
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+
+
+class WriteCoalescer:
+    """Merges writes per key within a window into one write(key, fields) call"""
+
+    def __init__(self, write: Callable[[Hashable, Dict], Any], window: float = COALESCE_WINDOW,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.write = write
+        self.window = window
+        self.sleep = sleep
+        self.requests = 0
+        self.writes = 0
+        self._open: Dict[Hashable, _Batch] = {}
+        self._writing: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fields: Dict) -> Tuple[Any, int]:
+        """Write fields for key; returns (result, number of requests merged into the write)"""
+        with self._lock:
+            self.requests += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            batch.fields.update(fields)
+            batch.requests += 1
+
+        if leader:
+            self._flush(key, batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.result, batch.requests
+
+    def _flush(self, key: Hashable, batch: _Batch) -> None:
+        self.sleep(self.window)
+        # Wait for the previous write to this key; edits keep joining meanwhile
+        while True:
+            with self._lock:
+                previous = self._writing.get(key)
+                if previous is None:
+                    del self._open[key]
+                    self._writing[key] = batch.done
+                    self.writes += 1
+                    break
+            previous.wait()
+        try:
+            batch.result = self.write(key, dict(batch.fields))
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self._writing.pop(key, None)
+            batch.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = sum(batch.requests for batch in self._open.values())
+            return {
+                "requests": self.requests,
+                "writes": self.writes,
+                "saved": self.requests - pending - self.writes,
+                "pending": pending,
+            }
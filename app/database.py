@@ -1,18 +1,86 @@
 """
 Database models for favorites
+
+Every SQLite connection runs in WAL mode with the pragmas below, so reads
+don't wait for a writer and concurrent writers queue on busy_timeout
+instead of failing with "database is locked". Connections are pooled and
+reused across threadpool workers.
 """
-from sqlalchemy import Column, Integer, String, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint, create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 import os
 
+try:
+    import aiosqlite  # noqa: F401
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:  # aiosqlite is optional; async sessions then run sync ones in the threadpool
+    aiosqlite = None
+
 # Database setup
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "..", "favorites.db")
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+# Seconds a connection waits for the write lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 5))
+# Pooled connections (and as many overflow ones) shared by the threadpool
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 8))
+
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    # Durable at checkpoints rather than every commit; safe with WAL
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", int(SQLITE_BUSY_TIMEOUT * 1000)),
+    # Negative: KiB of page cache per connection
+    ("cache_size", -8000),
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),
+)
+
+
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _pool_args(url: str, queue_pool=QueuePool) -> dict:
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection, or every checkout would see its own empty database
+        return {"poolclass": StaticPool}
+    return {"poolclass": queue_pool, "pool_size": SQLITE_POOL_SIZE, "max_overflow": SQLITE_POOL_SIZE}
+
+
+def create_sqlite_engine(url: str = DATABASE_URL) -> Engine:
+    """Pooled SQLite engine applying SQLITE_PRAGMAS to every new connection"""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+        **_pool_args(url)
+    )
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def create_async_sqlite_engine(url: str = DATABASE_URL):
+    """aiosqlite engine for the same file with the same pragmas (requires aiosqlite)"""
+    engine = create_async_engine(
+        url.replace("sqlite://", "sqlite+aiosqlite://", 1),
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT},
+        **_pool_args(url, AsyncAdaptedQueuePool)
+    )
+    event.listen(engine.sync_engine, "connect", _apply_pragmas)
+    return engine
+
+
+engine = create_sqlite_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_sqlite_engine() if aiosqlite is not None else None
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False) if async_engine is not None else None
 Base = declarative_base()
 
 
@@ -39,6 +107,52 @@ class FavoriteUserStory(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class Job(Base):
+    """Background jobs (bulk task operations)"""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)
+    params = Column(Text, nullable=False, default="{}")
+    total = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class JobItem(Base):
+    """One unit of work inside a job"""
+    __tablename__ = "job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    payload = Column(Text, nullable=False)
+    result = Column(Text, nullable=True)
+    error = Column(String, nullable=True)
+    # Order in which items finished, for progress streams
+    seq = Column(Integer, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class IdempotencyRecord(Base):
+    """Stored outcome of one item of a create request, per Idempotency-Key"""
+    __tablename__ = "idempotency_records"
+    __table_args__ = (UniqueConstraint("key", "position", name="uq_idempotency_key_position"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    request_hash = Column(String, nullable=False)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 def init_db():
     """Initialize database and create tables"""
     Base.metadata.create_all(bind=engine)
@@ -51,3 +165,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class ThreadedAsyncSession:
+    """
+    The AsyncSession calls the async routes use, over a sync Session
+
+    Each call runs in the threadpool; used when aiosqlite is not installed.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add(self, instance) -> None:
+        self.session.add(instance)
+
+    async def scalar(self, statement):
+        return await run_in_threadpool(self.session.scalar, statement)
+
+    async def scalars(self, statement):
+        # Fetched in the worker thread; the frozen rows need no connection
+        frozen = await run_in_threadpool(lambda: self.session.execute(statement).freeze())
+        return frozen().scalars()
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.session.delete, instance)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.session.commit)
+
+    async def refresh(self, instance) -> None:
+        await run_in_threadpool(self.session.refresh, instance)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.session.close)
+
+
+async def get_async_db():
+    """Async database session dependency (aiosqlite when installed)"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = ThreadedAsyncSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
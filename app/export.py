@@ -0,0 +1,151 @@
+"""
+Streaming export of project tasks and user stories
+
+Rows are produced page by page from Taiga and written out as each page
+arrives, so memory stays at one page whatever the project size.
+
+Formats:
+- csv: header row, then one row per item
+- ndjson: one JSON object per line
+- columnar: Parquet-style row groups as NDJSON - a schema line, then one
+  {"rows", "columns": {name: [values]}} line per page
+"""
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.importer import RowValidator
+
+FORMATS = ("csv", "ndjson", "columnar")
+ENTITIES = ("tasks", "userstories")
+# Ref index kind per entity
+REF_KINDS = {"tasks": "task", "userstories": "userstory"}
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "columnar": "application/x-ndjson",
+}
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "columnar": "columnar.ndjson"}
+
+
+def _extra(field: str, key: str) -> Callable[[Dict], Any]:
+    return lambda item: (item.get(field) or {}).get(key)
+
+
+def _field(name: str) -> Callable[[Dict], Any]:
+    return lambda item: item.get(name)
+
+
+# (column name, getter) per entity; statuses and assignees are resolved names
+COLUMNS: Dict[str, List[Tuple[str, Callable[[Dict], Any]]]] = {
+    "tasks": [
+        ("id", _field("id")),
+        ("ref", _field("ref")),
+        ("subject", _field("subject")),
+        ("status", _extra("status_extra_info", "name")),
+        ("status_id", _field("status")),
+        ("is_closed", _field("is_closed")),
+        ("assigned_to", _extra("assigned_to_extra_info", "full_name_display")),
+        ("assigned_to_id", _field("assigned_to")),
+        ("user_story", _field("user_story")),
+        ("created_date", _field("created_date")),
+        ("modified_date", _field("modified_date")),
+        ("finished_date", _field("finished_date")),
+    ],
+    "userstories": [
+        ("id", _field("id")),
+        ("ref", _field("ref")),
+        ("subject", _field("subject")),
+        ("status", _extra("status_extra_info", "name")),
+        ("status_id", _field("status")),
+        ("is_closed", _field("is_closed")),
+        ("assigned_to", _extra("assigned_to_extra_info", "full_name_display")),
+        ("assigned_to_id", _field("assigned_to")),
+        ("milestone", _field("milestone")),
+        ("total_points", _field("total_points")),
+        ("created_date", _field("created_date")),
+        ("modified_date", _field("modified_date")),
+        ("finish_date", _field("finish_date")),
+    ],
+}
+
+
+def build_params(service, project_id: int, entity: str, user_story_id: Optional[int] = None,
+                 status: Optional[str] = None, assigned_to: Optional[str] = None) -> Dict:
+    """Taiga list filters; status and assignee may be names (resolved via cached metadata)"""
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity '{entity}'. Use one of: {', '.join(ENTITIES)}")
+    params: Dict[str, Any] = {"project": project_id}
+    if user_story_id is not None:
+        if entity != "tasks":
+            raise ValueError("user_story_id only applies to tasks")
+        params["user_story"] = user_story_id
+
+    needs_names = any(value and not value.isdigit() for value in (status, assigned_to))
+    validator = None
+    if needs_names:
+        metadata = service._get_project_metadata(project_id)
+        # Only task statuses are cached; user story statuses must be ids
+        statuses = metadata["task_statuses"] if entity == "tasks" else []
+        validator = RowValidator(statuses, metadata["members"])
+
+    if status:
+        status_id = int(status) if status.isdigit() else validator.resolve_status(status)
+        if status_id is None:
+            raise ValueError(f"Unknown status '{status}'")
+        params["status"] = status_id
+    if assigned_to:
+        user_id = int(assigned_to) if assigned_to.isdigit() else validator.resolve_user(assigned_to)
+        if user_id is None:
+            raise ValueError(f"Unknown assignee '{assigned_to}'")
+        params["assigned_to"] = user_id
+    return params
+
+
+def column_names(entity: str) -> List[str]:
+    return [name for name, _ in COLUMNS[entity]]
+
+
+def rows(page: Iterable[Dict], entity: str) -> Iterator[List[Any]]:
+    getters = [getter for _, getter in COLUMNS[entity]]
+    for item in page:
+        yield [getter(item) for getter in getters]
+
+
+def stream(pages: Iterable[List[Dict]], entity: str, fmt: str) -> Iterator[bytes]:
+    """Encode pages of Taiga items in the given format, one chunk per page"""
+    names = column_names(entity)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM so spreadsheet apps open UTF-8 accents correctly
+        buffer.write("\ufeff")
+        writer.writerow(names)
+        for page in pages:
+            writer.writerows(rows(page, entity))
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    elif fmt == "ndjson":
+        for page in pages:
+            yield "".join(
+                json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n" for row in rows(page, entity)
+            ).encode()
+
+    elif fmt == "columnar":
+        yield (json.dumps({"format": "columnar", "entity": entity, "columns": names}) + "\n").encode()
+        total = 0
+        for page in pages:
+            values = list(zip(*rows(page, entity)))
+            total += len(page)
+            group = {"rows": len(page), "columns": {name: list(column) for name, column in zip(names, values)}}
+            yield (json.dumps(group, ensure_ascii=False) + "\n").encode()
+        yield (json.dumps({"total_rows": total}) + "\n").encode()
+
+    else:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
@@ -0,0 +1,115 @@
+"""
+ETag / Cache-Control helpers for our own read routes
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+from app import request_context
+from app.json_response import FastJSONResponse
+
+# Default Cache-Control per route; override with HTTP_CACHE_CONTROL_<ROUTE>
+# (e.g. HTTP_CACHE_CONTROL_PROJECTS="private, max-age=120")
+CACHE_CONTROL_DEFAULTS: Dict[str, str] = {
+    "projects": "private, max-age=60",
+    "project": "private, max-age=60",
+    "task_statuses": "private, max-age=300",
+    "members": "private, max-age=300",
+    "user_stories": "private, no-cache",
+    "user_story": "private, no-cache",
+    "workspace": "private, no-cache",
+    "epics": "private, no-cache",
+    "epic": "private, no-cache",
+    "tasks": "private, no-cache",
+    "task": "private, no-cache",
+    "stats": "private, no-cache",
+    "workload": "private, no-cache",
+}
+
+
+def get_cache_control(route: str) -> str:
+    """Return the Cache-Control value configured for a route"""
+    default = CACHE_CONTROL_DEFAULTS.get(route, "private, no-cache")
+    return os.getenv(f"HTTP_CACHE_CONTROL_{route.upper()}", default)
+
+
+def _variant_bytes(variant: Any) -> bytes:
+    """Stable serialization of the query options that shape a response body"""
+    return json.dumps(variant, sort_keys=True, default=str).encode() if variant is not None else b""
+
+
+def version_etag(items: Iterable[Dict], variant: Any = None) -> Optional[str]:
+    """
+    Build an ETag from Taiga's id/version/modified_date of each record
+
+    variant (e.g. the parsed fields projection) is mixed in, since the same
+    record versions give a different body under different query options.
+    Returns None when any record lacks them, so callers fall back to
+    hashing the serialized body.
+    """
+    digest = hashlib.sha1(_variant_bytes(variant))
+    for item in items:
+        if not isinstance(item, dict) or item.get("version") is None or not item.get("modified_date"):
+            return None
+        digest.update(f"{item.get('id')}:{item['version']}:{item['modified_date']};".encode())
+    return f'"v-{digest.hexdigest()}"'
+
+
+def content_etag(body: bytes, variant: Any = None) -> str:
+    """Build an ETag from the serialized response body (and variant, as above)"""
+    return f'"c-{hashlib.sha1(_variant_bytes(variant) + body).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Empty 304 response"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional_json(request: Request, content: Any, route: str,
+                     records: Optional[Iterable[Dict]] = None, variant: Any = None) -> Response:
+    """
+    Return content as JSON with ETag/Cache-Control, or 304 if unchanged
+
+    When records carry Taiga versions the ETag is derived from them and a
+    matching request is answered without serializing the payload at all.
+    variant holds the query options that change the body for the same
+    records (fields projection, filters) and is part of either ETag.
+
+    When the service had to serve a stale copy (Taiga unavailable, see
+    TaigaService._read) the body gets "stale"/"stale_age_seconds" and a
+    Warning header; when the request's deadline cut work short it gets
+    "partial". Neither is cached downstream.
+    """
+    cache_control = get_cache_control(route)
+    context = request_context.current()
+    if context.stale or context.interrupted:
+        cache_control = "private, no-store"
+        content = request_context.annotate(content)
+
+    etag = version_etag(records, variant) if records is not None else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    response = FastJSONResponse(content)
+    if etag is None:
+        etag = content_etag(response.body, variant)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if context.stale:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return response
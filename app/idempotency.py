@@ -0,0 +1,140 @@
+"""
+Idempotency-Key support for task creation
+
+Each successfully created item is recorded under (key, position) as soon as
+Taiga confirms it. A retry with the same key returns the stored results
+without calling Taiga, and a partially completed batch only creates the
+items that have no record yet (failed items are retried).
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal, IdempotencyRecord
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+
+# Position used to remember the job started for a background request
+JOB_POSITION = -1
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used with a different request body"""
+
+
+def request_hash(item: Any, context: Any = None) -> str:
+    """Hash of a request item; context (e.g. the target project) is part of the identity too"""
+    payload = item if context is None else {"context": context, "item": item}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """SQLite-backed record of per-item outcomes"""
+
+    def __init__(self, session_factory=SessionLocal, ttl_hours: int = IDEMPOTENCY_TTL_HOURS):
+        self.session_factory = session_factory
+        self.ttl = timedelta(hours=ttl_hours)
+        # key -> [lock, requests holding or waiting for it]; dropped when the last one is done
+        self._key_locks: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def _load(self, key: str) -> Dict[int, IdempotencyRecord]:
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.created_at < datetime.utcnow() - self.ttl
+            ).delete()
+            db.commit()
+            records = db.query(IdempotencyRecord).filter(IdempotencyRecord.key == key).all()
+            return {record.position: record for record in records}
+        finally:
+            db.close()
+
+    def _save(self, key: str, position: int, item_hash: str, result: Any) -> None:
+        db = self.session_factory()
+        try:
+            db.add(IdempotencyRecord(key=key, position=position, request_hash=item_hash,
+                                     result=json.dumps(result, default=str)))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        finally:
+            db.close()
+
+    def run_batch(self, key: str, items: List[Dict], create: Callable[[Dict], Any],
+                  context: Any = None) -> Tuple[List[Any], int]:
+        """
+        Create items once per key
+
+        context is whatever the items are created in besides their body (the
+        project): reusing the key with another context is a conflict too.
+        Returns (results in item order, number of results replayed from storage).
+        Failed creations are returned as {"error", "data"} and not recorded.
+        """
+        with self._key_lock(key):
+            stored = self._load(key)
+            hashes = [request_hash(item, context) for item in items]
+            for position, record in stored.items():
+                if position >= 0 and (position >= len(items) or record.request_hash != hashes[position]):
+                    raise IdempotencyConflict(
+                        "Idempotency-Key was already used with a different request body"
+                    )
+
+            results = []
+            replayed = 0
+            for position, item in enumerate(items):
+                if position in stored:
+                    results.append(json.loads(stored[position].result))
+                    replayed += 1
+                    continue
+                try:
+                    result = create(item)
+                except Exception as e:
+                    results.append({"error": str(e), "data": item})
+                    continue
+                self._save(key, position, hashes[position], result)
+                results.append(result)
+            return results, replayed
+
+    def run_once(self, key: str, payload: Any, start: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """
+        Run start() once per key (e.g. to enqueue a background job)
+
+        Returns (result, replayed).
+        """
+        item_hash = request_hash(payload)
+        with self._key_lock(key):
+            record = self._load(key).get(JOB_POSITION)
+            if record:
+                if record.request_hash != item_hash:
+                    raise IdempotencyConflict(
+                        "Idempotency-Key was already used with a different request body"
+                    )
+                return json.loads(record.result), True
+            result = start()
+            self._save(key, JOB_POSITION, item_hash, result)
+            return result, False
+
+
+# Global idempotency store
+idempotency_store = IdempotencyStore()
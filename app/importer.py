@@ -0,0 +1,252 @@
+"""
+Streaming task import from CSV or NDJSON uploads
+
+The request body is read chunk by chunk and handed to a worker thread
+through a small bounded pipe. Rows are parsed as they arrive, validated
+against the cached project metadata (status and assignee names), and
+submitted for creation right away, with a cap on creations in flight so a
+large file never sits in memory. The result is a row-level report.
+"""
+import codecs
+import csv
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.request_context import ContextThreadPoolExecutor
+
+FORMATS = ("csv", "ndjson")
+# Accepted column names -> task field
+COLUMNS = {
+    "subject": "subject",
+    "description": "description",
+    "status": "status",
+    "assigned_to": "assigned_to",
+    "assignee": "assigned_to",
+    "user_story": "user_story",
+}
+IMPORT_MAX_WORKERS = 8
+
+
+def format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+class ChunkPipe:
+    """Bounded hand-off of body chunks from the event loop to a worker thread"""
+
+    def __init__(self, maxsize: int = 16):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=maxsize)
+        self._closed = threading.Event()
+        self._aborted = threading.Event()
+
+    def put(self, chunk: Optional[bytes]) -> bool:
+        """Blocking put; False once the consumer has stopped reading"""
+        while not self._closed.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def finish(self) -> None:
+        """Producer side: no more chunks"""
+        self.put(None)
+
+    def abort(self) -> None:
+        """Producer side: the upload broke off"""
+        self._aborted.set()
+
+    def close(self) -> None:
+        """Consumer side: stop accepting chunks"""
+        self._closed.set()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            try:
+                chunk = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._aborted.is_set():
+                    raise ConnectionError("Upload aborted")
+                continue
+            if chunk is None:
+                return
+            yield chunk
+
+
+def iter_lines(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    """
+    Decode chunks incrementally and yield lines ending in "\n"
+
+    Only "\n" ends a line ("\r\n" becomes "\n"); other Unicode line breaks
+    such as U+2028 or form feeds are kept inside the field they belong to.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # The last piece may be an incomplete line (or a "\r" whose "\n" is in the next chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r") + "\n"
+    pending += decoder.decode(b"", final=True)
+    pending = pending.removesuffix("\r")
+    if pending:
+        yield pending
+
+
+def iter_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield (row number, row dict, parse error) for each data row"""
+    if fmt == "ndjson":
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield number, row, None
+            else:
+                yield number, None, "Each line must be a JSON object"
+        return
+
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return
+    # Spreadsheets exported in pt-BR locales use ";"
+    delimiter = max((",", ";", "\t"), key=header.count)
+    reader = csv.DictReader(_prepend(header, lines), delimiter=delimiter)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    for row in reader:
+        # Row 1 is the header
+        yield reader.line_num, row, None
+
+
+def _prepend(first: str, rest: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+class RowValidator:
+    """Turns raw rows into create_task fields using the project's statuses and members"""
+
+    def __init__(self, statuses: List[Dict], members: List[Dict], user_story_id: Optional[int] = None):
+        self.user_story_id = user_story_id
+        self.status_ids = {s["id"] for s in statuses}
+        self.statuses = {s["name"].strip().lower(): s["id"] for s in statuses if s.get("name")}
+        self.user_ids = {m["user"] for m in members}
+        self.users: Dict[str, int] = {}
+        for member in members:
+            for name in (member.get("full_name_display"), member.get("full_name"), member.get("username")):
+                if name:
+                    self.users.setdefault(name.strip().lower(), member["user"])
+
+    def validate(self, row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        fields: Dict[str, Any] = {}
+        for column, value in row.items():
+            field = COLUMNS.get(str(column).strip().lower()) if column is not None else None
+            if field is None or value is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+                if value == "":
+                    continue
+            fields[field] = value
+
+        if not fields.get("subject"):
+            return None, "Missing subject"
+        if "status" in fields:
+            status = self.resolve_status(fields["status"])
+            if status is None:
+                return None, f"Unknown status '{fields['status']}'"
+            fields["status"] = status
+        if "assigned_to" in fields:
+            user = self.resolve_user(fields["assigned_to"])
+            if user is None:
+                return None, f"Unknown assignee '{fields['assigned_to']}'"
+            fields["assigned_to"] = user
+        if "user_story" in fields:
+            try:
+                fields["user_story"] = int(fields["user_story"])
+            except (TypeError, ValueError):
+                return None, f"Invalid user_story '{fields['user_story']}'"
+        elif self.user_story_id:
+            fields["user_story"] = self.user_story_id
+        return fields, None
+
+    def resolve_status(self, value: Any) -> Optional[int]:
+        """Status id from an id or a name (any case)"""
+        return self._resolve(value, self.status_ids, self.statuses)
+
+    def resolve_user(self, value: Any) -> Optional[int]:
+        """User id from an id or a member name (any case)"""
+        return self._resolve(value, self.user_ids, self.users)
+
+    @staticmethod
+    def _resolve(value: Any, ids: set, names: Dict[str, int]) -> Optional[int]:
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            if int(value) in ids:
+                return int(value)
+        return names.get(str(value).strip().lower())
+
+
+def import_tasks(service, project_id: int, chunks: Iterable[bytes], fmt: str,
+                 user_story_id: Optional[int] = None, workers: int = IMPORT_MAX_WORKERS) -> Dict:
+    """
+    Create tasks from streamed CSV/NDJSON chunks
+
+    Returns {"rows", "created", "invalid", "failed", "report": [{"row",
+    "status", "id", "ref", "error"}]} with the report in row order.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    service._ensure_authenticated()
+    metadata = service._get_project_metadata(project_id)
+    validator = RowValidator(metadata["task_statuses"], metadata["members"], user_story_id)
+    default_status = metadata["task_statuses"][0]["id"] if metadata["task_statuses"] else None
+
+    report: List[Dict] = []
+    lock = threading.Lock()
+    # Reading pauses while this many creations are in flight
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def record(entry: Dict) -> None:
+        with lock:
+            report.append(entry)
+
+    def create(number: int, fields: Dict) -> None:
+        try:
+            fields.setdefault("status", default_status)
+            task = service.create_task(project_id, **fields)
+            record({"row": number, "status": "created", "id": task.get("id"), "ref": task.get("ref")})
+        except Exception as e:
+            record({"row": number, "status": "failed", "error": str(e)})
+        finally:
+            in_flight.release()
+
+    with ContextThreadPoolExecutor(max_workers=workers) as executor:
+        for number, row, error in iter_rows(iter_lines(chunks), fmt):
+            fields = None
+            if error is None:
+                fields, error = validator.validate(row)
+            if error is not None:
+                record({"row": number, "status": "invalid", "error": error})
+                continue
+            in_flight.acquire()
+            executor.submit(create, number, fields)
+
+    report.sort(key=lambda entry: entry["row"])
+    counts = {status: 0 for status in ("created", "invalid", "failed")}
+    for entry in report:
+        counts[entry["status"]] += 1
+    return {"rows": len(report), **counts, "report": report}
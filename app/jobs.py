@@ -0,0 +1,463 @@
+"""
+Background jobs for long-running bulk task operations
+
+Bulk routes enqueue a job (persisted in SQLite, one row per item) and return
+its id right away. A supervisor thread picks up queued jobs - including the
+ones left unfinished by a restart - and processes their pending items
+concurrently. Progress is persisted per item, so it survives restarts;
+while a job runs, its event stream is fed from memory instead.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app import request_context
+from app.database import SessionLocal, Job, JobItem
+from app.request_context import ContextThreadPoolExecutor, RequestContext
+from app.scheduler import BULK
+from app.taiga_service import taiga_service
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", 2))
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def _create_task(payload: Dict, params: Dict) -> Dict:
+    return taiga_service.create_task(params["project_id"], **payload)
+
+
+def _update_task(payload: Dict, params: Dict) -> Dict:
+    fields = dict(payload)
+    task_id = fields.pop("id")
+    return taiga_service.update_task(task_id, **fields)
+
+
+def _delete_task(payload: Dict, params: Dict) -> Dict:
+    taiga_service.delete_task(payload["id"])
+    return {"id": payload["id"], "deleted": True}
+
+
+# Job kind -> handler(item payload, job params) -> result
+HANDLERS: Dict[str, Callable[[Dict, Dict], Any]] = {
+    "create_tasks": _create_task,
+    "update_tasks": _update_task,
+    "delete_tasks": _delete_task,
+}
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class _Progress:
+    """In-memory progress of a running job (duck-types Job for _summary)"""
+
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.kind = job.kind
+        self.status = job.status
+        self.total = job.total
+        self.succeeded = job.succeeded
+        self.failed = job.failed
+        self.error = None
+        self.created_at = job.created_at
+        self.started_at = job.started_at
+        self.finished_at = None
+        # Items finished before this run are only in the database
+        self.base = job.succeeded + job.failed
+        # Items finished during this run, in the order they finished
+        self.items: List[Dict] = []
+
+
+class JobManager:
+    """Persists, runs and reports on background jobs"""
+
+    def __init__(self, session_factory=SessionLocal, workers: int = JOB_WORKERS,
+                 max_concurrent: int = JOB_MAX_CONCURRENT,
+                 is_ready: Optional[Callable[[], bool]] = None):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        # Jobs need a logged-in Taiga session; after a restart they wait for one
+        self.is_ready = is_ready or (lambda: bool(taiga_service.api and taiga_service.api.token))
+        self._active: Dict[str, threading.Event] = {}
+        self._rates: Dict[str, tuple] = {}
+        self._progress: Dict[str, _Progress] = {}
+        self._lock = threading.Lock()
+        # Notified (and _generation bumped) whenever a job starts, finishes an item or ends
+        self._changed = threading.Condition(self._lock)
+        self._generation = 0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+    def start(self) -> None:
+        """Start the supervisor thread (resumes unfinished jobs)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._supervise, name="job-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+
+    def _supervise(self) -> None:
+        while not self._stopping.is_set():
+            if self.is_ready():
+                for job_id in self._runnable_jobs():
+                    threading.Thread(target=self.run, args=(job_id,), name=f"job-{job_id[:8]}",
+                                     daemon=True).start()
+            self._wakeup.wait(2.0)
+            self._wakeup.clear()
+
+    def _runnable_jobs(self) -> List[str]:
+        with self._lock:
+            slots = self.max_concurrent - len(self._active)
+            active = set(self._active)
+        if slots <= 0:
+            return []
+        db = self.session_factory()
+        try:
+            jobs = (db.query(Job.id)
+                    .filter(Job.status.in_(("queued", "running")))
+                    .order_by(Job.created_at)
+                    .all())
+        finally:
+            db.close()
+        return [job_id for (job_id,) in jobs if job_id not in active][:slots]
+
+    # Commands
+    def enqueue(self, kind: str, items: List[Dict], params: Optional[Dict] = None) -> Dict:
+        """Persist a new job and wake the supervisor"""
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if not items:
+            raise ValueError("No items provided")
+
+        job_id = uuid.uuid4().hex
+        # Fair-queued upstream as whoever submitted it (see app/scheduler.py)
+        params = {**(params or {}), "submitted_by": request_context.current().user}
+        db = self.session_factory()
+        try:
+            db.add(Job(id=job_id, kind=kind, status="queued", params=json.dumps(params or {}),
+                       total=len(items)))
+            db.add_all([
+                JobItem(job_id=job_id, position=position, status="pending", payload=json.dumps(item))
+                for position, item in enumerate(items)
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job; items already in flight still finish"""
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if not job or job.status in TERMINAL_STATUSES:
+                return False
+            with self._lock:
+                event = self._active.get(job_id)
+            if event:
+                event.set()
+            else:
+                job.status = "cancelled"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+                self._notify()
+            return True
+        finally:
+            db.close()
+
+    def run(self, job_id: str) -> None:
+        """Process a job's pending items (blocking)"""
+        with self._lock:
+            if job_id in self._active:
+                return
+            cancel_event = self._active[job_id] = threading.Event()
+
+        try:
+            db = self.session_factory()
+            try:
+                job = db.get(Job, job_id)
+                if not job or job.status in TERMINAL_STATUSES:
+                    return
+                job.status = "running"
+                job.started_at = job.started_at or datetime.utcnow()
+                db.commit()
+                handler = HANDLERS[job.kind]
+                params = json.loads(job.params)
+                done_at_start = job.succeeded + job.failed
+                pending = [
+                    (item.id, item.position, json.loads(item.payload))
+                    for item in db.query(JobItem)
+                    .filter(JobItem.job_id == job_id, JobItem.status == "pending")
+                    .order_by(JobItem.position)
+                ]
+                progress = _Progress(job)
+            finally:
+                db.close()
+
+            self._rates[job_id] = (time.monotonic(), done_at_start)
+            with self._changed:
+                self._progress[job_id] = progress
+                self._notify_locked()
+
+            def process(item_id: int, position: int, payload: Dict) -> None:
+                if cancel_event.is_set():
+                    return
+                try:
+                    result = handler(payload, params)
+                except Exception as e:
+                    self._finish_item(job_id, item_id, None, str(e), position, payload)
+                else:
+                    self._finish_item(job_id, item_id, result, None, position, payload)
+
+            context = RequestContext(BULK, params.get("submitted_by") or f"job:{job_id}")
+            with request_context.use(context), ContextThreadPoolExecutor(max_workers=self.workers) as executor:
+                for _ in executor.map(lambda entry: process(*entry), pending):
+                    pass
+
+            self._finish_job(job_id, "cancelled" if cancel_event.is_set() else "completed")
+        except Exception as e:
+            self._finish_job(job_id, "failed", str(e))
+        finally:
+            with self._changed:
+                self._active.pop(job_id, None)
+                # The job row is final by now, so streams go back to the database
+                self._progress.pop(job_id, None)
+                self._notify_locked()
+            self._rates.pop(job_id, None)
+            self._wakeup.set()
+
+    def _finish_item(self, job_id: str, item_id: int, result: Any, error: Optional[str],
+                     position: Optional[int] = None, payload: Optional[Dict] = None) -> None:
+        """
+        Record an item's outcome
+
+        The counter increment and the seq read share one SQLite write
+        transaction, so concurrent workers get distinct seqs without holding
+        the manager lock; the lock is only taken afterwards to publish the
+        item to the in-memory progress.
+        """
+        counter = Job.succeeded if error is None else Job.failed
+        result_json = json.dumps(result, default=str) if error is None else None
+        finished_at = datetime.utcnow()
+        item = {
+            "position": position,
+            "status": "done" if error is None else "failed",
+            "payload": payload,
+            "result": json.loads(result_json) if result_json else None,
+            "error": error,
+            "finished_at": _iso(finished_at),
+        }
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(Job.id == job_id).update({counter: counter + 1}, synchronize_session=False)
+            item["seq"] = db.query(Job.succeeded + Job.failed).filter(Job.id == job_id).scalar()
+            db.query(JobItem).filter(JobItem.id == item_id).update({
+                JobItem.status: item["status"],
+                JobItem.result: result_json,
+                JobItem.error: error,
+                JobItem.seq: item["seq"],
+                JobItem.finished_at: finished_at,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._changed:
+            progress = self._progress.get(job_id)
+            if progress is not None:
+                if error is None:
+                    progress.succeeded += 1
+                else:
+                    progress.failed += 1
+                progress.items.append(item)
+                self._notify_locked()
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._notify_locked()
+
+    def _notify_locked(self) -> None:
+        self._generation += 1
+        self._changed.notify_all()
+
+    def _finish_job(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if job:
+                job.status = status
+                job.error = error
+                job.finished_at = datetime.utcnow()
+                db.commit()
+        finally:
+            db.close()
+
+    # Queries
+    def get(self, job_id: str, include_items: bool = False) -> Optional[Dict]:
+        """Job summary with progress, throughput and ETA"""
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if not job:
+                return None
+            summary = self._summary(job)
+            if include_items:
+                summary["items"] = [
+                    self._item_dict(item)
+                    for item in db.query(JobItem).filter(JobItem.job_id == job_id).order_by(JobItem.position)
+                ]
+            return summary
+        finally:
+            db.close()
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            jobs = db.query(Job).order_by(Job.created_at.desc()).limit(limit).all()
+            return [self._summary(job) for job in jobs]
+        finally:
+            db.close()
+
+    def events(self, job_id: str, keep_alive: float = 15.0) -> Iterator[str]:
+        """
+        Server-Sent Events: one "item" event per finished item, "progress" on change, then "done"
+
+        While the job runs, items and counters come from its in-memory
+        progress and the stream sleeps until the next change; the database is
+        read for items finished before this run and when the job isn't running.
+        """
+        seen = set()  # seqs already sent
+        last_seq = 0  # database items up to this seq have been read
+        run, sent = None, 0  # current run's in-memory items already sent
+        last_progress = None
+        while True:
+            with self._changed:
+                generation = self._generation
+                running = self._progress.get(job_id)
+                if running is not None:
+                    if running is not run:
+                        run, sent = running, 0
+                    summary = self._summary(running)
+                    item_events = running.items[sent:]
+                    sent += len(item_events)
+
+            if running is not None:
+                if last_seq < running.base:
+                    item_events = self._items_since(job_id, last_seq, running.base) + item_events
+                    last_seq = running.base
+            else:
+                snapshot = self._snapshot(job_id, last_seq)
+                if snapshot is None:
+                    yield self._sse("error", {"detail": "Job not found"})
+                    return
+                summary, item_events = snapshot
+                last_seq = max([last_seq] + [item["seq"] for item in item_events])
+
+            item_events = [item for item in item_events if item["seq"] not in seen]
+            for item in item_events:
+                seen.add(item["seq"])
+                yield self._sse("item", item)
+
+            progress = (summary["status"], summary["succeeded"], summary["failed"])
+            if progress != last_progress or item_events:
+                yield self._sse("progress", summary)
+                last_progress = progress
+
+            if summary["status"] in TERMINAL_STATUSES:
+                yield self._sse("done", summary)
+                return
+            with self._changed:
+                changed = self._changed.wait_for(lambda: self._generation != generation, timeout=keep_alive)
+            if not changed:
+                # Keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    def _items_since(self, job_id: str, after_seq: int, up_to_seq: Optional[int] = None) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            query = db.query(JobItem).filter(JobItem.job_id == job_id, JobItem.seq > after_seq)
+            if up_to_seq is not None:
+                query = query.filter(JobItem.seq <= up_to_seq)
+            return [self._item_dict(item) for item in query.order_by(JobItem.seq)]
+        finally:
+            db.close()
+
+    def _snapshot(self, job_id: str, after_seq: int) -> Optional[tuple]:
+        """(summary, items finished after after_seq) from the database, or None if the job doesn't exist"""
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if not job:
+                return None
+            summary = self._summary(job)
+        finally:
+            db.close()
+        return summary, self._items_since(job_id, after_seq)
+
+    def _summary(self, job: Job) -> Dict:
+        processed = job.succeeded + job.failed
+        pending = job.total - processed
+        throughput = None
+        rate = self._rates.get(job.id)
+        if rate:
+            elapsed = time.monotonic() - rate[0]
+            if elapsed > 0 and processed > rate[1]:
+                throughput = (processed - rate[1]) / elapsed
+        elif job.started_at and job.finished_at and processed:
+            elapsed = (job.finished_at - job.started_at).total_seconds()
+            throughput = processed / elapsed if elapsed > 0 else None
+
+        eta = None
+        if throughput and job.status not in TERMINAL_STATUSES:
+            eta = round(pending / throughput, 1)
+
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "total": job.total,
+            "succeeded": job.succeeded,
+            "failed": job.failed,
+            "pending": pending,
+            "progress": round(processed / job.total, 4) if job.total else 1.0,
+            "throughput_per_second": round(throughput, 2) if throughput else None,
+            "eta_seconds": eta,
+            "error": job.error,
+            "created_at": _iso(job.created_at),
+            "started_at": _iso(job.started_at),
+            "finished_at": _iso(job.finished_at),
+        }
+
+    @staticmethod
+    def _item_dict(item: JobItem) -> Dict:
+        return {
+            "position": item.position,
+            "status": item.status,
+            "seq": item.seq,
+            "payload": json.loads(item.payload),
+            "result": json.loads(item.result) if item.result else None,
+            "error": item.error,
+            "finished_at": _iso(item.finished_at),
+        }
+
+    @staticmethod
+    def _sse(event: str, data: Dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Global job manager
+job_manager = JobManager()
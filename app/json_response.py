@@ -0,0 +1,43 @@
+"""
+Fast JSON response for payloads that are already JSON-native
+
+Handlers that return FastJSONResponse(...) directly skip FastAPI's
+jsonable_encoder pass. orjson is used when installed, otherwise the stdlib
+encoder with the same compact output as Starlette's JSONResponse.
+"""
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback for the odd non-native value (dates, models): use FastAPI's encoder"""
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-native content (dicts, lists, str, numbers, None) to bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
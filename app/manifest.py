@@ -0,0 +1,111 @@
+"""
+Declarative task manifests for user stories
+
+A manifest is the full set of tasks a user story should contain. Tasks are
+matched to the current ones by subject or by an external key (stored in
+Taiga's external_reference as ["manifest", key]), and the difference is
+turned into a plan of creates, updates and deletes. Only fields given in the
+manifest are compared, so an unchanged manifest plans no writes at all.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+# Fields a manifest entry may set on a task
+MANAGED_FIELDS = ("subject", "description", "status", "assigned_to")
+KEY_FIELDS = ("subject", "key")
+# external_reference service name for tasks created with key_field="key"
+EXTERNAL_SERVICE = "manifest"
+
+
+def task_key(task: Dict, key_field: str) -> Optional[str]:
+    """Manifest key of a current Taiga task (None when it has none)"""
+    if key_field == "subject":
+        subject = task.get("subject")
+        return subject.strip() if subject else None
+    reference = task.get("external_reference")
+    if isinstance(reference, (list, tuple)) and len(reference) == 2 and reference[0] == EXTERNAL_SERVICE:
+        return str(reference[1])
+    return None
+
+
+def entry_key(entry: Dict, key_field: str) -> str:
+    """Manifest key of a desired entry"""
+    value = entry.get("key") if key_field == "key" else entry.get("subject")
+    if value is None or not str(value).strip():
+        raise ValueError(f"Every manifest entry needs a non-empty '{key_field}'")
+    return str(value).strip()
+
+
+def missing_fields(current: Dict, entry: Dict) -> List[str]:
+    """Fields the entry compares that the list payload did not include"""
+    return [field for field in MANAGED_FIELDS if field in entry and field not in current]
+
+
+def plan_manifest(current: List[Dict], desired: List[Dict], key_field: str = "subject",
+                  delete_missing: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Diff the current tasks of a user story against the desired manifest
+
+    Returns {"create": [entry], "update": [{"id", "ref", "version", "key",
+    "changes": {field: {"from", "to"}}}], "delete": [{"id", "ref", "subject"}],
+    "unchanged": [{"id", "ref", "key"}]}.
+    """
+    if key_field not in KEY_FIELDS:
+        raise ValueError(f"Unknown key_field '{key_field}'. Use one of: {', '.join(KEY_FIELDS)}")
+
+    wanted: Dict[str, Dict] = {}
+    for entry in desired:
+        key = entry_key(entry, key_field)
+        if key in wanted:
+            raise ValueError(f"Duplicate manifest key '{key}'")
+        wanted[key] = entry
+
+    # With duplicate subjects upstream, the oldest task (lowest ref) is kept
+    existing: Dict[str, Dict] = {}
+    extra: List[Dict] = []
+    for task in sorted(current, key=lambda t: t.get("ref") or 0):
+        key = task_key(task, key_field)
+        if key is None or key in existing:
+            extra.append(task)
+        else:
+            existing[key] = task
+
+    plan: Dict[str, List[Dict]] = {"create": [], "update": [], "delete": [], "unchanged": []}
+    for key, entry in wanted.items():
+        task = existing.get(key)
+        if task is None:
+            plan["create"].append(entry)
+            continue
+        changes = {
+            field: {"from": task.get(field), "to": entry[field]}
+            for field in MANAGED_FIELDS
+            if field in entry and _normalize(task.get(field)) != _normalize(entry[field])
+        }
+        summary = {"id": task["id"], "ref": task.get("ref"), "key": key}
+        if changes:
+            plan["update"].append({**summary, "version": task.get("version"), "changes": changes})
+        else:
+            plan["unchanged"].append(summary)
+
+    if delete_missing:
+        leftovers = [task for key, task in existing.items() if key not in wanted] + extra
+        plan["delete"] = [
+            {"id": task["id"], "ref": task.get("ref"), "subject": task.get("subject")}
+            for task in sorted(leftovers, key=lambda t: t.get("ref") or 0)
+        ]
+    return plan
+
+
+def create_payload(entry: Dict, story_id: int, key_field: str) -> Tuple[str, Dict[str, Any]]:
+    """(subject, create_task kwargs) for a planned creation"""
+    fields = {field: entry[field] for field in MANAGED_FIELDS if field in entry and field != "subject"}
+    fields["user_story"] = story_id
+    if key_field == "key":
+        fields["external_reference"] = [EXTERNAL_SERVICE, entry_key(entry, key_field)]
+    return entry["subject"], fields
+
+
+def _normalize(value: Any) -> Any:
+    # Taiga returns "" and None interchangeably for empty descriptions
+    if isinstance(value, str):
+        return value.strip()
+    return "" if value is None else value
@@ -0,0 +1,66 @@
+"""
+Field projection for list endpoints (?fields=...)
+"""
+from typing import Any, Dict, List, Optional
+
+# Named views accepted by ?fields=; "compact" is what the UI lists need
+PRESETS: Dict[str, Dict[str, str]] = {
+    "task": {
+        "compact": "id,ref,subject,description,status,status_extra_info.name,status_extra_info.color,"
+                   "assigned_to,assigned_to_extra_info.full_name_display,user_story,version",
+    },
+    "userstory": {
+        "compact": "id,ref,subject,status,status_extra_info.name,status_extra_info.color,version",
+    },
+    "epic": {
+        "compact": "id,ref,subject,status,status_extra_info.name,status_extra_info.color,version",
+    },
+}
+
+
+def parse_fields(fields: Optional[str], kind: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn "id,ref,status_extra_info.name" (or a preset name) into a field tree
+
+    Returns None when no projection is requested ("", None or "all").
+    """
+    if not fields or fields == "all":
+        return None
+    fields = PRESETS.get(kind, {}).get(fields, fields)
+
+    tree: Dict[str, Any] = {}
+    for path in fields.split(","):
+        node = tree
+        parts = [part for part in path.strip().split(".") if part]
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+            else:
+                child = node.get(part)
+                if child is None:
+                    # A parent already requested whole keeps winning
+                    if part in node:
+                        break
+                    child = node[part] = {}
+                node = child
+    return tree
+
+
+def project_record(record: Dict, tree: Dict[str, Any]) -> Dict:
+    """Keep only the fields in tree (missing fields are skipped)"""
+    out = {}
+    for key, subtree in tree.items():
+        if key not in record:
+            continue
+        value = record[key]
+        if subtree is not None and isinstance(value, dict):
+            value = project_record(value, subtree)
+        out[key] = value
+    return out
+
+
+def project(records: List[Dict], tree: Optional[Dict[str, Any]]) -> List[Dict]:
+    """Apply a field tree to every record in one pass"""
+    if tree is None:
+        return records
+    return [project_record(record, tree) for record in records]
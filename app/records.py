@@ -0,0 +1,247 @@
+"""
+Compact in-memory records for cached tasks, user stories and epics
+
+Taiga task dicts cost several KB each, mostly in repeated nested objects
+(status_extra_info, assigned_to_extra_info) and per-dict overhead. Cached
+data is kept as slotted records instead: one object per item, interned
+strings, and one shared extra-info dict per status/user id. Records turn
+back into the usual dict shape only when a response is built.
+"""
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.stats import TaskColumns
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class InfoTable:
+    """One shared *_extra_info dict per id (e.g. per status, per user)"""
+
+    __slots__ = ("_by_id",)
+
+    def __init__(self):
+        self._by_id: Dict[int, Optional[Dict]] = {}
+
+    def share(self, item_id: Optional[int], info: Optional[Dict]) -> None:
+        if item_id is None or info is None:
+            return
+        current = self._by_id.get(item_id)
+        if current != info:
+            self._by_id[item_id] = {key: _intern(value) for key, value in info.items()}
+
+    def get(self, item_id: Optional[int]) -> Optional[Dict]:
+        return self._by_id.get(item_id)
+
+
+class TaskRecord:
+    """
+    Slotted task; the fields of TaigaService._task_to_dict_from_json
+
+    Any other field Taiga sent (due_date, is_blocked, owner, ...) is kept
+    in `extra`, so an expanded record still carries the full payload.
+    """
+
+    __slots__ = ("id", "ref", "subject", "description", "status", "is_closed", "assigned_to",
+                 "user_story", "project", "milestone", "tags", "watchers",
+                 "created_date", "modified_date", "version", "extra")
+
+    def __init__(self, task_json: Dict):
+        self.id = task_json.get("id")
+        self.ref = task_json.get("ref")
+        self.subject = task_json.get("subject")
+        self.description = task_json.get("description", "") or ""
+        self.status = task_json.get("status")
+        self.is_closed = task_json.get("is_closed")
+        if self.is_closed is None:
+            self.is_closed = (task_json.get("status_extra_info") or {}).get("is_closed")
+        self.assigned_to = task_json.get("assigned_to")
+        self.user_story = task_json.get("user_story")
+        self.project = task_json.get("project")
+        self.milestone = task_json.get("milestone")
+        self.tags = task_json.get("tags") or []
+        self.watchers = task_json.get("watchers") or []
+        self.created_date = task_json.get("created_date")
+        self.modified_date = task_json.get("modified_date")
+        self.version = task_json.get("version", 1)
+        self.extra = {
+            _intern(key): _intern(value) for key, value in task_json.items() if key not in _TASK_FIELDS
+        } or None
+
+
+# Stored in TaskRecord slots or the store's shared info tables rather than in extra
+_TASK_FIELDS = (frozenset(TaskRecord.__slots__) - {"extra"}) | {"status_extra_info", "assigned_to_extra_info"}
+
+
+class StoryRecord:
+    """Slotted user story or epic; same fields as _userstory_to_dict/_epic_to_dict"""
+
+    __slots__ = ("id", "ref", "subject", "description", "status", "project", "version", "modified_date")
+
+    def __init__(self, story_json: Dict, project_id: Optional[int] = None):
+        self.id = story_json.get("id")
+        self.ref = story_json.get("ref")
+        self.subject = story_json.get("subject")
+        self.description = story_json.get("description", "") or ""
+        self.status = story_json.get("status")
+        self.project = story_json.get("project", project_id)
+        self.version = story_json.get("version")
+        self.modified_date = story_json.get("modified_date")
+
+
+class TaskStore:
+    """
+    Compact cached task set for one project
+
+    Status and assignee extra info are stored once per id in shared tables;
+    `columns` mirrors the set as typed arrays for analytics (app/stats.py).
+    """
+
+    def __init__(self, project_id: int, tasks: Iterable[Dict] = ()):
+        self.project_id = project_id
+        self.statuses = InfoTable()
+        self.users = InfoTable()
+        # Other *_extra_info kept in records' extra (owner, user_story, project), per field
+        self.infos: Dict[str, InfoTable] = {}
+        self.columns = TaskColumns()
+        self._records: Dict[int, TaskRecord] = {}
+        self._lock = threading.Lock()
+        self.upsert_many(tasks)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def upsert_many(self, tasks: Iterable[Dict]) -> None:
+        with self._lock:
+            for task in tasks:
+                self._upsert(task)
+
+    def upsert(self, task: Dict) -> None:
+        with self._lock:
+            self._upsert(task)
+
+    def _upsert(self, task: Dict) -> None:
+        record = TaskRecord(task)
+        self.statuses.share(record.status, task.get("status_extra_info"))
+        self.users.share(record.assigned_to, task.get("assigned_to_extra_info"))
+        for key, value in (record.extra or {}).items():
+            if key.endswith("_extra_info") and isinstance(value, dict) and value.get("id") is not None:
+                table = self.infos.setdefault(key, InfoTable())
+                table.share(value["id"], value)
+                record.extra[key] = table.get(value["id"])
+        self._records[record.id] = record
+        self.columns.upsert(task)
+
+    def apply(self, task: Dict) -> None:
+        """
+        Upsert a task from a write response
+
+        Fields the response lacks keep their cached values, and extra info
+        comes from the shared tables when the status/user is known there.
+        """
+        with self._lock:
+            current = self._records.get(task["id"])
+            merged = self.to_dict(current) if current else {}
+            if "status" in task and "is_closed" not in task:
+                # Re-derived from the new status below
+                merged.pop("is_closed", None)
+            merged.update(task)
+            for field, table in (("status", self.statuses), ("assigned_to", self.users)):
+                known = table.get(merged.get(field))
+                if known is not None:
+                    merged[f"{field}_extra_info"] = known
+            self._upsert(merged)
+
+    def remove(self, task_id: int) -> Optional[TaskRecord]:
+        with self._lock:
+            self.columns.remove(task_id)
+            return self._records.pop(task_id, None)
+
+    def get(self, task_id: int) -> Optional[TaskRecord]:
+        return self._records.get(task_id)
+
+    def records(self, user_story_id: Optional[int] = None) -> List[TaskRecord]:
+        with self._lock:
+            values = list(self._records.values())
+        if user_story_id is not None:
+            values = [r for r in values if r.user_story == user_story_id]
+        return values
+
+    def to_dict(self, record: TaskRecord) -> Dict:
+        """Expand a record to the _task_to_dict_from_json shape plus its extra fields"""
+        return {
+            **(record.extra or {}),
+            "id": record.id,
+            "ref": record.ref,
+            "subject": record.subject,
+            "description": record.description,
+            "status": record.status,
+            "status_extra_info": self.statuses.get(record.status),
+            "is_closed": record.is_closed,
+            "assigned_to": record.assigned_to,
+            "assigned_to_extra_info": self.users.get(record.assigned_to),
+            "user_story": record.user_story,
+            "project": record.project,
+            "milestone": record.milestone,
+            "tags": record.tags,
+            "watchers": record.watchers,
+            "created_date": record.created_date,
+            "modified_date": record.modified_date,
+            "version": record.version,
+        }
+
+    def iter_dicts(self, user_story_id: Optional[int] = None) -> Iterator[Dict]:
+        for record in self.records(user_story_id):
+            yield self.to_dict(record)
+
+
+class StoryStore:
+    """Compact cached user story (or epic) set for one project"""
+
+    def __init__(self, project_id: int, stories: Iterable[Dict] = ()):
+        self.project_id = project_id
+        self.statuses = InfoTable()
+        self._records: Dict[int, StoryRecord] = {}
+        self._lock = threading.Lock()
+        self.upsert_many(stories)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def upsert_many(self, stories: Iterable[Dict]) -> None:
+        with self._lock:
+            for story in stories:
+                record = StoryRecord(story, self.project_id)
+                self.statuses.share(record.status, story.get("status_extra_info"))
+                self._records[record.id] = record
+
+    def remove(self, story_id: int) -> Optional[StoryRecord]:
+        with self._lock:
+            return self._records.pop(story_id, None)
+
+    def get(self, story_id: int) -> Optional[StoryRecord]:
+        return self._records.get(story_id)
+
+    def records(self) -> List[StoryRecord]:
+        with self._lock:
+            return list(self._records.values())
+
+    def to_dict(self, record: StoryRecord) -> Dict:
+        """Expand a record to the _userstory_to_dict/_epic_to_dict shape"""
+        return {
+            "id": record.id,
+            "ref": record.ref,
+            "subject": record.subject,
+            "description": record.description,
+            "status": record.status,
+            "status_extra_info": self.statuses.get(record.status),
+            "version": record.version,
+            "modified_date": record.modified_date,
+        }
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        for record in self.records():
+            yield self.to_dict(record)
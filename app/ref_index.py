@@ -0,0 +1,62 @@
+"""
+Per-project ref -> id index for tasks, user stories and epics
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+KINDS = ("task", "userstory", "epic")
+
+
+class RefIndex:
+    """
+    Maps Taiga ref numbers (#4871) to internal ids
+
+    Filled from list/detail responses as they pass through the service, so
+    most lookups never reach Taiga.
+    """
+
+    def __init__(self):
+        self._refs: Dict[Tuple[str, int], Dict[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, project_id: int, items: Iterable[Dict]) -> None:
+        """Index items carrying 'ref' and 'id'"""
+        with self._lock:
+            refs = self._refs.setdefault((kind, project_id), {})
+            for item in items:
+                if item and item.get("ref") is not None and item.get("id") is not None:
+                    refs[item["ref"]] = item["id"]
+
+    def lookup(self, kind: str, project_id: int, ref: int) -> Optional[int]:
+        """Return the id for a ref, or None if unknown"""
+        with self._lock:
+            return self._refs.get((kind, project_id), {}).get(ref)
+
+    def lookup_many(self, kind: str, project_id: int, refs: List[int]) -> Tuple[Dict[int, int], List[int]]:
+        """Return ({ref: id} for known refs, [unknown refs])"""
+        with self._lock:
+            known = self._refs.get((kind, project_id), {})
+            found = {ref: known[ref] for ref in refs if ref in known}
+        return found, [ref for ref in refs if ref not in found]
+
+    def forget(self, kind: str, project_id: int, ref: Optional[int] = None,
+               item_id: Optional[int] = None) -> None:
+        """Drop one entry by ref or id"""
+        with self._lock:
+            refs = self._refs.get((kind, project_id))
+            if not refs:
+                return
+            if ref is not None:
+                refs.pop(ref, None)
+            if item_id is not None:
+                for key in [k for k, v in refs.items() if v == item_id]:
+                    del refs[key]
+
+    def clear(self, project_id: Optional[int] = None) -> None:
+        """Drop one project's entries, or everything"""
+        with self._lock:
+            if project_id is None:
+                self._refs.clear()
+            else:
+                for key in [k for k in self._refs if k[1] == project_id]:
+                    del self._refs[key]
@@ -0,0 +1,223 @@
+"""
+Per-request state shared between the service layer and the response helpers
+
+RequestContextMiddleware gives every HTTP request a fresh RequestContext in
+a contextvar. Sync routes run in a threadpool with a copy of the context, so
+they see (and mutate) the same object; ContextThreadPoolExecutor carries it
+into the service's own worker threads, and background jobs install one with
+use().
+
+Requests also carry a deadline (X-Request-Timeout header in seconds, or
+the default for their lane) and are cancelled when the client disconnects.
+UpstreamPolicy shrinks its timeouts to the time left and refuses to start
+calls past the deadline, so abandoned work stops hitting Taiga; responses
+built from what finished are marked partial (see annotate()).
+"""
+import asyncio
+import contextvars
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.scheduler import BACKGROUND, BULK, INTERACTIVE
+
+# Write requests on these paths are bulk work for the upstream scheduler
+BULK_PATH_MARKERS = ("/bulk", "/import", "/manifest", "/export")
+# Default deadlines (seconds) per lane; a request may set its own with X-Request-Timeout
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", 30))
+REQUEST_TIMEOUT_BULK = float(os.getenv("REQUEST_TIMEOUT_BULK", 300))
+# Reads that fetch a whole project (every page of its tasks, stories or epics) when cold
+REQUEST_TIMEOUT_LISTING = float(os.getenv("REQUEST_TIMEOUT_LISTING", 300))
+FULL_LISTING_ROUTES = re.compile(
+    r"^(GET|HEAD) /api/(projects/\d+/(tasks|userstories|epics|stats|changes|userstories/\d+/workspace)|workload)$"
+    r"|^POST /api/tasks/batch-get$"
+)
+# Long-lived streams have no default deadline
+NO_DEADLINE_PATH_MARKERS = ("/export", "/events")
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time or its client went away; the call was not made"""
+
+
+class RequestContext:
+    """Mutable per-request state: scheduling lane/user, deadline and response markers"""
+
+    def __init__(self, lane: str = INTERACTIVE, user: str = "anonymous", timeout: Optional[float] = None):
+        self.lane = lane
+        self.user = user
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.cancelled = threading.Event()
+        self.interrupted: Optional[str] = None
+        self.stale_age: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None without one)"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded once the client disconnected or the deadline passed"""
+        if self.cancelled.is_set():
+            reason = "client disconnected"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            reason = "deadline exceeded"
+        else:
+            return
+        raise self.interrupt(reason)
+
+    def interrupt(self, reason: str) -> DeadlineExceeded:
+        """Mark the response partial; returns the error to raise"""
+        self.interrupted = reason
+        return DeadlineExceeded(f"Request {reason}")
+
+    def clamp(self, timeout: Tuple[float, float]) -> Tuple[float, float]:
+        """(connect, read) timeouts shrunk to the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return (min(timeout[0], remaining), min(timeout[1], remaining))
+
+    def mark_stale(self, age: float) -> None:
+        """Record that part of the response comes from a stale copy age seconds old"""
+        with self._lock:
+            self.stale_age = age if self.stale_age is None else max(self.stale_age, age)
+
+    @property
+    def stale(self) -> bool:
+        return self.stale_age is not None
+
+
+_current: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar("request_context", default=None)
+
+
+def current() -> RequestContext:
+    """The active request's context (a throwaway background one outside of requests)"""
+    context = _current.get()
+    return context if context is not None else RequestContext(BACKGROUND, "system")
+
+
+@contextmanager
+def use(context: RequestContext) -> Iterator[RequestContext]:
+    """Install context for the current thread/task (e.g. a background job)"""
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's context"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def annotate(content):
+    """Add the current request's stale/partial markers to a response body dict"""
+    context = current()
+    if not isinstance(content, dict):
+        return content
+    if context.stale:
+        content = {**content, "stale": True, "stale_age_seconds": round(context.stale_age)}
+    if context.interrupted:
+        content = {**content, "partial": True, "partial_reason": context.interrupted}
+    return content
+
+
+def lane_for(method: str, path: str) -> str:
+    if method in ("GET", "HEAD") and "/export" not in path:
+        return INTERACTIVE
+    return BULK if any(marker in path for marker in BULK_PATH_MARKERS) else INTERACTIVE
+
+
+def user_for(scope) -> str:
+    """Who a request is fair-queued as: its Authorization token (hashed), else the client address"""
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization" and value:
+            return hashlib.sha1(value).hexdigest()[:12]
+    client = scope.get("client")
+    return client[0] if client else "anonymous"
+
+
+def timeout_for(scope, lane: str) -> Optional[float]:
+    """The request's X-Request-Timeout, else the route's default (None for streams)"""
+    headers: Dict[bytes, bytes] = dict(scope.get("headers") or ())
+    value = headers.get(b"x-request-timeout")
+    if value:
+        try:
+            timeout = float(value)
+            if timeout > 0:
+                return timeout
+        except ValueError:
+            pass
+    if any(marker in scope["path"] for marker in NO_DEADLINE_PATH_MARKERS):
+        return None
+    if FULL_LISTING_ROUTES.match(f"{scope.get('method', 'GET')} {scope['path']}"):
+        return REQUEST_TIMEOUT_LISTING
+    return REQUEST_TIMEOUT_BULK if lane == BULK else REQUEST_TIMEOUT
+
+
+def _has_body(scope) -> bool:
+    headers: Dict[bytes, bytes] = dict(scope.get("headers") or ())
+    return b"transfer-encoding" in headers or headers.get(b"content-length", b"0") not in (b"0", b"")
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware installing a RequestContext for each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        lane = lane_for(scope["method"], scope["path"])
+        context = RequestContext(lane, user_for(scope), timeout_for(scope, lane))
+
+        # Once the body is consumed (right away without one) a pump task keeps
+        # reading from receive so a disconnect is noticed while a sync route
+        # is still working; the app reads the pumped messages instead
+        messages: asyncio.Queue = asyncio.Queue()
+        pump: Optional[asyncio.Task] = None
+
+        async def pump_messages():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    context.cancelled.set()
+                    return
+
+        def start_pump():
+            nonlocal pump
+            if pump is None:
+                pump = asyncio.ensure_future(pump_messages())
+
+        async def tracked_receive():
+            if pump is None:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    context.cancelled.set()
+                elif not message.get("more_body"):
+                    start_pump()
+                return message
+            if context.cancelled.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        if not _has_body(scope):
+            start_pump()
+        try:
+            with use(context):
+                await self.app(scope, tracked_receive, send)
+        finally:
+            if pump is not None:
+                pump.cancel()
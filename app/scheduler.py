@@ -0,0 +1,107 @@
+"""
+Fair scheduling of upstream calls to a Taiga host
+
+Each host gets a fixed number of concurrent call slots. When they are all
+taken, callers queue by lane and are granted slots strictly by lane
+(interactive before bulk before background) and round-robin across users
+within a lane, so one user's bulk job cannot crowd out anybody's reads and
+two bulk jobs share the host evenly.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+HOST_CONCURRENCY = int(os.getenv("TAIGA_HOST_CONCURRENCY", 8))
+# Recent waits kept per lane for the metrics
+WAIT_SAMPLES = 500
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BULK, BACKGROUND)
+
+
+class FairScheduler:
+    """Concurrency limit for one host with priority lanes and per-user fair queuing"""
+
+    def __init__(self, limit: int = HOST_CONCURRENCY, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.clock = clock
+        self.in_flight = 0
+        # lane -> user -> waiting events (user order is the round-robin order)
+        self._queues: Dict[str, "OrderedDict[str, Deque[threading.Event]]"] = {lane: OrderedDict() for lane in LANES}
+        self._waits: Dict[str, Deque[float]] = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._granted: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._lock = threading.Lock()
+
+    def _queued(self, lane: Optional[str] = None) -> int:
+        lanes = (lane,) if lane else LANES
+        return sum(len(waiters) for name in lanes for waiters in self._queues[name].values())
+
+    def acquire(self, lane: str = INTERACTIVE, user: str = "anonymous", timeout: Optional[float] = None) -> float:
+        """Wait for a slot; returns the seconds waited (TimeoutError after timeout seconds)"""
+        if lane not in self._queues:
+            lane = INTERACTIVE
+        started = self.clock()
+        with self._lock:
+            if self.in_flight < self.limit and not self._queued():
+                self.in_flight += 1
+                self._granted[lane] += 1
+                self._waits[lane].append(0.0)
+                return 0.0
+            waiter = threading.Event()
+            self._queues[lane].setdefault(user, deque()).append(waiter)
+        # release() hands the slot over directly (in_flight stays counted)
+        granted = waiter.wait(timeout)
+        waited = self.clock() - started
+        with self._lock:
+            if not granted and not waiter.is_set():
+                waiters = self._queues[lane][user]
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._queues[lane][user]
+                raise TimeoutError(f"No upstream slot within {timeout:.1f}s")
+            self._granted[lane] += 1
+            self._waits[lane].append(waited)
+        return waited
+
+    def release(self) -> None:
+        with self._lock:
+            for lane in LANES:
+                users = self._queues[lane]
+                if not users:
+                    continue
+                user, waiters = users.popitem(last=False)
+                waiter = waiters.popleft()
+                if waiters:
+                    # Back of the line for this user's next call
+                    users[user] = waiters
+                waiter.set()
+                return
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self, lane: str = INTERACTIVE, user: str = "anonymous",
+             timeout: Optional[float] = None) -> Iterator[float]:
+        waited = self.acquire(lane, user, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                waits = sorted(self._waits[lane])
+                lanes[lane] = {
+                    "queued": self._queued(lane),
+                    "users_waiting": len(self._queues[lane]),
+                    "granted": self._granted[lane],
+                    "wait_avg_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                    "wait_p95_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                }
+            return {"limit": self.limit, "in_flight": self.in_flight, "queued": self._queued(), "lanes": lanes}
@@ -0,0 +1,121 @@
+"""
+Ranking and local narrowing for the federated user story search
+
+Taiga's ?q= is a full-text search: a story matches when every word of the
+query is the prefix of a word of its ref, subject, tags or description (or
+the query is its ref), ignoring case but not accents. When a complete
+(untruncated) result is cached for a query that is a prefix of the new one
+("pain" for "painel de"), every match of the new query is in it, so it is
+filtered locally instead of asking Taiga again.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# Story fields Taiga's ?q= searches besides the ref
+SEARCHED_FIELDS = ("subject", "tags", "description")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Case- and accent-insensitive form used for ranking"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def _ref_query(query: str) -> Optional[int]:
+    value = query.lstrip("#")
+    return int(value) if value.isdigit() else None
+
+
+def is_ref_query(query: str) -> bool:
+    return _ref_query(query) is not None
+
+
+def words(text: Optional[str]) -> List[str]:
+    """Words as Taiga's full-text search sees them (lowercased, accents kept)"""
+    return re.findall(r"\w+", (text or "").casefold())
+
+
+def _tag_names(tags: Optional[Iterable]) -> List[str]:
+    # Taiga sends tags as ["name", "#color"] pairs (or plain names)
+    return [tag[0] if isinstance(tag, (list, tuple)) else tag for tag in tags or [] if tag]
+
+
+def _story_words(story: Dict) -> List[str]:
+    text = [str(story.get("ref") or ""), story.get("subject"), story.get("description")]
+    text.extend(_tag_names(story.get("tags")))
+    return [word for part in text for word in words(part)]
+
+
+def can_filter(story: Dict) -> bool:
+    """Whether the story carries every field Taiga searches (list payloads may omit some)"""
+    return all(field in story for field in SEARCHED_FIELDS if field != "tags")
+
+
+def narrows(broader: str, query: str) -> bool:
+    """Whether every match of query also matches the broader query"""
+    query_words = words(query)
+    return bool(words(broader)) and all(
+        any(word.startswith(prefix) for word in query_words) for prefix in words(broader)
+    )
+
+
+def matches(story: Dict, query: str) -> bool:
+    """Local equivalent of Taiga's ?q= filter"""
+    ref = _ref_query(query)
+    if ref is not None and story.get("ref") == ref:
+        return True
+    story_words = _story_words(story)
+    return all(any(word.startswith(needle) for word in story_words) for needle in words(query))
+
+
+def score(story: Dict, query: str) -> float:
+    """Higher is better: exact ref, exact subject, prefix, word start, substring"""
+    ref = _ref_query(query)
+    if ref is not None and story.get("ref") == ref:
+        value = 100.0
+    else:
+        needle = normalize(query)
+        subject = normalize(story.get("subject"))
+        if subject == needle:
+            value = 90.0
+        elif subject.startswith(needle):
+            value = 70.0
+        elif f" {needle}" in f" {subject}":
+            value = 50.0
+        elif needle in subject:
+            value = 30.0
+        else:
+            value = 10.0
+        # Shorter subjects are closer matches
+        value += 10.0 * len(needle) / max(len(subject), 1)
+    # Open stories first among equals
+    if not story.get("is_closed"):
+        value += 5.0
+    return round(value, 3)
+
+
+def rank(stories: List[Dict], query: str, limit: Optional[int] = None) -> List[Dict]:
+    ranked = sorted(
+        ({**story, "score": score(story, query)} for story in stories),
+        key=lambda s: (s["score"], s.get("modified_date") or ""),
+        reverse=True,
+    )
+    return ranked[:limit] if limit else ranked
+
+
+def story_hit(story: Dict, project_id: int, project_name: Optional[str] = None) -> Dict:
+    """Compact search hit from a Taiga user story"""
+    status = story.get("status_extra_info") or {}
+    return {
+        "id": story.get("id"),
+        "ref": story.get("ref"),
+        "subject": story.get("subject"),
+        "project": project_id,
+        "project_name": project_name,
+        "status": story.get("status"),
+        "status_name": status.get("name"),
+        "status_color": status.get("color"),
+        "is_closed": story.get("is_closed", status.get("is_closed")),
+        "modified_date": story.get("modified_date"),
+    }
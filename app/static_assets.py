@@ -0,0 +1,213 @@
+"""
+Static asset build (fingerprint + precompress) and the StaticFiles app serving it
+
+Build with:
+    python -m app.static_assets [source_dir] [target_dir]
+
+This copies static/ to static_dist/, adds content-hash names for every asset
+referenced from HTML/CSS/JS (styles.css -> styles.3f2a9c1b04.css), rewrites
+the references, and writes .gz/.br siblings for text files. main.py serves
+static_dist/ when it exists.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from typing import Dict, List, Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+
+from app.compression import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz files are produced
+    brotli = None
+
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".svg", ".json", ".txt", ".map"}
+PRECOMPRESS_MIN_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+# Relative references we know how to rewrite, per file type
+REFERENCE_PATTERNS = {
+    ".js": [
+        re.compile(r"""(\bfrom\s*['"])([^'"]+)(['"])"""),
+        re.compile(r"""(\bimport\s*['"])([^'"]+)(['"])"""),
+        re.compile(r"""(\bimport\(\s*['"])([^'"]+)(['"]\s*\))"""),
+    ],
+    ".html": [
+        re.compile(r"""(\b(?:href|src)=["'])([^"']+)(["'])"""),
+    ],
+    ".css": [
+        re.compile(r"""(\burl\(\s*['"]?)([^'")]+)(['"]?\s*\))"""),
+        re.compile(r"""(@import\s+['"])([^'"]+)(['"])"""),
+    ],
+}
+
+
+def _is_local_reference(spec: str) -> bool:
+    return not re.match(r"^([a-z][a-z0-9+.-]*:|//|#|/)", spec, re.IGNORECASE)
+
+
+def _fingerprinted_name(rel_path: str, content: bytes) -> str:
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+class _AssetGraph:
+    """Fingerprints files depth-first so references resolve to final names"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.files: Dict[str, str] = {}
+        for dirpath, _, filenames in os.walk(source):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(full_path, source).replace(os.sep, "/")
+                self.files[rel_path] = full_path
+        self.content: Dict[str, bytes] = {}
+        self.manifest: Dict[str, str] = {}
+        self._visiting: set = set()
+
+    def process(self, rel_path: str) -> bytes:
+        """Return rel_path's content with its references rewritten"""
+        if rel_path in self.content:
+            return self.content[rel_path]
+
+        with open(self.files[rel_path], "rb") as f:
+            data = f.read()
+
+        ext = os.path.splitext(rel_path)[1].lower()
+        if ext in REFERENCE_PATTERNS and rel_path not in self._visiting:
+            self._visiting.add(rel_path)
+            text = data.decode("utf-8")
+            for pattern in REFERENCE_PATTERNS[ext]:
+                text = pattern.sub(lambda m: self._rewrite(rel_path, m), text)
+            data = text.encode("utf-8")
+            self._visiting.discard(rel_path)
+
+        self.content[rel_path] = data
+        if ext != ".html":
+            self.manifest[rel_path] = _fingerprinted_name(rel_path, data)
+        return data
+
+    def _rewrite(self, referrer: str, match: re.Match) -> str:
+        spec = match.group(2)
+        path_part = re.split(r"[?#]", spec, maxsplit=1)[0]
+        if not path_part or not _is_local_reference(spec):
+            return match.group(0)
+
+        target = os.path.normpath(os.path.join(os.path.dirname(referrer), path_part)).replace(os.sep, "/")
+        if target not in self.files or target in self._visiting:
+            return match.group(0)
+
+        self.process(target)
+        if target not in self.manifest:
+            return match.group(0)
+        new_basename = os.path.basename(self.manifest[target])
+        new_spec = spec.replace(os.path.basename(path_part), new_basename, 1)
+        return f"{match.group(1)}{new_spec}{match.group(3)}"
+
+
+def _precompress(path: str) -> None:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < PRECOMPRESS_MIN_SIZE:
+        return
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build(source: str = "static", target: str = "static_dist") -> Dict[str, str]:
+    """
+    Build fingerprinted, precompressed assets from source into target
+
+    Original names are kept alongside the fingerprinted copies so anything
+    not referenced statically keeps working. Returns the manifest
+    {original: fingerprinted}, also written to target/manifest.json.
+    """
+    graph = _AssetGraph(source)
+    for rel_path in sorted(graph.files):
+        graph.process(rel_path)
+
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+
+    written: List[str] = []
+    for rel_path, data in graph.content.items():
+        names = [rel_path]
+        if rel_path in graph.manifest:
+            names.append(graph.manifest[rel_path])
+        for name in names:
+            out_path = os.path.join(target, name)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            with open(out_path, "wb") as f:
+                f.write(data)
+            written.append(out_path)
+
+    for out_path in written:
+        if os.path.splitext(out_path)[1].lower() in TEXT_EXTENSIONS:
+            _precompress(out_path)
+
+    with open(os.path.join(target, "manifest.json"), "w") as f:
+        json.dump(graph.manifest, f, indent=2, sort_keys=True)
+    return graph.manifest
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves .br/.gz siblings when the client accepts them
+
+    Fingerprinted files get long-lived immutable caching; everything else
+    (index.html, unhashed names) is revalidated on each use.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse):
+            return response
+
+        file_path = response.path
+        cache_control = (IMMUTABLE_CACHE_CONTROL if FINGERPRINT_RE.search(file_path)
+                         else REVALIDATE_CACHE_CONTROL)
+
+        offered = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if offered.get(encoding, 0) > 0 and os.path.isfile(file_path + suffix):
+                compressed = FileResponse(
+                    file_path + suffix,
+                    media_type=response.media_type,
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+                # Weak form of the file's ETag, so revalidation still matches
+                compressed.headers["ETag"] = "W/" + response.headers.get("etag", "")
+                compressed.headers["Cache-Control"] = cache_control
+                return compressed
+
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if len(argv) > 0 else "static"
+    target = argv[1] if len(argv) > 1 else "static_dist"
+    manifest = build(source, target)
+    print(f"Built {len(manifest)} fingerprinted assets into {target}/")
+
+
+if __name__ == "__main__":
+    main()
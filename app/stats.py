@@ -0,0 +1,183 @@
+"""
+Task analytics from columnar arrays
+
+Each cached TaskStore keeps a TaskColumns: one typed array per attribute
+(status, assignee, user story, created time, closed flag), updated in place
+when a task is upserted or removed. Group-by counts run over whole columns
+with Counter (C loops over compact arrays, no per-task dicts), and results
+are memoized per columns revision, so repeated requests cost nothing until
+a task changes.
+"""
+import bisect
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import compress
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Age distribution buckets, in days (last bucket is open-ended)
+AGE_BUCKETS_DAYS = (1, 7, 30, 90, 180, 365)
+# Stored for tasks without an assignee / user story / created date
+NONE_ID = 0
+DAY = 86400.0
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """Epoch seconds from a Taiga ISO date (0.0 when missing)"""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def is_closed(task: Dict) -> bool:
+    if task.get("is_closed") is not None:
+        return bool(task["is_closed"])
+    return bool((task.get("status_extra_info") or {}).get("is_closed"))
+
+
+class TaskColumns:
+    """Columnar view of a task set with O(1) in-place updates"""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.status = array("q")
+        self.assigned_to = array("q")
+        self.user_story = array("q")
+        self.created = array("d")
+        self.closed = array("b")
+        self._rows: Dict[int, int] = {}
+        self.revision = 0
+        self._memo: Tuple[Any, Optional[Dict]] = (None, None)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, task: Dict) -> None:
+        values = (
+            task.get("status") or NONE_ID,
+            task.get("assigned_to") or NONE_ID,
+            task.get("user_story") or NONE_ID,
+            parse_timestamp(task.get("created_date")),
+            1 if is_closed(task) else 0,
+        )
+        with self._lock:
+            row = self._rows.get(task["id"])
+            if row is None:
+                self._rows[task["id"]] = len(self.ids)
+                self.ids.append(task["id"])
+                for column, value in zip(self._columns(), values):
+                    column.append(value)
+            else:
+                for column, value in zip(self._columns(), values):
+                    column[row] = value
+            self.revision += 1
+
+    def remove(self, task_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(task_id, None)
+            if row is None:
+                return
+            # Move the last row into the gap
+            last = len(self.ids) - 1
+            for column in (self.ids, *self._columns()):
+                column[row] = column[last]
+                column.pop()
+            if row != last:
+                self._rows[self.ids[row]] = row
+            self.revision += 1
+
+    def _columns(self) -> Tuple[array, ...]:
+        return (self.status, self.assigned_to, self.user_story, self.created, self.closed)
+
+    def snapshot(self) -> Dict[str, array]:
+        """Copies of the columns taken together, so rows stay aligned while others write"""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, array]:
+        return {
+            "ids": array("q", self.ids),
+            "status": array("q", self.status),
+            "assigned_to": array("q", self.assigned_to),
+            "user_story": array("q", self.user_story),
+            "created": array("d", self.created),
+            "closed": array("b", self.closed),
+        }
+
+    def compute(self, now: Optional[float] = None) -> Dict:
+        """
+        Group-by counts, open/closed ratios and age distributions
+
+        Memoized per revision (and per minute, since ages move with time).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            memo_key = (self.revision, int(now // 60))
+            if self._memo[0] == memo_key:
+                return self._memo[1]
+            columns = self._snapshot()
+        created = columns["created"]
+        closed = columns["closed"]
+
+        total = len(closed)
+        closed_count = sum(closed)
+        result = {
+            "total": total,
+            "open": total - closed_count,
+            "closed": closed_count,
+            "closed_ratio": round(closed_count / total, 4) if total else 0.0,
+            "by_status": self._group(columns["status"], closed),
+            "by_assignee": self._group(columns["assigned_to"], closed),
+            "by_user_story": self._group(columns["user_story"], closed),
+            "age_days": {
+                "all": self._ages(created, now),
+                "open": self._ages(array("d", compress(created, (not flag for flag in closed))), now),
+            },
+        }
+        with self._lock:
+            self._memo = (memo_key, result)
+        return result
+
+    @staticmethod
+    def _group(column: array, closed: array) -> Dict[int, Dict[str, Any]]:
+        totals = Counter(column)
+        closed_counts = Counter(compress(column, closed))
+        return {
+            value: {
+                "total": count,
+                "open": count - closed_counts[value],
+                "closed": closed_counts[value],
+                "closed_ratio": round(closed_counts[value] / count, 4),
+            }
+            for value, count in totals.most_common()
+        }
+
+    @staticmethod
+    def _ages(created: array, now: float) -> Dict[str, Any]:
+        known = sorted(filter(None, created))
+        buckets = []
+        previous = 0
+        lower = 0
+        for days in AGE_BUCKETS_DAYS:
+            # Created after now - days => younger than `days`
+            index = len(known) - bisect.bisect_right(known, now - days * DAY)
+            buckets.append({"label": f"{lower}-{days}d", "count": index - previous})
+            previous = index
+            lower = days
+        buckets.append({"label": f"{lower}d+", "count": len(known) - previous})
+        median = round((now - known[(len(known) - 1) // 2]) / DAY, 1) if known else None
+        return {"buckets": buckets, "median": median, "unknown": len(created) - len(known)}
+
+
+def label_groups(groups: Dict[int, Dict], names: Dict[int, Optional[str]]) -> List[Dict]:
+    """Turn {id: counts} into a list with a display name per id"""
+    return [
+        {"id": None if value == NONE_ID else value, "name": names.get(value), **counts}
+        for value, counts in groups.items()
+    ]
@@ -2,13 +2,48 @@
 Taiga API Client Service using python-taiga library
 """
 from taiga import TaigaAPI
-from typing import Optional, Dict, List, Any
+from taiga.exceptions import TaigaRestException
+from typing import Optional, Dict, List, Any, Iterator, Tuple
 from pydantic import BaseModel
+from concurrent.futures import as_completed
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from app.cache import TTLCache
+from app.ref_index import RefIndex, KINDS as REF_KINDS
+from app.records import TaskStore, StoryStore
+from app.stats import label_groups
+from app.workload import aggregate as aggregate_workload
+from app import search
+from app.upstream import UpstreamPolicy, PolicyRequestMaker
+from app.circuit import is_unavailable
+from app.coalesce import WriteCoalescer
+from app.changes import ChangeFeed, diff as diff_items, CREATED, UPDATED, DELETED
+from app.webhooks import WebhookBatcher, WebhookEvent
+from app import request_context
+from app.request_context import ContextThreadPoolExecutor, DeadlineExceeded
+from app.manifest import (
+    plan_manifest, task_key, entry_key, missing_fields, create_payload, KEY_FIELDS as MANIFEST_KEY_FIELDS
+)
 
 load_dotenv()
 
+# batch_get_tasks: list a whole project once it has this many requested refs
+BATCH_LIST_THRESHOLD = 10
+# batch_get_tasks: concurrent single-task fetches
+BATCH_MAX_WORKERS = 8
+# Cross-project fan-outs (workload, search) share this many upstream slots
+FANOUT_CONCURRENCY = int(os.getenv("TAIGA_FANOUT_CONCURRENCY", 6))
+# Federated search: stories requested per project
+SEARCH_PAGE_SIZE = 50
+# How long the last good copy of a read is kept for serving while Taiga is down
+STALE_TTL = float(os.getenv("TAIGA_STALE_TTL", 3600))
+
+
+class NotFoundError(Exception):
+    """The requested item does not exist (or not where it was asked for)"""
+
 
 class TaigaCredentials(BaseModel):
     username: str
@@ -25,6 +60,26 @@ class TaigaService:
         self.host = self.base_url.replace('/api/v1', '')
         self.api: Optional[TaigaAPI] = None
         self.current_user: Optional[Dict] = None
+        # Project metadata (task statuses, members) rarely changes
+        self.metadata_cache = TTLCache(ttl=float(os.getenv("TAIGA_METADATA_TTL", 300)))
+        self.ref_index = RefIndex()
+        # Compact per-project task/story sets (see app/records.py)
+        self.record_cache = TTLCache(ttl=float(os.getenv("TAIGA_RECORD_CACHE_TTL", 120)))
+        self.fanout_slots = threading.BoundedSemaphore(FANOUT_CONCURRENCY)
+        # Per-project search results, kept briefly so refined queries are cheap
+        self.search_cache = TTLCache(ttl=float(os.getenv("TAIGA_SEARCH_CACHE_TTL", 30)),
+                                     max_entries=int(os.getenv("TAIGA_SEARCH_CACHE_SIZE", 2000)))
+        # Timeouts, retries and rate limiting for every upstream call
+        self.upstream = UpstreamPolicy()
+        # Last successful result of each read: (saved_at, value), see _read
+        self.last_good = TTLCache(ttl=STALE_TTL)
+        # Rapid edits to the same task become one write with its latest known version
+        self.task_writes = WriteCoalescer(self._write_task_fields)
+        self.task_versions = TTLCache(ttl=float(os.getenv("TAIGA_RECORD_CACHE_TTL", 120)))
+        # What changed per project, for clients polling or streaming changes
+        self.changes = ChangeFeed()
+        # Edits made in Taiga itself arrive as webhook events, applied in batches
+        self.webhooks = WebhookBatcher(self.apply_webhook_events)
 
     def set_host(self, url: str):
         """Set custom Taiga instance URL"""
@@ -44,9 +99,22 @@ class TaigaService:
             
             # Authenticate
             self.api.auth(username=username, password=password)
+            # Route python-taiga's calls through the upstream policy too
+            self.api.raw_request = PolicyRequestMaker(
+                self.upstream, "/api/v1", self.host, self.api.token, self.api.token_type, self.api.tls_verify
+            )
+            self.api._init_resources()
             
             # Get current user info
             self.current_user = self.api.me()
+
+            # Cached metadata may belong to another host or user
+            self.metadata_cache.invalidate()
+            self.ref_index.clear()
+            self.record_cache.invalidate()
+            self.search_cache.invalidate()
+            self.last_good.invalidate()
+            self.task_versions.invalidate()
             
             return {
                 "auth_token": self.api.token,
@@ -65,18 +133,77 @@ class TaigaService:
         if not self.api or not self.api.token:
             raise Exception("Not authenticated. Please login first.")
 
+    def _request(self, method: str, path: str, **kwargs):
+        """Make an authenticated request to the Taiga REST API (see app/upstream.py)"""
+        headers = {
+            "Authorization": f"Bearer {self.api.token}",
+            "Content-Type": "application/json"
+        }
+        headers.update(kwargs.pop("headers", {}))
+        return self.upstream.request(method, f"{self.host}/api/v1{path}", headers=headers, **kwargs)
+
+    def _read(self, key: Tuple, load, cache: Optional[TTLCache] = None) -> Any:
+        """
+        Load a read (through cache when given), keeping its last good copy
+
+        When Taiga is unavailable (circuit open, connection errors, 5xx) and
+        a copy is kept, that copy is returned and the request is marked stale
+        so the response says so instead of failing.
+        """
+        def fresh():
+            value = load()
+            self.last_good.set(key, (time.time(), value))
+            return value
+
+        try:
+            return cache.get_or_load(key, fresh) if cache is not None else fresh()
+        except Exception as e:
+            kept = self.last_good.get(key)
+            if kept is None or not is_unavailable(e):
+                raise
+            saved_at, value = kept
+            request_context.current().mark_stale(time.time() - saved_at)
+            return value
+
+    def iter_pages(self, path: str, params: Dict, kind: Optional[str] = None,
+                   page_size: int = 100) -> Iterator[List[Dict]]:
+        """Yield a Taiga listing one page at a time (refs are indexed per page)"""
+        self._ensure_authenticated()
+        page = 1
+        while True:
+            response = self._request("GET", path, params={**params, "page": page, "page_size": page_size})
+            if response.status_code == 404 and page > 1:
+                return
+            response.raise_for_status()
+            items = response.json()
+            if kind and items:
+                self.ref_index.record(kind, params.get("project"), items)
+            if items:
+                yield items
+            if "x-paginated" in response.headers:
+                has_next = bool(response.headers.get("x-pagination-next"))
+            else:
+                has_next = len(items) == page_size
+            if not items or not has_next:
+                return
+            page += 1
+
     # Projects
     def get_projects(self) -> List[Dict]:
         """Get all projects"""
         self._ensure_authenticated()
-        projects = self.api.projects.list()
-        return [self._project_to_dict(p) for p in projects]
+        return self._read(
+            (self.host, "projects"),
+            lambda: [self._project_to_dict(p) for p in self.api.projects.list()]
+        )
 
     def get_project(self, project_id: int) -> Dict:
         """Get project by ID"""
         self._ensure_authenticated()
-        project = self.api.projects.get(project_id)
-        return self._project_to_dict(project)
+        return self._read(
+            (self.host, "project_detail", project_id),
+            lambda: self._project_to_dict(self.api.projects.get(project_id))
+        )
 
     def get_project_by_slug(self, slug: str) -> Dict:
         """Get project by slug"""
@@ -96,22 +223,32 @@ class TaigaService:
         # Let's try to force x-disable-pagination header if possible, OR loop manually.
         
         # Manual pagination implementation to be safe and ensure ALL are retrieved
-        all_stories = []
-        page = 1
-        while True:
-            try:
-                stories_page = self.api.user_stories.list(project=project_id, page=page, page_size=100)
-                if not stories_page:
-                    break
-                all_stories.extend(stories_page)
-                if len(stories_page) < 100:
+        def load() -> List[Dict]:
+            all_stories = []
+            page = 1
+            while True:
+                try:
+                    stories_page = self.api.user_stories.list(project=project_id, page=page, page_size=100)
+                    if not stories_page:
+                        break
+                    all_stories.extend(stories_page)
+                    if len(stories_page) < 100:
+                        break
+                    page += 1
+                except Exception as e:
+                    # Taiga being down is not an empty project (serve the last good copy)
+                    if page == 1 and is_unavailable(e):
+                        raise
+                    # Fallback or end of pages
                     break
-                page += 1
-            except Exception:
-                # Fallback or end of pages
-                break
-                
-        return [self._userstory_to_dict(s) for s in all_stories]
+
+            stories = [self._userstory_to_dict(s) for s in all_stories]
+            self._publish_diff(project_id, "userstory", (self.host, "userstories", project_id), stories)
+            self.ref_index.record("userstory", project_id, stories)
+            self.record_cache.set((self.host, "userstory", project_id), StoryStore(project_id, stories))
+            return stories
+
+        return self._read((self.host, "userstories", project_id), load)
 
     def search_user_stories(self, project_id: int, query: str = "", milestone: str = "null", 
                            page: int = 1, page_size: int = 100) -> Dict:
@@ -120,11 +257,6 @@ class TaigaService:
         """
         self._ensure_authenticated()
         
-        import requests
-        
-        # Build URL with parameters - use self.host + /api/v1
-        api_url = f"{self.host}/api/v1"
-        url = f"{api_url}/userstories"
         params = {
             "project": project_id,
             "page": page,
@@ -135,15 +267,11 @@ class TaigaService:
         if query:
             params["q"] = query
         
-        headers = {
-            "Authorization": f"Bearer {self.api.token}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.get(url, params=params, headers=headers)
+        response = self._request("GET", "/userstories", params=params)
         response.raise_for_status()
         
         stories_data = response.json()
+        self.ref_index.record("userstory", project_id, stories_data)
         
         # Get pagination headers
         total_count = int(response.headers.get('x-pagination-count', 0))
@@ -164,14 +292,61 @@ class TaigaService:
         """Get user story by ID"""
         self._ensure_authenticated()
         story = self.api.user_stories.get(story_id)
-        return self._userstory_to_dict(story)
+        story_dict = self._userstory_to_dict(story)
+        self.ref_index.record("userstory", story.project, [story_dict])
+        return story_dict
+
+    def get_user_story_workspace(self, project_id: int, story_id: int) -> Dict:
+        """
+        Get everything the user story screen needs in one call
+
+        The story, its tasks and the project metadata are fetched concurrently;
+        task statuses and members share a single cached project lookup.
+        """
+        self._ensure_authenticated()
+
+        def fetch_story() -> Dict:
+            try:
+                story = self.api.user_stories.get(story_id)
+            except TaigaRestException as e:
+                if e.status_code == 404:
+                    raise NotFoundError(f"User story {story_id} not found") from e
+                raise
+            if story.project != project_id:
+                raise NotFoundError(f"User story {story_id} not found in project {project_id}")
+            story_dict = self._userstory_to_dict(story)
+            self.ref_index.record("userstory", story.project, [story_dict])
+            return story_dict
+
+        with ContextThreadPoolExecutor(max_workers=3) as executor:
+            story_future = executor.submit(fetch_story)
+            tasks_future = executor.submit(self.get_tasks, project_id, story_id)
+            metadata_future = executor.submit(self._get_project_metadata, project_id)
+
+            story = story_future.result()
+            tasks = tasks_future.result()
+            metadata = metadata_future.result()
+
+        return {
+            "user_story": story,
+            "tasks": tasks,
+            "task_statuses": metadata["task_statuses"],
+            "members": metadata["members"],
+        }
 
     # Epics
     def get_epics(self, project_id: int) -> List[Dict]:
         """Get epics for a project"""
         self._ensure_authenticated()
-        epics = self.api.epics.list(project=project_id)
-        return [self._epic_to_dict(e) for e in epics]
+
+        def load() -> List[Dict]:
+            epics = [self._epic_to_dict(e) for e in self.api.epics.list(project=project_id)]
+            self._publish_diff(project_id, "epic", (self.host, "epics", project_id), epics)
+            self.ref_index.record("epic", project_id, epics)
+            self.record_cache.set((self.host, "epic", project_id), StoryStore(project_id, epics))
+            return epics
+
+        return self._read((self.host, "epics", project_id), load)
 
     def get_epic(self, epic_id: int) -> Dict:
         """Get epic by ID"""
@@ -181,14 +356,36 @@ class TaigaService:
 
     # Tasks
     def get_tasks(self, project_id: int, user_story_id: Optional[int] = None) -> List[Dict]:
-        """Get tasks for a project or user story"""
+        """
+        Get tasks for a project or user story (from the cached task set when there is one)
+
+        Fresh fetches are returned through a TaskStore too, so a cold and a
+        warm cache give tasks of the same shape (TaskStore.to_dict).
+        """
         self._ensure_authenticated()
-        
-        import requests
-        
-        # Build URL with parameters - use self.host + /api/v1
-        api_url = f"{self.host}/api/v1"
-        url = f"{api_url}/tasks"
+        # Kept current by our own writes (see _write_through), so no refetch after them
+        store = self.record_cache.get((self.host, "task", project_id))
+        if store is not None:
+            return list(store.iter_dicts(user_story_id))
+        try:
+            tasks_data = self._fetch_tasks(project_id, user_story_id)
+        except Exception as e:
+            kept = self.last_good.get((self.host, "task", project_id))
+            if kept is not None and is_unavailable(e):
+                saved_at, store = kept
+                request_context.current().mark_stale(time.time() - saved_at)
+                return list(store.iter_dicts(user_story_id))
+            print(f"Error fetching tasks: {e}")
+            return []
+        if user_story_id:
+            return list(TaskStore(project_id, tasks_data).iter_dicts())
+        store = self._task_store(project_id, tasks_data)
+        self.record_cache.set((self.host, "task", project_id), store)
+        self.last_good.set((self.host, "task", project_id), (time.time(), store))
+        return list(store.iter_dicts())
+
+    def _fetch_tasks(self, project_id: int, user_story_id: Optional[int] = None) -> List[Dict]:
+        """Fetch tasks from Taiga, raising on failure, and refresh the ref index"""
         params = {
             "project": project_id,
         }
@@ -196,26 +393,351 @@ class TaigaService:
         if user_story_id:
             params["user_story"] = user_story_id
         
-        headers = {
-            "Authorization": f"Bearer {self.api.token}",
-            "Content-Type": "application/json",
-            "x-disable-pagination": "1"  # Fetch all tasks without pagination limit
+        # Fetch all tasks without pagination limit
+        response = self._request("GET", "/tasks", params=params, headers={"x-disable-pagination": "1"})
+        response.raise_for_status()
+        tasks_data = response.json()
+        self.ref_index.record("task", project_id, tasks_data)
+        return tasks_data
+
+    def get_task_store(self, project_id: int) -> TaskStore:
+        """Get the compact cached task set for a project, fetching it once if missing"""
+        self._ensure_authenticated()
+        return self._read(
+            (self.host, "task", project_id),
+            lambda: self._task_store(project_id, self._fetch_tasks(project_id)),
+            self.record_cache
+        )
+
+    def _task_store(self, project_id: int, tasks_data: List[Dict]) -> TaskStore:
+        """Build a project's task set from a full fetch, publishing what changed since the last one"""
+        store = TaskStore(project_id, tasks_data)
+        kept = self.last_good.get((self.host, "task", project_id))
+        if kept is None:
+            # Nothing to compare with: earlier cursors can't be answered
+            self.changes.reset(project_id)
+        else:
+            previous = kept[1]
+            self.changes.publish(project_id, "task", diff_items(
+                {record.id: previous.to_dict(record) for record in previous.records()},
+                {record.id: store.to_dict(record) for record in store.records()}
+            ))
+        return store
+
+    def _publish_diff(self, project_id: int, kind: str, key: Tuple, items: List[Dict]) -> None:
+        """Publish how a freshly listed story/epic set differs from its last good copy"""
+        kept = self.last_good.get(key)
+        if kept is None:
+            self.changes.reset(project_id)
+            return
+        self.changes.publish(project_id, kind, diff_items(
+            {item["id"]: item for item in kept[1]}, {item["id"]: item for item in items}
+        ))
+
+    # Change feed
+    def get_changes(self, project_id: int, since: Optional[str] = None) -> Dict:
+        """
+        Tasks, user stories and epics created, updated or deleted since a cursor
+
+        Refreshes the project's cached task and story sets first when they
+        expired, so what changed in Taiga meanwhile shows up (see app/changes.py).
+        """
+        self.get_task_store(project_id)
+        if self.record_cache.get((self.host, "userstory", project_id)) is None:
+            self.get_user_stories(project_id)
+        return self.changes.since(project_id, since)
+
+    def iter_changes(self, project_id: int, since: Optional[str] = None,
+                     heartbeat: float = 15) -> Iterator[Optional[Dict]]:
+        """
+        Yield change batches for a project as they happen
+
+        The first batch answers since (or just carries the current cursor);
+        None is yielded after heartbeat seconds without changes. Stops when
+        the client disconnects.
+        """
+        context = request_context.current()
+        result = self.get_changes(project_id, since)
+        while not context.cancelled.is_set():
+            yield result if since is None or self.changes.has_changes(result) else None
+            since = result["cursor"]
+            self.changes.wait(project_id, since, heartbeat)
+            result = self.get_changes(project_id, since)
+
+    def get_task_stats(self, project_id: int) -> Dict:
+        """Task counts per status/assignee/user story, open/closed ratios and ages"""
+        store = self.get_task_store(project_id)
+        stats = store.columns.compute()
+
+        def names(groups: Dict, table, key: str) -> Dict[int, Optional[str]]:
+            return {item_id: (table.get(item_id) or {}).get(key) for item_id in groups}
+
+        status_names = names(stats["by_status"], store.statuses, "name")
+        user_names = names(stats["by_assignee"], store.users, "full_name_display")
+        # User story subjects when the project's stories are cached too
+        stories = self.record_cache.get((self.host, "userstory", project_id))
+        story_names = {
+            story_id: getattr(stories.get(story_id), "subject", None) if stories else None
+            for story_id in stats["by_user_story"]
         }
-        
-        try:
-            response = requests.get(url, params=params, headers=headers)
+        return {
+            **stats,
+            "by_status": label_groups(stats["by_status"], status_names),
+            "by_assignee": label_groups(stats["by_assignee"], user_names),
+            "by_user_story": label_groups(stats["by_user_story"], story_names),
+        }
+
+    def iter_fan_out(self, func, items: List) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run func(item) for every item concurrently, sharing the global fan-out budget
+
+        Yields (item, result or Exception) as each call finishes; one slow or
+        failing project does not hold up or fail the others.
+        """
+        def call(item):
+            with self.fanout_slots:
+                return func(item)
+
+        if not items:
+            return
+        with ContextThreadPoolExecutor(max_workers=min(len(items), FANOUT_CONCURRENCY)) as executor:
+            futures = {executor.submit(call, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+    def fan_out(self, func, items: List) -> Dict[Any, Any]:
+        """iter_fan_out collected as {item: result or Exception}, in item order"""
+        results = dict(self.iter_fan_out(func, items))
+        return {item: results[item] for item in items}
+
+    def search_project_stories(self, project_id: int, query: str) -> List[Dict]:
+        """User stories matching query in one project (cached briefly)"""
+        self._ensure_authenticated()
+        # Keyed on the query exactly as sent to Taiga
+        cache_key = (self.host, "search", project_id, query)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+
+        # A complete cached result for a prefix of the query already holds every match
+        if not search.is_ref_query(query):
+            for length in range(len(query) - 1, 1, -1):
+                prefix = query[:length]
+                broader = self.search_cache.get((self.host, "search", project_id, prefix))
+                if (broader and broader[1] and search.narrows(prefix, query)
+                        and all(search.can_filter(story) for story in broader[0])):
+                    stories = [story for story in broader[0] if search.matches(story, query)]
+                    self.search_cache.set(cache_key, (stories, True))
+                    return stories
+
+        def load() -> Tuple[List[Dict], bool]:
+            response = self._request(
+                "GET", "/userstories",
+                params={"project": project_id, "q": query, "page": 1, "page_size": SEARCH_PAGE_SIZE}
+            )
             response.raise_for_status()
-            tasks_data = response.json()
-            return tasks_data
-        except Exception as e:
-            print(f"Error fetching tasks: {e}")
-            return []
+            stories = response.json()
+            self.ref_index.record("userstory", project_id, stories)
+            return stories, len(stories) < SEARCH_PAGE_SIZE
+
+        return self.search_cache.get_or_load(cache_key, load)[0]
+
+    def federated_search(self, project_ids: List[int], query: str,
+                         project_names: Optional[Dict[int, str]] = None,
+                         limit: int = 20) -> Iterator[Dict]:
+        """
+        Search user stories in several projects at once
+
+        Returns an iterator of {"type": "hits", "project", "results"} per
+        project as it answers (or {"type": "error", ...}), then {"type":
+        "done", "results"} with the overall top `limit` hits. Raises right
+        away when not logged in, before anything is streamed.
+        """
+        self._ensure_authenticated()
+        return self._iter_federated_search(project_ids, query, project_names or {}, limit)
+
+    def _iter_federated_search(self, project_ids: List[int], query: str, project_names: Dict[int, str],
+                               limit: int) -> Iterator[Dict]:
+        merged: List[Dict] = []
+        errors: Dict[int, str] = {}
+        for project_id, stories in self.iter_fan_out(
+            lambda pid: self.search_project_stories(pid, query), list(dict.fromkeys(project_ids))
+        ):
+            project = {"id": project_id, "name": project_names.get(project_id)}
+            if isinstance(stories, Exception):
+                errors[project_id] = str(stories)
+                yield {"type": "error", "project": project, "error": str(stories)}
+                continue
+            hits = search.rank(
+                [search.story_hit(story, project_id, project["name"]) for story in stories], query, limit
+            )
+            merged.extend(hits)
+            yield {"type": "hits", "project": project, "results": hits}
+
+        yield {"type": "done", "results": search.rank(merged, query, limit), "errors": errors}
+
+    def get_workload(self, project_ids: List[int], member_id: Optional[int] = None,
+                     project_names: Optional[Dict[int, str]] = None) -> Dict:
+        """Task counts per member and status across projects (cached task sets)"""
+        self._ensure_authenticated()
+        stores = self.fan_out(self.get_task_store, list(dict.fromkeys(project_ids)))
+        errors = {pid: str(store) for pid, store in stores.items() if isinstance(store, Exception)}
+        result = aggregate_workload(
+            {pid: store for pid, store in stores.items() if pid not in errors},
+            member_id,
+            project_names
+        )
+        result["projects"] = [
+            {"id": pid, "name": (project_names or {}).get(pid), "error": errors.get(pid)}
+            for pid in stores
+        ]
+        return result
 
     def get_task(self, task_id: int) -> Dict:
         """Get task by ID"""
         self._ensure_authenticated()
-        task = self.api.tasks.get(task_id)
-        return self._task_to_dict(task)
+        try:
+            task = self.api.tasks.get(task_id)
+        except TaigaRestException as e:
+            if e.status_code == 404:
+                raise NotFoundError(f"Task {task_id} not found") from e
+            raise
+        task_dict = self._task_to_dict(task)
+        self.ref_index.record("task", task.project, [task_dict])
+        return task_dict
+
+    def resolve_refs(self, project_id: int, refs: List[int], kind: str = "task") -> Dict:
+        """
+        Resolve ref numbers to ids for tasks, user stories or epics
+
+        Known refs are answered from the local index; the rest go through
+        Taiga's by_ref lookups concurrently and are indexed for next time.
+        """
+        if kind not in REF_KINDS:
+            raise ValueError(f"Unknown kind '{kind}'. Use one of: {', '.join(REF_KINDS)}")
+        self._ensure_authenticated()
+
+        refs = list(dict.fromkeys(refs))
+        resolved, unknown = self.ref_index.lookup_many(kind, project_id, refs)
+        path = {"task": "/tasks/by_ref", "userstory": "/userstories/by_ref", "epic": "/epics/by_ref"}[kind]
+
+        def fetch(ref: int) -> Optional[Dict]:
+            response = self._request("GET", path, params={"project": project_id, "ref": ref})
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json()
+
+        if unknown:
+            with ContextThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+                items = list(executor.map(fetch, unknown))
+            found = [item for item in items if item]
+            self.ref_index.record(kind, project_id, found)
+            resolved.update({item["ref"]: item["id"] for item in found})
+
+        return {
+            "resolved": {ref: resolved[ref] for ref in refs if ref in resolved},
+            "missing": [ref for ref in refs if ref not in resolved],
+        }
+
+    def get_task_id_by_ref(self, project_id: int, ref: int) -> int:
+        """Get a task id from its ref number"""
+        result = self.resolve_refs(project_id, [ref], "task")
+        if ref not in result["resolved"]:
+            raise NotFoundError(f"Task #{ref} not found in project {project_id}")
+        return result["resolved"][ref]
+
+    def batch_get_tasks(self, ids: Optional[List[int]] = None,
+                        refs: Optional[List[Dict]] = None) -> Dict:
+        """
+        Get many tasks by id and/or (project, ref) with as few upstream calls as possible
+
+        Projects with many requested refs are listed once and filtered locally;
+        the remaining refs and ids are fetched one by one, concurrently.
+        """
+        self._ensure_authenticated()
+        ids = list(dict.fromkeys(ids or []))
+        refs = refs or []
+
+        refs_by_project: Dict[int, List[int]] = {}
+        for item in refs:
+            refs_by_project.setdefault(item["project"], []).append(item["ref"])
+
+        found: Dict[int, Dict] = {}
+        found_refs = set()
+        single_refs = []
+        for project_id, project_refs in refs_by_project.items():
+            project_refs = list(dict.fromkeys(project_refs))
+            if len(project_refs) < BATCH_LIST_THRESHOLD:
+                single_refs.extend((project_id, ref) for ref in project_refs)
+                continue
+            wanted = set(project_refs)
+            for task in self.get_tasks(project_id):
+                if task.get("ref") in wanted:
+                    found[task["id"]] = self._task_to_dict_from_json(task)
+                    found_refs.add((project_id, task["ref"]))
+            single_refs.extend((project_id, ref) for ref in project_refs
+                               if (project_id, ref) not in found_refs)
+
+        # Ids already covered by a project listing need no extra request
+        single_ids = [task_id for task_id in ids if task_id not in found]
+        errors: Dict[str, str] = {}
+
+        def fetch(path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+            response = self._request("GET", path, params=params)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json()
+
+        with ContextThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+            id_futures = {
+                task_id: executor.submit(fetch, f"/tasks/{task_id}")
+                for task_id in single_ids
+            }
+            ref_futures = {
+                key: executor.submit(fetch, "/tasks/by_ref", {"project": key[0], "ref": key[1]})
+                for key in single_refs
+            }
+
+            for task_id, future in id_futures.items():
+                try:
+                    task = future.result()
+                except Exception as e:
+                    errors[str(task_id)] = str(e)
+                    continue
+                if task:
+                    found[task["id"]] = self._task_to_dict_from_json(task)
+
+            for key, future in ref_futures.items():
+                try:
+                    task = future.result()
+                except Exception as e:
+                    errors[f"{key[0]}#{key[1]}"] = str(e)
+                    continue
+                if task:
+                    found[task["id"]] = self._task_to_dict_from_json(task)
+                    found_refs.add(key)
+
+        missing_ids = [task_id for task_id in ids if task_id not in found and str(task_id) not in errors]
+        missing_refs = [
+            {"project": project_id, "ref": ref}
+            for project_id, project_refs in refs_by_project.items()
+            for ref in dict.fromkeys(project_refs)
+            if (project_id, ref) not in found_refs and f"{project_id}#{ref}" not in errors
+        ]
+
+        for task in found.values():
+            self.ref_index.record("task", task["project"], [task])
+
+        return {
+            "tasks": found,
+            "missing": {"ids": missing_ids, "refs": missing_refs},
+            "errors": errors,
+        }
 
     def create_task(self, project_id: int, subject: str, **kwargs) -> Dict:
         """Create a new task"""
@@ -232,27 +754,26 @@ class TaigaService:
             except:
                 pass
         
+        payload = {
+            "project": project_id,
+            "subject": subject,
+            "description": kwargs.get('description', ''),
+            "status": status,
+            "assigned_to": kwargs.get('assigned_to'),
+            "user_story": kwargs.get('user_story')
+        }
+        if kwargs.get('external_reference'):
+            payload["external_reference"] = kwargs['external_reference']
+
         # Create task via direct API call
-        import requests
-        response = requests.post(
-            f"{self.host}/api/v1/tasks",
-            headers={
-                "Authorization": f"Bearer {self.api.token}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "project": project_id,
-                "subject": subject,
-                "description": kwargs.get('description', ''),
-                "status": status,
-                "assigned_to": kwargs.get('assigned_to'),
-                "user_story": kwargs.get('user_story')
-            },
-            timeout=30
-        )
+        response = self._request("POST", "/tasks", json=payload)
         
         if response.status_code in [200, 201]:
-            return self._task_to_dict_from_json(response.json())
+            raw = response.json()
+            created = self._task_to_dict_from_json(raw)
+            # The cached set keeps the fields the dict leaves out too
+            self._write_through({**raw, **created}, project_id, CREATED)
+            return created
         else:
             raise Exception(f"Failed to create task: {response.status_code} - {response.text[:200]}")
 
@@ -269,13 +790,213 @@ class TaigaService:
                     setattr(task, key, value)
         
         task.update()
-        return self._task_to_dict(task)
+        updated = self._task_to_dict(task)
+        # python-taiga keeps the pre-update *_extra_info; the cached tables know the new ones
+        self._write_through(
+            {key: value for key, value in updated.items() if not key.endswith("_extra_info")},
+            task.project
+        )
+        return updated
+
+    def update_task_coalesced(self, task_id: int, **kwargs) -> Tuple[Dict, int]:
+        """
+        Update a task, merging edits to it that arrive within a short window
 
-    def delete_task(self, task_id: int) -> None:
-        """Delete a task"""
+        Returns (updated task, number of requests merged into the one write).
+        """
         self._ensure_authenticated()
-        task = self.api.tasks.get(task_id)
-        task.delete()
+        fields = {key: value for key, value in kwargs.items() if value is not None or key == 'assigned_to'}
+        return self.task_writes.submit(task_id, fields)
+
+    def _write_task_fields(self, task_id: int, fields: Dict) -> Dict:
+        """PATCH fields with the latest known version, refetching it once on a version conflict"""
+        version = self.task_versions.get(task_id)
+        for attempt in range(2):
+            if version is None:
+                response = self._request("GET", f"/tasks/{task_id}")
+                response.raise_for_status()
+                version = response.json()["version"]
+            try:
+                return self.patch_task(task_id, version, fields)
+            except Exception as e:
+                # Taiga answers 400 "version doesn't match" when someone else wrote first
+                if attempt or "version" not in str(e).lower():
+                    raise
+                version = None
+
+    def patch_task(self, task_id: int, version: int, fields: Dict) -> Dict:
+        """Update a task in one PATCH when its version is already known"""
+        self._ensure_authenticated()
+        response = self._request("PATCH", f"/tasks/{task_id}", json={**fields, "version": version})
+        if response.status_code != 200:
+            raise Exception(f"Failed to update task: {response.status_code} - {response.text[:200]}")
+        raw = response.json()
+        task = self._task_to_dict_from_json(raw)
+        self._write_through({**raw, **task})
+        return task
+
+    def delete_task(self, task_id: int, project_id: Optional[int] = None, ref: Optional[int] = None) -> None:
+        """Delete a task (project_id and ref, when known, save the lookup)"""
+        self._ensure_authenticated()
+        if project_id is None or ref is None:
+            task = self.api.tasks.get(task_id)
+            task.delete()
+            self._forget_task(task.project, task_id, task.ref)
+            return
+        response = self._request("DELETE", f"/tasks/{task_id}")
+        if response.status_code not in (204, 404):
+            raise Exception(f"Failed to delete task: {response.status_code} - {response.text[:200]}")
+        self._forget_task(project_id, task_id, ref)
+
+    def _write_through(self, task: Dict, project_id: Optional[int] = None, op: str = UPDATED) -> None:
+        """Apply a task from a write response to the cached task set, ref index, known versions and change feed"""
+        project_id = project_id or task.get("project")
+        version = task.get("version")
+        store = self.record_cache.get((self.host, "task", project_id))
+        if store is not None:
+            store.apply({**task, "project": project_id})
+            task = store.to_dict(store.get(task["id"]))
+        self.changes.publish(project_id, "task", [(op, task["id"], task)])
+        self.ref_index.record("task", project_id, [task])
+        if version is not None:
+            self.task_versions.set(task["id"], version)
+
+    def _forget_task(self, project_id: int, task_id: int, ref: Optional[int]) -> None:
+        """Drop a deleted task from the cached task set, ref index, known versions and change feed"""
+        store = self.record_cache.get((self.host, "task", project_id))
+        if store is not None:
+            removed = store.remove(task_id)
+            ref = ref if ref is not None or removed is None else removed.ref
+        self.changes.publish(project_id, "task", [(DELETED, task_id, {"id": task_id, "ref": ref})])
+        self.ref_index.forget("task", project_id, ref=ref, item_id=task_id if ref is None else None)
+        self.task_versions.invalidate(task_id)
+
+    # Webhooks
+    def apply_webhook_events(self, events: List[WebhookEvent]) -> None:
+        """Patch cached sets, ref index and change feeds from a batch of Taiga webhook events"""
+        projects = set()
+        for event in events:
+            projects.add(event.project_id)
+            item_id = event.item["id"]
+            if event.kind != "task":
+                self._apply_story_event(event)
+            elif event.op == DELETED:
+                self._forget_task(event.project_id, item_id, event.item.get("ref"))
+            else:
+                # Someone else wrote it: the next PATCH fetches the version unless the event has it
+                self.task_versions.invalidate(item_id)
+                self._write_through(event.item, event.project_id, event.op)
+        for project_id in projects:
+            self.search_cache.invalidate_prefix((self.host, "search", project_id))
+
+    def _apply_story_event(self, event: WebhookEvent) -> None:
+        """Apply a user story/epic event to its cached set, last good list, ref index and change feed"""
+        kind, project_id, item = event.kind, event.project_id, event.item
+        store = self.record_cache.get((self.host, kind, project_id))
+        if event.op == DELETED:
+            if store is not None:
+                store.remove(item["id"])
+            self.ref_index.forget(kind, project_id, ref=item.get("ref"),
+                                  item_id=item["id"] if item.get("ref") is None else None)
+            item = {"id": item["id"], "ref": item.get("ref")}
+        else:
+            if store is not None:
+                store.upsert_many([item])
+            self.ref_index.record(kind, project_id, [item])
+
+        # Keep the next refresh from reporting the same change again
+        list_key = (self.host, "userstories" if kind == "userstory" else "epics", project_id)
+        kept = self.last_good.get(list_key)
+        if kept is not None:
+            saved_at, items = kept
+            rest = [existing for existing in items if existing["id"] != item["id"]]
+            if event.op == DELETED:
+                items = rest
+            elif len(rest) == len(items):
+                items = items + [item]
+            else:
+                items = [item if existing["id"] == item["id"] else existing for existing in items]
+            self.last_good.set(list_key, (saved_at, items))
+        self.changes.publish(project_id, kind, [(event.op, item["id"], item)])
+
+    def sync_task_manifest(self, project_id: int, story_id: int, tasks: List[Dict],
+                           key_field: str = "subject", delete_missing: bool = True,
+                           dry_run: bool = False) -> Dict:
+        """
+        Make a user story contain exactly the tasks in a manifest
+
+        Current tasks are fetched once and diffed against the manifest (see
+        app/manifest.py); the resulting creates, updates and deletes run
+        concurrently. With dry_run the plan is returned without writing.
+        """
+        if key_field not in MANIFEST_KEY_FIELDS:
+            raise ValueError(f"Unknown key_field '{key_field}'. Use one of: {', '.join(MANIFEST_KEY_FIELDS)}")
+        self._ensure_authenticated()
+        current = self._fetch_tasks(project_id, story_id)
+
+        # List payloads may omit fields (e.g. description); read those tasks in full
+        by_key = {
+            task_key(task, key_field): task
+            for task in sorted(current, key=lambda t: t.get("ref") or 0, reverse=True)
+        }
+        incomplete = [
+            task for entry in tasks
+            for task in [by_key.get(entry_key(entry, key_field))]
+            if task and missing_fields(task, entry)
+        ]
+        if incomplete:
+            def fetch(task: Dict) -> Dict:
+                response = self._request("GET", f"/tasks/{task['id']}")
+                response.raise_for_status()
+                return response.json()
+
+            with ContextThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+                details = {task["id"]: task for task in executor.map(fetch, incomplete)}
+            current = [details.get(task["id"], task) for task in current]
+
+        plan = plan_manifest(current, tasks, key_field, delete_missing)
+        writes = len(plan["create"]) + len(plan["update"]) + len(plan["delete"])
+        result = {
+            "dry_run": dry_run,
+            "plan": plan,
+            "summary": {
+                "create": len(plan["create"]),
+                "update": len(plan["update"]),
+                "delete": len(plan["delete"]),
+                "unchanged": len(plan["unchanged"]),
+                "write_calls": 0 if dry_run else writes,
+            },
+        }
+        if dry_run or not writes:
+            return result
+
+        def create(entry: Dict) -> Dict:
+            subject, fields = create_payload(entry, story_id, key_field)
+            return self.create_task(project_id, subject, **fields)
+
+        def update(item: Dict) -> Dict:
+            fields = {field: change["to"] for field, change in item["changes"].items()}
+            return self.patch_task(item["id"], item["version"], fields)
+
+        def delete(item: Dict) -> Dict:
+            self.delete_task(item["id"], project_id=project_id, ref=item["ref"])
+            return {"id": item["id"], "ref": item["ref"], "deleted": True}
+
+        operations = (
+            [("created", create, entry) for entry in plan["create"]]
+            + [("updated", update, item) for item in plan["update"]]
+            + [("deleted", delete, item) for item in plan["delete"]]
+        )
+        outcome: Dict[str, List] = {"created": [], "updated": [], "deleted": [], "errors": []}
+        with ContextThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+            futures = [(name, item, executor.submit(func, item)) for name, func, item in operations]
+            for name, item, future in futures:
+                try:
+                    outcome[name].append(future.result())
+                except Exception as e:
+                    outcome["errors"].append({"operation": name[:-1], "item": item, "error": str(e)})
+        result["results"] = outcome
+        return result
 
     def bulk_create_tasks(self, project_id: int, tasks_data: List[Dict]) -> List[Dict]:
         """
@@ -290,10 +1011,16 @@ class TaigaService:
     def _bulk_create_fallback(self, project_id: int, tasks_data: List[Dict]) -> List[Dict]:
         """Fallback: create tasks one by one"""
         created_tasks = []
-        for task_data in tasks_data:
+        for index, task_data in enumerate(tasks_data):
             try:
                 task = self.create_task(project_id, **task_data)
                 created_tasks.append(task)
+            except DeadlineExceeded as e:
+                # Out of time or the client left: report the rest as not attempted
+                created_tasks.extend(
+                    {"error": str(e), "data": data, "skipped": True} for data in tasks_data[index:]
+                )
+                break
             except Exception as e:
                 created_tasks.append({"error": str(e), "data": task_data})
         return created_tasks
@@ -307,21 +1034,35 @@ class TaigaService:
             "description": task_json.get("description", ""),
             "status": task_json.get("status"),
             "status_extra_info": task_json.get("status_extra_info"),
+            "is_closed": task_json.get("is_closed"),
             "assigned_to": task_json.get("assigned_to"),
             "assigned_to_extra_info": task_json.get("assigned_to_extra_info"),
             "user_story": task_json.get("user_story"),
             "project": task_json.get("project"),
+            "milestone": task_json.get("milestone"),
+            "tags": task_json.get("tags") or [],
+            "watchers": task_json.get("watchers") or [],
             "created_date": task_json.get("created_date"),
             "modified_date": task_json.get("modified_date"),
             "version": task_json.get("version", 1),
         }
 
     # Metadata
+    def _get_project_metadata(self, project_id: int) -> Dict:
+        """Get task statuses and members from one cached project lookup"""
+        def load() -> Dict:
+            project = self.api.projects.get(project_id)
+            return {
+                "task_statuses": [{"id": s.id, "name": s.name, "color": s.color} for s in project.task_statuses],
+                "members": self._members_to_list(project),
+            }
+
+        return self._read((self.host, "project", project_id), load, self.metadata_cache)
+
     def get_task_statuses(self, project_id: int) -> List[Dict]:
         """Get task statuses for a project"""
         self._ensure_authenticated()
-        project = self.api.projects.get(project_id)
-        return [{"id": s.id, "name": s.name, "color": s.color} for s in project.task_statuses]
+        return self._get_project_metadata(project_id)["task_statuses"]
 
     def get_project_members(self, project_id: int, slug: Optional[str] = None) -> List[Dict]:
         """
@@ -329,11 +1070,14 @@ class TaigaService:
         If slug is provided, uses get_by_slug (often returns complete member list)
         """
         self._ensure_authenticated()
-        if slug:
-            project = self.api.projects.get_by_slug(slug)
-        else:
-            project = self.api.projects.get(project_id)
-            
+        if not slug:
+            return self._get_project_metadata(project_id)["members"]
+
+        project = self.api.projects.get_by_slug(slug)
+        return self._members_to_list(project)
+
+    def _members_to_list(self, project) -> List[Dict]:
+        """Convert project members to a list of dicts"""
         return [
             {
                 "id": m.id,
@@ -389,7 +1133,10 @@ class TaigaService:
             "status_extra_info": {
                 "name": story.status_extra_info.get('name') if story.status_extra_info else None,
                 "color": story.status_extra_info.get('color') if story.status_extra_info else None
-            }
+            },
+            # Taiga's concurrency token; lets list responses get a version ETag
+            "version": getattr(story, 'version', None),
+            "modified_date": getattr(story, 'modified_date', None)
         }
 
     def _epic_to_dict(self, epic) -> Dict:
@@ -403,7 +1150,9 @@ class TaigaService:
             "status_extra_info": {
                 "name": epic.status_extra_info.get('name') if epic.status_extra_info else None,
                 "color": epic.status_extra_info.get('color') if epic.status_extra_info else None
-            }
+            },
+            "version": getattr(epic, 'version', None),
+            "modified_date": getattr(epic, 'modified_date', None)
         }
 
     def _task_to_dict(self, task) -> Dict:
@@ -0,0 +1,351 @@
+"""
+Upstream call policy for Taiga: timeouts, retries and adaptive rate limiting
+
+Every request to Taiga (our own REST calls and python-taiga's, through
+PolicyRequestMaker) goes through UpstreamPolicy.request:
+
+- connect/read timeouts are always set
+- a token bucket per host paces requests; its rate halves on 429 (and
+  honours Retry-After) and grows by one request/second for every second's
+  worth of successes, so bulk work settles near the fastest rate Taiga
+  tolerates
+- transient failures are retried with jittered exponential backoff:
+  idempotent methods on timeouts, connection errors and 429/502/503/504;
+  writes only when Taiga cannot have applied them (connection never made,
+  429/503) or when they carry an OCC version (a replay is rejected)
+- a circuit breaker per host (app/circuit.py) fails calls fast with
+  CircuitOpenError while Taiga is down or too slow
+- a fair scheduler per host (app/scheduler.py) caps concurrent calls and
+  grants them by the caller's lane and user (see app/request_context.py)
+- the caller's request deadline bounds everything: timeouts shrink to the
+  time left, no call or retry starts after it (DeadlineExceeded)
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from taiga import exceptions as taiga_exceptions
+from taiga.requestmaker import RequestMaker
+
+from app import request_context
+from app.circuit import CLOSED, CircuitBreaker
+from app.scheduler import HOST_CONCURRENCY, FairScheduler
+
+CONNECT_TIMEOUT = float(os.getenv("TAIGA_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("TAIGA_READ_TIMEOUT", 30))
+# A timeout that fires with less than this left of the request's deadline was caused by it
+DEADLINE_SLACK = 0.05
+MAX_RETRIES = int(os.getenv("TAIGA_MAX_RETRIES", 3))
+# Requests per second per host: starting point and ceiling
+RATE_LIMIT = float(os.getenv("TAIGA_RATE_LIMIT", 10))
+RATE_LIMIT_MAX = float(os.getenv("TAIGA_RATE_LIMIT_MAX", 50))
+RATE_LIMIT_MIN = 0.5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 10.0
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Rejected before any processing, so retrying a write is safe
+SAFE_WRITE_RETRY_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, rng: Callable[[], float] = random.random) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return rng() * min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt))
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose rate is cut on 429 and grows back with successes"""
+
+    def __init__(self, rate: float = RATE_LIMIT, max_rate: float = RATE_LIMIT_MAX,
+                 min_rate: float = RATE_LIMIT_MIN, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = rate
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._successes = 0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # Burst capacity is one second of the current rate
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self.blocked_until > now:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.rate:
+                self._successes = 0
+                self.rate = min(self.max_rate, self.rate + 1)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = self.clock()
+            self.throttled += 1
+            self._successes = 0
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self._updated = now
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_second": round(self.rate, 2),
+                "throttled": self.throttled,
+                "blocked_for": round(max(0.0, self.blocked_until - self.clock()), 2),
+            }
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """True when the connection was never established (nothing reached Taiga)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return type(reason).__name__ in ("NewConnectionError", "NameResolutionError")
+    return False
+
+
+class UpstreamPolicy:
+    """Timeouts, retries and per-host adaptive rate limiting for Taiga calls"""
+
+    def __init__(self, rate: float = RATE_LIMIT, max_rate: float = RATE_LIMIT_MAX,
+                 max_retries: int = MAX_RETRIES, connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT, send: Optional[Callable[..., Any]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 host_concurrency: int = HOST_CONCURRENCY):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.max_retries = max_retries
+        self.timeout = (connect_timeout, read_timeout)
+        self.send = send or requests.request
+        self.clock = clock
+        self.sleep = sleep
+        self.host_concurrency = host_concurrency
+        self.retries = 0
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._schedulers: Dict[str, FairScheduler] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> AdaptiveTokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = AdaptiveTokenBucket(self.rate, self.max_rate,
+                                                                     clock=self.clock, sleep=self.sleep)
+            return bucket
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, clock=self.clock)
+            return breaker
+
+    def scheduler(self, url: str) -> FairScheduler:
+        host = urlsplit(url).netloc
+        with self._lock:
+            scheduler = self._schedulers.get(host)
+            if scheduler is None:
+                scheduler = self._schedulers[host] = FairScheduler(self.host_concurrency, clock=self.clock)
+            return scheduler
+
+    @staticmethod
+    def _idempotent(method: str, kwargs: Dict) -> bool:
+        if method in IDEMPOTENT_METHODS:
+            return True
+        # Taiga rejects a replayed PATCH whose version is already used
+        body = kwargs.get("json")
+        return method == "PATCH" and isinstance(body, dict) and "version" in body
+
+    @staticmethod
+    def _deadline_reached(context: request_context.RequestContext) -> bool:
+        remaining = context.remaining()
+        return remaining is not None and remaining <= DEADLINE_SLACK
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request under the policy; returns the last response or raises the last error"""
+        method = method.upper()
+        timeout = kwargs.pop("timeout", self.timeout)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        idempotent = self._idempotent(method, kwargs)
+        bucket = self.bucket(url)
+        breaker = self.breaker(url)
+        scheduler = self.scheduler(url)
+        context = request_context.current()
+
+        def time_left_for(delay: float) -> bool:
+            remaining = context.remaining()
+            return remaining is None or delay < remaining
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            context.check()
+            breaker.before_call()
+            outcome = None  # (success, duration) once Taiga answered or failed
+            try:
+                # Wait for a token first: the slot is held for the call only,
+                # not across rate-limit waits or backoff sleeps
+                bucket.acquire()
+                context.check()
+                with scheduler.slot(context.lane, context.user, context.remaining()):
+                    call_timeout = context.clamp(timeout)
+                    started = self.clock()
+                    try:
+                        response, error = self.send(method, url, timeout=call_timeout, **kwargs), None
+                    except requests.RequestException as e:
+                        error = e
+                if error is None:
+                    outcome = (response.status_code < 500, self.clock() - started)
+                elif not (isinstance(error, requests.Timeout) and self._deadline_reached(context)):
+                    # (a timeout from our own deadline is not a Taiga failure;
+                    # one with budget left, e.g. a connect timeout, is)
+                    outcome = (False, 0.0)
+            except (TimeoutError, request_context.DeadlineExceeded):
+                raise context.interrupt("deadline exceeded")
+            finally:
+                # Whatever stopped the call short (deadline, unexpected error)
+                # must not leave a half-open probe taken forever
+                if outcome is None:
+                    breaker.cancel_call()
+                else:
+                    breaker.record(*outcome)
+            if error is not None:
+                if outcome is None:
+                    raise context.interrupt("deadline exceeded") from error
+                delay = backoff_delay(attempt)
+                if last_attempt or not (idempotent or _never_sent(error)) or not time_left_for(delay):
+                    raise error
+                self.retries += 1
+                self.sleep(delay)
+                continue
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                bucket.on_throttle(retry_after)
+            elif response.status_code < 500:
+                bucket.on_success()
+
+            retryable = response.status_code in RETRY_STATUSES and (
+                idempotent or response.status_code in SAFE_WRITE_RETRY_STATUSES
+            )
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if last_attempt or not retryable or not time_left_for(delay):
+                return response
+            self.retries += 1
+            # After a 429 the bucket already waits out Retry-After
+            if not (response.status_code == 429 and retry_after):
+                self.sleep(delay)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = dict(self._buckets)
+            breakers = dict(self._breakers)
+            schedulers = dict(self._schedulers)
+        hosts = {host: bucket.snapshot() for host, bucket in buckets.items()}
+        for host, breaker in breakers.items():
+            hosts.setdefault(host, {})["breaker"] = breaker.snapshot()
+        for host, scheduler in schedulers.items():
+            hosts.setdefault(host, {})["scheduler"] = scheduler.snapshot()
+        return {"retries": self.retries, "hosts": hosts}
+
+    def open_circuits(self) -> Dict[str, Dict[str, Any]]:
+        """Hosts whose breaker is not closed"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        snapshots = {host: breaker.snapshot() for host, breaker in breakers.items()}
+        return {host: snapshot for host, snapshot in snapshots.items() if snapshot["state"] != CLOSED}
+
+
+class PolicyRequestMaker(RequestMaker):
+    """python-taiga RequestMaker whose calls go through an UpstreamPolicy"""
+
+    def __init__(self, policy: UpstreamPolicy, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.policy = policy
+
+    def _send(self, method: str, uri: str, query=None, **kwargs):
+        full_url = self.urljoin(self.host, self.api_path, uri)
+        try:
+            result = self.policy.request(method, full_url, params=query or {}, verify=self.tls_verify, **kwargs)
+        except requests.RequestException:
+            raise taiga_exceptions.TaigaRestException(full_url, 400, "Network error!", method)
+        if self.is_bad_response(result):
+            raise taiga_exceptions.TaigaRestException(full_url, result.status_code, result.text, method)
+        return result
+
+    def get(self, uri, query=None, cache=False, paginate=True, **parameters):
+        uri = uri.format(**parameters)
+        if cache:
+            try:
+                return self._cache.get(self.urljoin(self.host, self.api_path, uri))
+            except Exception:
+                pass
+        result = self._send("GET", uri, query, headers=self.headers(paginate))
+        if cache:
+            self._cache.put(self.urljoin(self.host, self.api_path, uri), result)
+        return result
+
+    def post(self, uri, payload=None, query=None, files=None, **parameters):
+        if files:
+            headers = {"Authorization": f"{self.token_type} {self.token}", "x-disable-pagination": "True"}
+            return self._send("POST", uri.format(**parameters), query, headers=headers, data=payload, files=files)
+        return self._send("POST", uri.format(**parameters), query, headers=self.headers(), json=payload)
+
+    def put(self, uri, payload=None, query=None, **parameters):
+        return self._send("PUT", uri.format(**parameters), query, headers=self.headers(), json=payload)
+
+    def patch(self, uri, payload=None, query=None, **parameters):
+        return self._send("PATCH", uri.format(**parameters), query, headers=self.headers(), json=payload)
+
+    def delete(self, uri, query=None, **parameters):
+        return self._send("DELETE", uri.format(**parameters), query, headers=self.headers())
@@ -0,0 +1,151 @@
+"""
+Taiga webhook events: signature check, decoding and batching
+
+Taiga signs each webhook body with HMAC-SHA1 of the project's webhook key
+(X-TAIGA-WEBHOOK-SIGNATURE, hex). Task, user story and epic events are
+decoded into the dict shapes the service caches, and WebhookBatcher hands
+them over once per window so a burst of edits is applied in one pass, with
+several events for the same item collapsed to the last one.
+"""
+import hashlib
+import hmac
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.changes import CREATED, UPDATED, DELETED
+
+WEBHOOK_SECRET = os.getenv("TAIGA_WEBHOOK_SECRET", "")
+WEBHOOK_BATCH_WINDOW = float(os.getenv("TAIGA_WEBHOOK_BATCH_WINDOW", 1))
+
+ACTIONS = {"create": CREATED, "change": UPDATED, "delete": DELETED}
+KINDS = ("task", "userstory", "epic")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha1).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+class WebhookEvent:
+    """One decoded change: item is in the cached dict shape (task or story/epic)"""
+
+    __slots__ = ("kind", "op", "project_id", "item")
+
+    def __init__(self, kind: str, op: str, project_id: int, item: Dict):
+        self.kind = kind
+        self.op = op
+        self.project_id = project_id
+        self.item = item
+
+
+def _id(value):
+    """Webhook payloads nest related objects ({"id": ..., "name": ...}); plain ids pass through"""
+    return value.get("id") if isinstance(value, dict) else value
+
+
+def decode(payload: Dict) -> Optional[WebhookEvent]:
+    """A WebhookEvent for task/userstory/epic create, change and delete; None for anything else"""
+    kind, op = payload.get("type"), ACTIONS.get(payload.get("action"))
+    data = payload.get("data") or {}
+    project_id = _id(data.get("project"))
+    if kind not in KINDS or op is None or data.get("id") is None or project_id is None:
+        return None
+
+    status = data.get("status")
+    status_info = None
+    if isinstance(status, dict):
+        status_info = {"name": status.get("name"), "color": status.get("color")}
+    item = {
+        "id": data["id"],
+        "ref": data.get("ref"),
+        "subject": data.get("subject"),
+        "description": data.get("description", "") or "",
+        "status": _id(status),
+        "status_extra_info": status_info,
+    }
+    if kind != "task":
+        return WebhookEvent(kind, op, project_id, item)
+
+    if status_info is not None:
+        status_info["is_closed"] = status.get("is_closed")
+    assigned = data.get("assigned_to")
+    item.update({
+        "assigned_to": _id(assigned),
+        "assigned_to_extra_info": {
+            "id": assigned.get("id"),
+            "username": assigned.get("username"),
+            "full_name_display": assigned.get("full_name") or assigned.get("username"),
+            "photo": assigned.get("photo"),
+        } if isinstance(assigned, dict) else None,
+        "user_story": _id(data.get("user_story")),
+        "project": project_id,
+        "created_date": data.get("created_date"),
+        "modified_date": data.get("modified_date"),
+    })
+    # Webhook task payloads usually lack the version; keep the cached one then
+    if data.get("version") is not None:
+        item["version"] = data["version"]
+    return WebhookEvent(kind, op, project_id, item)
+
+
+class WebhookBatcher:
+    """Collects events and passes them to apply(events) once per window"""
+
+    def __init__(self, apply: Callable[[List[WebhookEvent]], None], window: float = WEBHOOK_BATCH_WINDOW):
+        self.apply = apply
+        self.window = window
+        self.received = 0
+        self.batches = 0
+        self.applied = 0
+        self._pending: List[WebhookEvent] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def add(self, event: WebhookEvent) -> None:
+        with self._lock:
+            self._pending.append(event)
+            self.received += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Apply what is pending now; returns the number of events applied"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return 0
+
+        # Last event per item; an item created within the batch stays "created"
+        latest: Dict = {}
+        for event in events:
+            key = (event.kind, event.item["id"])
+            first = latest.get(key)
+            if first is not None and first.op == CREATED and event.op == UPDATED:
+                event = WebhookEvent(event.kind, CREATED, event.project_id, event.item)
+            latest[key] = event
+        try:
+            self.apply(list(latest.values()))
+        except Exception as e:
+            print(f"Error applying webhook events: {e}")
+            return 0
+        with self._lock:
+            self.batches += 1
+            self.applied += len(latest)
+        return len(latest)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "received": self.received,
+                "batches": self.batches,
+                "applied": self.applied,
+                "pending": len(self._pending),
+            }
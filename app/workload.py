@@ -0,0 +1,83 @@
+"""
+Cross-project workload aggregation
+
+Works on the cached per-project TaskStores (app/records.py), so a repeated
+dashboard request only aggregates in memory; projects whose store expired
+are fetched again by TaigaService.get_workload, concurrently.
+"""
+from typing import Dict, List, Optional
+
+from app.stats import NONE_ID
+
+
+def _member_entry(member_id: Optional[int]) -> Dict:
+    return {"member_id": member_id, "name": None, "total": 0, "open": 0, "closed": 0,
+            "by_status": {}, "by_project": {}}
+
+
+def aggregate(stores: Dict[int, "TaskStore"], member_id: Optional[int] = None,
+              project_names: Optional[Dict[int, str]] = None) -> Dict:
+    """
+    Per-member and per-status task counts across projects
+
+    With member_id only that member is counted and their open tasks are
+    listed as well.
+    """
+    project_names = project_names or {}
+    members: Dict[Optional[int], Dict] = {}
+    statuses: Dict[str, Dict[str, int]] = {}
+    open_tasks: List[Dict] = []
+
+    for project_id, store in stores.items():
+        # Write-through and webhooks update the columns concurrently
+        columns = store.columns.snapshot()
+        for task_id, status, assigned_to, closed in zip(columns["ids"], columns["status"],
+                                                        columns["assigned_to"], columns["closed"]):
+            assignee = None if assigned_to == NONE_ID else assigned_to
+            if member_id is not None and assignee != member_id:
+                continue
+            status_name = (store.statuses.get(status) or {}).get("name") or str(status)
+
+            entry = members.get(assignee)
+            if entry is None:
+                entry = members[assignee] = _member_entry(assignee)
+            if entry["name"] is None and assignee is not None:
+                entry["name"] = (store.users.get(assignee) or {}).get("full_name_display")
+            entry["total"] += 1
+            entry["closed" if closed else "open"] += 1
+            entry["by_status"][status_name] = entry["by_status"].get(status_name, 0) + 1
+            entry["by_project"][project_id] = entry["by_project"].get(project_id, 0) + 1
+
+            status_entry = statuses.setdefault(status_name, {"total": 0, "open": 0, "closed": 0})
+            status_entry["total"] += 1
+            status_entry["closed" if closed else "open"] += 1
+
+            if member_id is not None and not closed:
+                record = store.get(task_id)
+                if record is None:
+                    # Removed since the snapshot
+                    continue
+                open_tasks.append({
+                    "id": task_id,
+                    "ref": record.ref,
+                    "subject": record.subject,
+                    "project": project_id,
+                    "project_name": project_names.get(project_id),
+                    "status": status,
+                    "status_name": status_name,
+                    "user_story": record.user_story,
+                    "modified_date": record.modified_date,
+                })
+
+    result = {
+        "members": sorted(members.values(), key=lambda m: (-m["open"], m["name"] or "")),
+        "by_status": statuses,
+        "totals": {
+            "total": sum(m["total"] for m in members.values()),
+            "open": sum(m["open"] for m in members.values()),
+            "closed": sum(m["closed"] for m in members.values()),
+        },
+    }
+    if member_id is not None:
+        result["tasks"] = sorted(open_tasks, key=lambda t: t["modified_date"] or "", reverse=True)
+    return result
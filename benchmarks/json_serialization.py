@@ -0,0 +1,52 @@
+"""
+Serialization time for large task list payloads
+
+Usage:
+    python benchmarks/json_serialization.py [task_count ...]
+
+Compares FastAPI's default path for a returned dict (jsonable_encoder +
+JSONResponse) against FastJSONResponse with the stdlib encoder and with
+orjson, on {"success": True, "data": [...]} envelopes like get_tasks returns.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import app.json_response as json_response
+from benchmarks.wire_bytes import sample_tasks
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(counts):
+    orjson = json_response.orjson
+    print(f"{'tasks':>8}{'jsonable_encoder+stdlib':>26}{'FastJSON (stdlib)':>20}{'FastJSON (orjson)':>20}")
+    for count in counts:
+        content = {"success": True, "data": sample_tasks(count)}
+
+        default_path = best_of(lambda: JSONResponse(jsonable_encoder(content)))
+
+        json_response.orjson = None
+        stdlib_path = best_of(lambda: json_response.FastJSONResponse(content))
+
+        json_response.orjson = orjson
+        orjson_path = best_of(lambda: json_response.FastJSONResponse(content)) if orjson else None
+
+        orjson_cell = f"{orjson_path * 1000:>17.1f}ms" if orjson_path is not None else f"{'not installed':>20}"
+        print(f"{count:>8}{default_path * 1000:>23.1f}ms{stdlib_path * 1000:>17.1f}ms{orjson_cell}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
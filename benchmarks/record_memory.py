@@ -0,0 +1,50 @@
+"""
+Memory per cached task: plain dicts vs compact records
+
+Usage:
+    python benchmarks/record_memory.py [task_count]
+
+Measures (with tracemalloc) the bytes per task of keeping a project's tasks
+as the dicts returned by TaigaService._task_to_dict_from_json, as Taiga's
+raw list JSON, and as an app.records.TaskStore.
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.records import TaskStore
+from app.taiga_service import TaigaService
+from benchmarks.wire_bytes import sample_tasks
+
+
+def measure(build):
+    """Bytes retained by the object build() returns"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return obj, size
+
+
+def main(count):
+    # Decode from JSON so each dict owns its strings, as with a real response
+    raw_json = json.dumps(sample_tasks(count))
+    service = TaigaService()
+
+    _, raw_size = measure(lambda: json.loads(raw_json))
+    _, dict_size = measure(lambda: [service._task_to_dict_from_json(t) for t in json.loads(raw_json)])
+    _, store_size = measure(lambda: TaskStore(133, json.loads(raw_json)))
+
+    print(f"{count} tasks")
+    print(f"{'raw Taiga JSON dicts':32}{raw_size / count:>10,.0f} B/task")
+    print(f"{'_task_to_dict_from_json dicts':32}{dict_size / count:>10,.0f} B/task")
+    print(f"{'TaskStore records':32}{store_size / count:>10,.0f} B/task")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
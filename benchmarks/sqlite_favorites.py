@@ -0,0 +1,105 @@
+"""
+Favorites storage under concurrent mixed reads and writes
+
+Usage:
+    python benchmarks/sqlite_favorites.py [threads]
+
+Runs the same workload against a temporary favorites database with the
+previous engine (default journal mode, no pragmas) and with the tuned one
+from app.database (WAL, pragmas, pooled connections): each thread does 80%
+reads (list favorite projects, list a project's favorite user stories) and
+20% writes (add or remove a favorite) on favorite_projects and
+favorite_user_stories. Prints throughput, p50/p95 latencies and errors.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, FavoriteProject, FavoriteUserStory, create_sqlite_engine
+
+OPS_PER_THREAD = 200
+PROJECTS = 50
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+def seed(Session):
+    with Session() as db:
+        for project_id in range(PROJECTS):
+            db.add(FavoriteProject(project_id=project_id, project_name=f"Project {project_id}",
+                                   project_slug=f"project-{project_id}"))
+            for ref in range(20):
+                db.add(FavoriteUserStory(user_story_id=project_id * 1000 + ref, user_story_ref=ref,
+                                         user_story_subject=f"Story {ref}", project_id=project_id))
+        db.commit()
+
+
+def worker(Session, index, reads, writes, errors):
+    rng = random.Random(index)
+    for op in range(OPS_PER_THREAD):
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                project_id = rng.randrange(PROJECTS)
+                if rng.random() < 0.8:
+                    if rng.random() < 0.5:
+                        db.query(FavoriteProject).order_by(FavoriteProject.created_at.desc()).all()
+                    else:
+                        db.query(FavoriteUserStory).filter(FavoriteUserStory.project_id == project_id).all()
+                    reads.append(time.perf_counter() - start)
+                    continue
+                story_id = 10_000_000 + index * OPS_PER_THREAD + op
+                db.add(FavoriteUserStory(user_story_id=story_id, user_story_ref=op,
+                                         user_story_subject="New", project_id=project_id))
+                db.commit()
+                # Remove an earlier one, like a user toggling favorites
+                previous = db.query(FavoriteUserStory).filter(
+                    FavoriteUserStory.user_story_id == story_id - 1).first()
+                if previous:
+                    db.delete(previous)
+                    db.commit()
+                writes.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+
+def run(label, engine, threads):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(Session)
+    reads, writes, errors = [], [], []
+    workers = [threading.Thread(target=worker, args=(Session, i, reads, writes, errors)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    print(f"  {label:8}: {(len(reads) + len(writes)) / elapsed:7.0f} ops/s   "
+          f"read p50 {percentile(reads, 0.5) * 1000:6.1f} ms p95 {percentile(reads, 0.95) * 1000:6.1f} ms   "
+          f"write p50 {percentile(writes, 0.5) * 1000:6.1f} ms p95 {percentile(writes, 0.95) * 1000:6.1f} ms   "
+          f"errors {len(errors)}")
+
+
+def main(threads):
+    print(f"{threads} threads x {OPS_PER_THREAD} ops (80% reads, 20% writes)")
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'default.db')}"
+        run("default", create_engine(url, connect_args={"check_same_thread": False}), threads)
+        run("tuned", create_sqlite_engine(f"sqlite:///{os.path.join(directory, 'tuned.db')}"), threads)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,45 @@
+"""
+Time to compute project task analytics from the columnar arrays
+
+Usage:
+    python benchmarks/task_stats.py [task_count]
+
+Builds a TaskStore of synthetic tasks and times TaskColumns.compute() from
+scratch, again after one task changes, and when memoized.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.records import TaskStore
+from benchmarks.wire_bytes import sample_tasks
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(count):
+    tasks = sample_tasks(count)
+    for i, task in enumerate(tasks):
+        task["created_date"] = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00.000Z"
+    store = TaskStore(133, tasks)
+    columns = store.columns
+
+    cold = timed(columns.compute)
+    memoized = timed(columns.compute)
+    store.upsert(dict(tasks[0], status=1503, is_closed=True))
+    after_change = timed(columns.compute)
+
+    print(f"{count} tasks")
+    print(f"  compute (cold):         {cold:8.1f} ms")
+    print(f"  compute (after change): {after_change:8.1f} ms")
+    print(f"  compute (memoized):     {memoized:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
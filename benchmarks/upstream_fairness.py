@@ -0,0 +1,81 @@
+"""
+Interactive latency while a bulk job saturates the upstream budget
+
+Usage:
+    python benchmarks/upstream_fairness.py [bulk_threads]
+
+Simulates a Taiga host that serves a limited number of calls at a time
+(50 ms each) and runs a bulk flood next to a trickle of interactive reads:
+without a concurrency cap (everyone piles up at the host), with the cap
+and every caller in the same lane (fair queuing only), and with the bulk
+calls in the bulk lane. Prints interactive p50/p95 for each.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import request_context
+from app.request_context import RequestContext
+from app.scheduler import BULK, INTERACTIVE, FairScheduler
+from app.upstream import UpstreamPolicy
+
+URL = "https://taiga.example/api/v1/tasks"
+CALL_SECONDS = 0.05
+HOST_SLOTS = 4
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+
+def run(bulk_threads, bulk_lane, slots):
+    # The host serves HOST_SLOTS calls at a time, first come first served
+    host = FairScheduler(HOST_SLOTS)
+
+    def send(method, url, **kwargs):
+        with host.slot():
+            time.sleep(CALL_SECONDS)
+        return Response()
+
+    policy = UpstreamPolicy(rate=10000, max_rate=10000, send=send, host_concurrency=slots)
+    stop = threading.Event()
+
+    def bulk():
+        with request_context.use(RequestContext(bulk_lane, "bulk-user")):
+            while not stop.is_set():
+                policy.request("POST", URL, json={})
+
+    workers = [threading.Thread(target=bulk) for _ in range(bulk_threads)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.2)
+
+    latencies = []
+    with request_context.use(RequestContext(INTERACTIVE, "reader")):
+        for _ in range(40):
+            start = time.perf_counter()
+            policy.request("GET", URL)
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.02)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main(bulk_threads):
+    print(f"{bulk_threads} bulk threads, {HOST_SLOTS} host slots, {CALL_SECONDS * 1000:.0f} ms per call")
+    for label, lane, slots in (("no cap", INTERACTIVE, bulk_threads + 1),
+                               ("same lane", INTERACTIVE, HOST_SLOTS),
+                               ("bulk lane", BULK, HOST_SLOTS)):
+        p50, p95 = run(bulk_threads, lane, slots)
+        print(f"  interactive ({label:9}): p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,115 @@
+"""
+Bytes on the wire before/after compression for the main screens
+
+Usage:
+    python benchmarks/wire_bytes.py
+
+Compares the uncompressed size of the assets loaded by the login/projects/
+tasks screens (index.html + CSS + every JS module) and of a typical task
+list JSON payload against gzip and brotli, both as the middleware sends them
+on the fly and as precompressed by `python -m app.static_assets`.
+"""
+import gzip
+import json
+import os
+import sys
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.compression import brotli
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+
+def sample_tasks(count: int):
+    """Task list shaped like Taiga's /tasks response"""
+    return [
+        {
+            "id": 200000 + i,
+            "ref": 4000 + i,
+            "subject": f"Implementar item {i} do painel de controle",
+            "description": "",
+            "status": 1500 + i % 5,
+            "status_extra_info": {"name": ["Novo", "Em andamento", "Pronto para teste", "Fechado", "Bloqueado"][i % 5],
+                                  "color": "#70728F", "is_closed": i % 5 == 3},
+            "assigned_to": 170 + i % 12,
+            "assigned_to_extra_info": {"id": 170 + i % 12, "username": f"user{i % 12}",
+                                       "full_name_display": f"Usuário {i % 12}", "photo": None,
+                                       "big_photo": None, "gravatar_id": "0" * 32, "is_active": True},
+            "owner": 174,
+            "owner_extra_info": {"id": 174, "username": "owner", "full_name_display": "Dono"},
+            "user_story": 5258 + i % 20,
+            "user_story_extra_info": {"id": 5258 + i % 20, "ref": 900 + i % 20,
+                                      "subject": f"História {i % 20}", "epics": None},
+            "project": 133,
+            "project_extra_info": {"id": 133, "name": "DASA", "slug": "dasa", "logo_small_url": None},
+            "milestone": None,
+            "is_closed": i % 5 == 3,
+            "is_blocked": False,
+            "tags": [],
+            "watchers": [174],
+            "created_date": "2024-03-01T12:00:00.000Z",
+            "modified_date": "2024-03-02T08:30:00.000Z",
+            "finished_date": None,
+            "version": 1 + i % 4,
+        }
+        for i in range(count)
+    ]
+
+
+def static_payloads():
+    payloads = {}
+    for dirpath, _, filenames in os.walk(STATIC_DIR):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] in {".html", ".css", ".js", ".svg"}:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    payloads[os.path.relpath(path, STATIC_DIR)] = f.read()
+    return payloads
+
+
+def sizes(data: bytes):
+    dynamic_gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+    row = {
+        "raw": len(data),
+        "gzip-6 (on the fly)": len(dynamic_gzip.compress(data) + dynamic_gzip.flush()),
+        "gzip-9 (prebuilt)": len(gzip.compress(data, compresslevel=9, mtime=0)),
+    }
+    if brotli is not None:
+        row["br-4 (on the fly)"] = len(brotli.compress(data, quality=4))
+        row["br-11 (prebuilt)"] = len(brotli.compress(data, quality=11))
+    return row
+
+
+def print_table(title, rows):
+    columns = list(next(iter(rows.values())).keys())
+    print(f"\n{title}")
+    print(f"{'':32}" + "".join(f"{c:>22}" for c in columns))
+    for name, row in rows.items():
+        cells = "".join(
+            f"{row[c]:>14,} ({row[c] / row['raw']:4.0%})" if c != "raw" else f"{row[c]:>22,}"
+            for c in columns
+        )
+        print(f"{name:32}{cells}")
+
+
+def main():
+    assets = static_payloads()
+    rows = {name: sizes(data) for name, data in sorted(assets.items(), key=lambda kv: -len(kv[1]))[:6]}
+    rows["ALL static (first load)"] = sizes(b"".join(assets.values()))
+    print_table("Static assets (bytes)", rows)
+
+    json_rows = {}
+    for count in (50, 500, 5000):
+        body = json.dumps({"success": True, "data": sample_tasks(count)},
+                          ensure_ascii=False, separators=(",", ":")).encode()
+        json_rows[f"GET /tasks ({count} tasks)"] = sizes(body)
+    print_table("API JSON (bytes)", json_rows)
+
+    if brotli is None:
+        print("\nbrotli not installed: only gzip is negotiated")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,14 @@
 Taiga Integration API - Main Application
 """
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from routes import taiga_routes, favorites_routes
+from routes import taiga_routes, favorites_routes, jobs_routes, webhooks_routes
 from app.database import init_db
+from app.jobs import job_manager
+from app.compression import CompressionMiddleware
+from app.static_assets import PrecompressedStaticFiles
+from app.request_context import RequestContextMiddleware
+from app.taiga_service import taiga_service
 import os
 
 app = FastAPI(
@@ -23,20 +27,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress API responses (brotli when available, otherwise gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024)),
+)
+
+# Per-request state (e.g. stale cache marks) for the service layer
+app.add_middleware(RequestContextMiddleware)
+
 # Initialize database
 init_db()
 
 # Include routers
 app.include_router(taiga_routes.router, prefix="/api", tags=["taiga"])
 app.include_router(favorites_routes.router, prefix="/api", tags=["favorites"])
+app.include_router(jobs_routes.router, prefix="/api", tags=["jobs"])
+app.include_router(webhooks_routes.router, prefix="/api", tags=["webhooks"])
+
 
-# Serve static files
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+@app.on_event("startup")
+def start_job_manager():
+    """Start background job processing (resumes jobs left unfinished)"""
+    job_manager.start()
 
+
+@app.on_event("shutdown")
+def stop_job_manager():
+    job_manager.stop()
+
+
+# Registered before the static mount, which would otherwise shadow it
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "taiga-integration"}
+    """Health check endpoint (reports circuit breakers and rate limits per Taiga host)"""
+    open_circuits = taiga_service.upstream.open_circuits()
+    return {
+        "status": "degraded" if open_circuits else "healthy",
+        "service": "taiga-integration",
+        "upstream": taiga_service.upstream.stats(),
+        "task_writes": taiga_service.task_writes.stats(),
+        "webhooks": taiga_service.webhooks.stats(),
+    }
+
+# Serve static files (fingerprinted/precompressed build if present: python -m app.static_assets)
+STATIC_DIR = "static_dist" if os.path.isdir("static_dist") else "static"
+app.mount("/", PrecompressedStaticFiles(directory=STATIC_DIR, html=True), name="static")
 
 if __name__ == "__main__":
     import uvicorn
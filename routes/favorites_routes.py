@@ -1,11 +1,14 @@
 """
 Favorites API Routes
+
+Async routes on an async session (see get_async_db), so favorites don't
+hold threadpool workers while SQLite is busy.
 """
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.database import get_db, FavoriteProject, FavoriteUserStory
+from sqlalchemy import select
+from app.database import get_async_db, FavoriteProject, FavoriteUserStory
 
 
 router = APIRouter()
@@ -47,19 +50,19 @@ class FavoriteUserStoryResponse(BaseModel):
 
 # Project favorites
 @router.get("/favorites/projects", response_model=List[FavoriteProjectResponse])
-def get_favorite_projects(db: Session = Depends(get_db)):
+async def get_favorite_projects(db=Depends(get_async_db)):
     """Get all favorite projects"""
-    favorites = db.query(FavoriteProject).order_by(FavoriteProject.created_at.desc()).all()
-    return favorites
+    favorites = await db.scalars(select(FavoriteProject).order_by(FavoriteProject.created_at.desc()))
+    return favorites.all()
 
 
 @router.post("/favorites/projects", response_model=FavoriteProjectResponse)
-def add_favorite_project(favorite: FavoriteProjectCreate, db: Session = Depends(get_db)):
+async def add_favorite_project(favorite: FavoriteProjectCreate, db=Depends(get_async_db)):
     """Add a project to favorites"""
     # Check if already exists
-    existing = db.query(FavoriteProject).filter(
+    existing = await db.scalar(select(FavoriteProject).where(
         FavoriteProject.project_id == favorite.project_id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Project already in favorites")
@@ -70,46 +73,46 @@ def add_favorite_project(favorite: FavoriteProjectCreate, db: Session = Depends(
         project_slug=favorite.project_slug
     )
     db.add(db_favorite)
-    db.commit()
-    db.refresh(db_favorite)
+    await db.commit()
+    await db.refresh(db_favorite)
     return db_favorite
 
 
 @router.delete("/favorites/projects/{project_id}")
-def remove_favorite_project(project_id: int, db: Session = Depends(get_db)):
+async def remove_favorite_project(project_id: int, db=Depends(get_async_db)):
     """Remove a project from favorites"""
-    favorite = db.query(FavoriteProject).filter(
+    favorite = await db.scalar(select(FavoriteProject).where(
         FavoriteProject.project_id == project_id
-    ).first()
+    ))
     
     if not favorite:
         raise HTTPException(status_code=404, detail="Project not in favorites")
     
-    db.delete(favorite)
-    db.commit()
+    await db.delete(favorite)
+    await db.commit()
     return {"success": True, "message": "Project removed from favorites"}
 
 
 # User story favorites
 @router.get("/favorites/userstories", response_model=List[FavoriteUserStoryResponse])
-def get_favorite_user_stories(project_id: int = None, db: Session = Depends(get_db)):
+async def get_favorite_user_stories(project_id: int = None, db=Depends(get_async_db)):
     """Get all favorite user stories, optionally filtered by project"""
-    query = db.query(FavoriteUserStory)
+    query = select(FavoriteUserStory)
     
     if project_id:
-        query = query.filter(FavoriteUserStory.project_id == project_id)
+        query = query.where(FavoriteUserStory.project_id == project_id)
     
-    favorites = query.order_by(FavoriteUserStory.created_at.desc()).all()
-    return favorites
+    favorites = await db.scalars(query.order_by(FavoriteUserStory.created_at.desc()))
+    return favorites.all()
 
 
 @router.post("/favorites/userstories", response_model=FavoriteUserStoryResponse)
-def add_favorite_user_story(favorite: FavoriteUserStoryCreate, db: Session = Depends(get_db)):
+async def add_favorite_user_story(favorite: FavoriteUserStoryCreate, db=Depends(get_async_db)):
     """Add a user story to favorites"""
     # Check if already exists
-    existing = db.query(FavoriteUserStory).filter(
+    existing = await db.scalar(select(FavoriteUserStory).where(
         FavoriteUserStory.user_story_id == favorite.user_story_id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="User story already in favorites")
@@ -121,21 +124,21 @@ def add_favorite_user_story(favorite: FavoriteUserStoryCreate, db: Session = Dep
         project_id=favorite.project_id
     )
     db.add(db_favorite)
-    db.commit()
-    db.refresh(db_favorite)
+    await db.commit()
+    await db.refresh(db_favorite)
     return db_favorite
 
 
 @router.delete("/favorites/userstories/{user_story_id}")
-def remove_favorite_user_story(user_story_id: int, db: Session = Depends(get_db)):
+async def remove_favorite_user_story(user_story_id: int, db=Depends(get_async_db)):
     """Remove a user story from favorites"""
-    favorite = db.query(FavoriteUserStory).filter(
+    favorite = await db.scalar(select(FavoriteUserStory).where(
         FavoriteUserStory.user_story_id == user_story_id
-    ).first()
+    ))
     
     if not favorite:
         raise HTTPException(status_code=404, detail="User story not in favorites")
     
-    db.delete(favorite)
-    db.commit()
+    await db.delete(favorite)
+    await db.commit()
     return {"success": True, "message": "User story removed from favorites"}
@@ -0,0 +1,53 @@
+"""
+Background Jobs API Routes
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.jobs import job_manager
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+def list_jobs(limit: int = 50):
+    """List recent jobs"""
+    return {"success": True, "data": job_manager.list(limit)}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, items: bool = False):
+    """
+    Get job progress
+
+    Parameters:
+    - items: Include per-item status, results and errors (default: false)
+    """
+    job = job_manager.get(job_id, include_items=items)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "data": job}
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events
+
+    Events: "item" (one per finished item), "progress" (counts, throughput,
+    ETA) and a final "done".
+    """
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_manager.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"success": True, "message": "Job cancellation requested"}
@@ -1,12 +1,24 @@
 """
 Taiga API Routes
 """
-from fastapi import APIRouter, HTTPException, Body
+import asyncio
+import itertools
+from fastapi import APIRouter, HTTPException, Body, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List, Dict
 from pydantic import BaseModel
-from app.taiga_service import taiga_service
+from sqlalchemy.orm import Session
+from app.database import get_db, FavoriteProject
+from app.taiga_service import taiga_service, NotFoundError
+from app.http_cache import conditional_json
+from app.json_response import FastJSONResponse, dumps
+from app.projection import parse_fields, project
+from app.jobs import job_manager
+from app.idempotency import idempotency_store, IdempotencyConflict
+from app import importer, export, request_context
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 class LoginRequest(BaseModel):
@@ -31,10 +43,46 @@ class TaskUpdate(BaseModel):
     assigned_to: Optional[int] = None
 
 
+class TaskRef(BaseModel):
+    project: int
+    ref: int
+
+
+class TaskBatchGet(BaseModel):
+    ids: List[int] = []
+    refs: List[TaskRef] = []
+
+
 class BulkTaskCreate(BaseModel):
     tasks: List[TaskCreate]
 
 
+class BulkTaskUpdateItem(TaskUpdate):
+    id: int
+
+
+class BulkTaskUpdate(BaseModel):
+    tasks: List[BulkTaskUpdateItem]
+
+
+class BulkTaskDelete(BaseModel):
+    ids: List[int]
+
+
+class ManifestTask(BaseModel):
+    subject: str
+    key: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[int] = None
+    assigned_to: Optional[int] = None
+
+
+class TaskManifest(BaseModel):
+    tasks: List[ManifestTask]
+    key_field: str = "subject"  # "subject" or "key"
+    delete_missing: bool = True
+
+
 class SimpleBulkTaskCreate(BaseModel):
     """Simplified model for creating multiple tasks with same project and user story"""
     project_id: int
@@ -73,31 +121,39 @@ async def get_current_user():
 
 
 @router.get("/projects")
-def get_projects():
+def get_projects(request: Request):
     """Get all projects"""
     try:
         projects = taiga_service.get_projects()
-        return {"success": True, "data": projects}
+        return conditional_json(request, {"success": True, "data": projects}, "projects")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/projects/{project_id}")
-def get_project(project_id: int):
+def get_project(request: Request, project_id: int):
     """Get project by ID"""
     try:
         project = taiga_service.get_project(project_id)
-        return {"success": True, "data": project}
+        return conditional_json(request, {"success": True, "data": project}, "project")
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.get("/projects/{project_id}/userstories")
-def get_user_stories(project_id: int):
-    """Get user stories for a project"""
+def get_user_stories(request: Request, project_id: int, fields: Optional[str] = None):
+    """
+    Get user stories for a project
+
+    Parameters:
+    - fields: Comma-separated fields to return (dotted for nested, e.g.
+      "id,ref,status_extra_info.name") or "compact"
+    """
     try:
         stories = taiga_service.get_user_stories(project_id)
-        return {"success": True, "data": stories}
+        tree = parse_fields(fields, "userstory")
+        return conditional_json(request, {"success": True, "data": project(stories, tree)}, "user_stories",
+                                records=stories, variant={"fields": tree})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -108,7 +164,8 @@ def search_user_stories(
     q: str = "",
     milestone: str = "null",
     page: int = 1,
-    page_size: int = 100
+    page_size: int = 100,
+    fields: Optional[str] = None
 ):
     """
     Search user stories with pagination and filters
@@ -118,6 +175,7 @@ def search_user_stories(
     - milestone: Filter by milestone ("null" for backlog)
     - page: Page number (default: 1)
     - page_size: Items per page (default: 100)
+    - fields: Comma-separated fields to return per story, or "compact"
     """
     try:
         result = taiga_service.search_user_stories(
@@ -127,77 +185,196 @@ def search_user_stories(
             page=page,
             page_size=page_size
         )
-        return {"success": True, "data": result}
+        result["stories"] = project(result["stories"], parse_fields(fields, "userstory"))
+        return FastJSONResponse({"success": True, "data": result})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/projects/{project_id}/userstories/{story_id}/workspace")
+def get_user_story_workspace(request: Request, project_id: int, story_id: int):
+    """
+    Get a user story with its tasks, task statuses and members in one round trip
+    """
+    try:
+        workspace = taiga_service.get_user_story_workspace(project_id, story_id)
+        return conditional_json(request, {"success": True, "data": workspace}, "workspace")
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/userstories/{story_id}")
-def get_user_story(story_id: int):
+def get_user_story(request: Request, story_id: int):
     """Get user story by ID"""
     try:
         story = taiga_service.get_user_story(story_id)
-        return {"success": True, "data": story}
+        return conditional_json(request, {"success": True, "data": story}, "user_story")
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.get("/projects/{project_id}/epics")
-def get_epics(project_id: int):
-    """Get epics for a project"""
+def get_epics(request: Request, project_id: int, fields: Optional[str] = None):
+    """
+    Get epics for a project
+
+    Parameters:
+    - fields: Comma-separated fields to return, or "compact"
+    """
     try:
         epics = taiga_service.get_epics(project_id)
-        return {"success": True, "data": epics}
+        tree = parse_fields(fields, "epic")
+        return conditional_json(request, {"success": True, "data": project(epics, tree)}, "epics",
+                                records=epics, variant={"fields": tree})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/epics/{epic_id}")
-def get_epic(epic_id: int):
+def get_epic(request: Request, epic_id: int):
     """Get epic by ID"""
     try:
         epic = taiga_service.get_epic(epic_id)
-        return {"success": True, "data": epic}
+        return conditional_json(request, {"success": True, "data": epic}, "epic")
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.get("/projects/{project_id}/resolve")
+def resolve_refs(project_id: int, refs: str, kind: str = "task"):
+    """
+    Resolve ref numbers to internal ids
+
+    Parameters:
+    - refs: Comma-separated ref numbers (e.g. "4871,4872")
+    - kind: "task", "userstory" or "epic" (default: task)
+    """
+    try:
+        ref_list = [int(ref.strip().lstrip('#')) for ref in refs.split(',') if ref.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="refs must be comma-separated numbers")
+    try:
+        result = taiga_service.resolve_refs(project_id, ref_list, kind)
+        return {"success": True, "data": result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/projects/{project_id}/tasks")
-def get_tasks(project_id: int, user_story_id: Optional[int] = None):
-    """Get tasks for a project or user story"""
+def get_tasks(request: Request, project_id: int, user_story_id: Optional[int] = None,
+              fields: Optional[str] = None):
+    """
+    Get tasks for a project or user story
+
+    Parameters:
+    - fields: Comma-separated fields to return (dotted for nested, e.g.
+      "id,ref,assigned_to_extra_info.full_name_display") or "compact"
+    """
     try:
         tasks = taiga_service.get_tasks(project_id, user_story_id)
-        return {"success": True, "data": tasks}
+        tree = parse_fields(fields, "task")
+        return conditional_json(
+            request,
+            {"success": True, "data": project(tasks, tree)},
+            "tasks",
+            records=tasks,
+            variant={"fields": tree, "user_story_id": user_story_id}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/tasks/batch-get")
+def batch_get_tasks(batch: TaskBatchGet):
+    """
+    Get many tasks at once by id and/or (project, ref)
+
+    Returns found tasks keyed by id, plus the ids/refs that were missing.
+    """
+    try:
+        result = taiga_service.batch_get_tasks(
+            ids=batch.ids,
+            refs=[ref.dict() for ref in batch.refs]
+        )
+        return FastJSONResponse({"success": True, "data": result})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/tasks/{task_id}")
-def get_task(task_id: int):
+def get_task(request: Request, task_id: int):
     """Get task by ID"""
     try:
         task = taiga_service.get_task(task_id)
-        return {"success": True, "data": task}
+        return conditional_json(request, {"success": True, "data": task}, "task")
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+def _create_tasks(project_id: int, tasks_data: List[Dict], idempotency_key: Optional[str], scope: str):
+    """
+    Create tasks, once per Idempotency-Key when one is given
+
+    Returns (results, replayed) where replayed counts results served from
+    a previous attempt with the same key.
+    """
+    if not idempotency_key:
+        return taiga_service.bulk_create_tasks(project_id, tasks_data), 0
+    try:
+        return idempotency_store.run_batch(
+            f"{scope}:{idempotency_key}",
+            tasks_data,
+            lambda item: taiga_service.create_task(project_id, **item),
+            context={"project": project_id}
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _replay_headers(replayed: int, total: int) -> Dict[str, str]:
+    return {"Idempotent-Replayed": "true"} if total and replayed == total else {}
+
+
 @router.post("/tasks")
-def create_task(task: TaskCreate):
-    """Create a new task"""
+def create_task(task: TaskCreate, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """
+    Create a new task
+
+    Send an Idempotency-Key header to make retries safe: a repeated request
+    with the same key returns the task created the first time.
+    """
     try:
-        created_task = taiga_service.create_task(task.project, task.subject, **task.dict(exclude={'project', 'subject'}, exclude_none=True))
-        return {"success": True, "data": created_task}
+        task_data = task.dict(exclude={'project'}, exclude_none=True)
+        results, replayed = _create_tasks(task.project, [task_data], idempotency_key, "POST /tasks")
+        if "error" in results[0] and "id" not in results[0]:
+            raise Exception(results[0]["error"])
+        return FastJSONResponse({"success": True, "data": results[0]}, headers=_replay_headers(replayed, 1))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.patch("/tasks/{task_id}")
 def update_task(task_id: int, task: TaskUpdate):
-    """Update a task"""
+    """
+    Update a task
+
+    Edits to the same task arriving within a short window (e.g. status and
+    then assignee) are merged into one Taiga write; every request gets the
+    merged result, and "coalesced" tells how many requests shared it.
+    """
     try:
-        updated_task = taiga_service.update_task(task_id, **task.dict(exclude_none=True))
-        return {"success": True, "data": updated_task}
+        updated_task, merged = taiga_service.update_task_coalesced(task_id, **task.dict(exclude_none=True))
+        return {
+            "success": True,
+            "data": updated_task,
+            "coalesced": {"requests": merged, "writes_saved": merged - 1},
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -212,9 +389,86 @@ def delete_task(task_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/projects/{project_id}/tasks/by-ref/{ref}")
+def get_task_by_ref(project_id: int, ref: int):
+    """Get task by ref number"""
+    try:
+        task_id = taiga_service.get_task_id_by_ref(project_id, ref)
+        task = taiga_service.get_task(task_id)
+        return {"success": True, "data": task}
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/projects/{project_id}/tasks/by-ref/{ref}")
+def update_task_by_ref(project_id: int, ref: int, task: TaskUpdate):
+    """Update a task by ref number"""
+    try:
+        task_id = taiga_service.get_task_id_by_ref(project_id, ref)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return update_task(task_id, task)
+
+
+@router.delete("/projects/{project_id}/tasks/by-ref/{ref}")
+def delete_task_by_ref(project_id: int, ref: int):
+    """Delete a task by ref number"""
+    try:
+        task_id = taiga_service.get_task_id_by_ref(project_id, ref)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return delete_task(task_id)
+
+
+def _enqueue_job(kind: str, items: List[Dict], params: Optional[Dict] = None,
+                 idempotency_key: Optional[str] = None, scope: str = ""):
+    """Start a background job (once per Idempotency-Key) and answer 202 with its id"""
+    replayed = False
+    try:
+        if idempotency_key:
+            result, replayed = idempotency_store.run_once(
+                f"{scope}:{idempotency_key}",
+                {"kind": kind, "items": items, "params": params},
+                lambda: {"job_id": job_manager.enqueue(kind, items, params)["id"]}
+            )
+            job = job_manager.get(result["job_id"])
+        else:
+            job = job_manager.enqueue(kind, items, params)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"Location": f"/api/jobs/{job['id']}"}
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return FastJSONResponse(
+        {"success": True, "message": "Job queued", "data": job},
+        status_code=202,
+        headers=headers
+    )
+
+
 @router.post("/tasks/bulk")
-def bulk_create_tasks(bulk_data: BulkTaskCreate):
-    """Create multiple tasks"""
+def bulk_create_tasks(
+    bulk_data: BulkTaskCreate,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Create multiple tasks
+
+    With background=true the tasks are created by a background job and the
+    response (202) carries the job id; follow it at /api/jobs/{id}.
+
+    With an Idempotency-Key header, retrying the same request returns the
+    stored results and only creates the items that did not succeed before.
+    """
     try:
         # Assume all tasks are for the same project
         if not bulk_data.tasks:
@@ -222,8 +476,16 @@ def bulk_create_tasks(bulk_data: BulkTaskCreate):
         
         project_id = bulk_data.tasks[0].project
         tasks_data = [task.dict(exclude={'project'}, exclude_none=True) for task in bulk_data.tasks]
-        created_tasks = taiga_service.bulk_create_tasks(project_id, tasks_data)
-        return {"success": True, "data": created_tasks}
+        if background:
+            return _enqueue_job("create_tasks", tasks_data, {"project_id": project_id},
+                                idempotency_key, "POST /tasks/bulk?background")
+        created_tasks, replayed = _create_tasks(project_id, tasks_data, idempotency_key, "POST /tasks/bulk")
+        return FastJSONResponse(
+            request_context.annotate({"success": True, "data": created_tasks}),
+            headers=_replay_headers(replayed, len(created_tasks))
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -243,10 +505,18 @@ def create_tasks_for_user_story(
         }
     ]),
     status_id: Optional[int] = None,
-    assigned_to_id: Optional[int] = None
+    assigned_to_id: Optional[int] = None,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Create multiple tasks for a specific user story
+
+    With background=true the tasks are created by a background job and the
+    response (202) carries the job id; follow it at /api/jobs/{id}.
+
+    With an Idempotency-Key header, retrying the same request returns the
+    stored results and only creates the items that did not succeed before.
     
     Example usage:
     ```
@@ -279,33 +549,308 @@ def create_tasks_for_user_story(
                 
             tasks_data.append(task_data)
         
-        created_tasks = taiga_service.bulk_create_tasks(project_id, tasks_data)
-        
-        return {
+        scope = f"POST /projects/{project_id}/userstories/{user_story_id}/tasks/bulk"
+        if background:
+            return _enqueue_job("create_tasks", tasks_data, {"project_id": project_id},
+                                idempotency_key, scope + "?background")
+
+        created_tasks, replayed = _create_tasks(project_id, tasks_data, idempotency_key, scope)
+        created = sum(1 for task in created_tasks if "error" not in task)
+        message = f"{len(created_tasks)} tasks created successfully"
+        if request_context.current().interrupted:
+            message = f"{created} of {len(tasks_data)} tasks created before the request was cut short"
+
+        return FastJSONResponse(request_context.annotate({
             "success": True,
-            "message": f"{len(created_tasks)} tasks created successfully",
+            "message": message,
             "data": created_tasks
-        }
+        }), headers=_replay_headers(replayed, len(created_tasks)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/projects/{project_id}/tasks/import")
+async def import_tasks(request: Request, project_id: int, format: Optional[str] = None,
+                       user_story_id: Optional[int] = None):
+    """
+    Create tasks from a CSV or NDJSON file sent as the request body
+
+    The body is parsed as it arrives and rows are created while the rest of
+    the file is still uploading. Columns: subject (required), description,
+    status and assigned_to (names or ids), user_story.
+
+    Parameters:
+    - format: "csv" or "ndjson" (default: from Content-Type)
+    - user_story_id: User story for rows without a user_story column
+
+    Example:
+    ```
+    curl -X POST "http://localhost:3000/api/projects/133/tasks/import?user_story_id=5258" \
+         -H "Content-Type: text/csv" --data-binary @tarefas.csv
+    ```
+    """
+    fmt = format or importer.format_from_content_type(request.headers.get("content-type"))
+    if fmt not in importer.FORMATS:
+        raise HTTPException(status_code=400, detail="Send text/csv or application/x-ndjson, or set format=csv|ndjson")
+
+    pipe = importer.ChunkPipe()
+
+    def consume():
+        try:
+            return importer.import_tasks(taiga_service, project_id, pipe, fmt, user_story_id)
+        finally:
+            pipe.close()
+
+    worker = asyncio.ensure_future(run_in_threadpool(consume))
+    try:
+        async for chunk in request.stream():
+            if chunk and not await run_in_threadpool(pipe.put, chunk):
+                break
+        await run_in_threadpool(pipe.finish)
+        result = await worker
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        pipe.abort()
+        raise HTTPException(status_code=500, detail=str(e))
+    return request_context.annotate({"success": result["failed"] == 0 and result["invalid"] == 0, "data": result})
+
+
+@router.put("/projects/{project_id}/userstories/{story_id}/tasks/manifest")
+def sync_task_manifest(project_id: int, story_id: int, manifest: TaskManifest, dry_run: bool = False):
+    """
+    Make a user story contain exactly the tasks in the manifest
+
+    Tasks are matched by subject (key_field="subject") or by an external key
+    (key_field="key"). Only fields present in an entry are compared; send
+    "assigned_to": null to unassign. Tasks not in the manifest are deleted
+    unless delete_missing is false.
+
+    Parameters:
+    - dry_run: Return the plan (creates/updates/deletes) without writing
+
+    Re-applying an unchanged manifest makes no write calls.
+    """
+    try:
+        result = taiga_service.sync_task_manifest(
+            project_id,
+            story_id,
+            [task.dict(exclude_unset=True) for task in manifest.tasks],
+            key_field=manifest.key_field,
+            delete_missing=manifest.delete_missing,
+            dry_run=dry_run
+        )
+        return request_context.annotate({"success": not result.get("results", {}).get("errors"), "data": result})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/tasks/bulk-update")
+def bulk_update_tasks(bulk_data: BulkTaskUpdate):
+    """Update multiple tasks in a background job (202 + job id)"""
+    items = [task.dict(exclude_none=True) for task in bulk_data.tasks]
+    return _enqueue_job("update_tasks", items)
+
+
+@router.post("/tasks/bulk-delete")
+def bulk_delete_tasks(bulk_data: BulkTaskDelete):
+    """Delete multiple tasks in a background job (202 + job id)"""
+    return _enqueue_job("delete_tasks", [{"id": task_id} for task_id in bulk_data.ids])
+
+
+def _parse_ids(value: str, name: str) -> List[int]:
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a comma-separated list of ids")
+
+
+@router.get("/workload")
+def get_workload(request: Request, member_id: Optional[int] = None, projects: Optional[str] = None,
+                 db: Session = Depends(get_db)):
+    """
+    What is assigned to each member across projects
+
+    Parameters:
+    - member_id: Only this member (their open tasks are listed too)
+    - projects: Comma-separated project ids (default: favorite projects)
+
+    Projects are fetched concurrently and their task sets are cached, so the
+    response time is bounded by the slowest project and repeats are cheap.
+    """
+    favorites = {fav.project_id: fav.project_name for fav in db.query(FavoriteProject).all()}
+    project_ids = _parse_ids(projects, "projects") if projects else list(favorites)
+    if not project_ids:
+        raise HTTPException(status_code=400, detail="No projects given and no favorite projects saved")
+    try:
+        workload = taiga_service.get_workload(project_ids, member_id, favorites)
+        return conditional_json(request, {"success": True, "data": workload}, "workload")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search")
+def federated_search(q: str, projects: Optional[str] = None, limit: int = 20, stream: bool = True,
+                     db: Session = Depends(get_db)):
+    """
+    Search user stories across projects (default: favorite projects)
+
+    Parameters:
+    - q: Text or ref number (e.g. "painel" or "#4861")
+    - projects: Comma-separated project ids
+    - limit: Maximum hits per project and overall
+    - stream: Stream NDJSON events (default) or return only the merged result
+
+    Streamed events, one JSON object per line: {"type": "hits", "project",
+    "results"} as each project answers, {"type": "error", ...} for projects
+    that failed, and a final {"type": "done", "results", "errors"} with the
+    merged ranking.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    favorites = {fav.project_id: fav.project_name for fav in db.query(FavoriteProject).all()}
+    project_ids = _parse_ids(projects, "projects") if projects else list(favorites)
+    if not project_ids:
+        raise HTTPException(status_code=400, detail="No projects given and no favorite projects saved")
+    try:
+        events = taiga_service.federated_search(project_ids, q, favorites, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not stream:
+        done = [event for event in events if event["type"] == "done"][0]
+        return {"success": True, "data": {"results": done["results"], "errors": done["errors"]}}
+    return StreamingResponse(
+        (dumps(event) + b"\n" for event in events),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/projects/{project_id}/stats")
+def get_task_stats(request: Request, project_id: int):
+    """
+    Task analytics for a project
+
+    Counts (total/open/closed and closed ratio) per status, assignee and user
+    story, plus age distributions in days for all and for open tasks.
+    Computed from the cached task set and updated as tasks change.
+    """
+    try:
+        stats = taiga_service.get_task_stats(project_id)
+        return conditional_json(request, {"success": True, "data": stats}, "stats")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/projects/{project_id}/export")
+def export_project(project_id: int, format: str = "csv", entity: str = "tasks",
+                   user_story_id: Optional[int] = None, status: Optional[str] = None,
+                   assigned_to: Optional[str] = None):
+    """
+    Download a project's tasks or user stories
+
+    Rows are streamed while Taiga is paged through, so large projects start
+    downloading right away.
+
+    Parameters:
+    - format: "csv", "ndjson" or "columnar" (row groups of column arrays)
+    - entity: "tasks" (default) or "userstories"
+    - user_story_id: Only tasks of this user story
+    - status: Status id or name (names only for tasks)
+    - assigned_to: Member user id or name
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(export.FORMATS)}")
+    try:
+        params = export.build_params(taiga_service, project_id, entity, user_story_id, status, assigned_to)
+        pages = taiga_service.iter_pages(f"/{entity}", params, kind=export.REF_KINDS[entity])
+        # Fetch the first page up front so errors still get a proper status code
+        first = list(itertools.islice(pages, 1))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    filename = f"project-{project_id}-{entity}.{export.EXTENSIONS[format]}"
+    return StreamingResponse(
+        export.stream(itertools.chain(first, pages), entity, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/projects/{project_id}/changes")
+def get_changes(project_id: int, since: Optional[str] = None):
+    """
+    Tasks, user stories and epics changed since a cursor
+
+    Call without since after loading the full lists to get a cursor, then
+    pass back the cursor of each response. Changes to the same item are
+    collapsed to its latest state. reset=true means the cursor can't be
+    answered (server restart or too old): reload the full lists.
+
+    Parameters:
+    - since: Cursor from a previous response
+    """
+    try:
+        changes = taiga_service.get_changes(project_id, since)
+        return request_context.annotate({"success": True, "data": changes})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/projects/{project_id}/changes/events")
+def stream_changes(project_id: int, since: Optional[str] = None):
+    """
+    Stream a project's changes as Server-Sent Events
+
+    Each "changes" event has the same shape as GET /changes; the first one
+    answers since (or carries the current cursor). Reconnect with the last
+    cursor received.
+    """
+    try:
+        batches = taiga_service.iter_changes(project_id, since)
+        # Fetch the first batch up front so errors still get a proper status code
+        first = list(itertools.islice(batches, 1))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def events():
+        for batch in itertools.chain(first, batches):
+            if batch is None:
+                # Keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: changes\ndata: {dumps(batch).decode()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/projects/{project_id}/task-statuses")
-def get_task_statuses(project_id: int):
+def get_task_statuses(request: Request, project_id: int):
     """Get task statuses for a project"""
     try:
         statuses = taiga_service.get_task_statuses(project_id)
-        return {"success": True, "data": statuses}
+        return conditional_json(request, {"success": True, "data": statuses}, "task_statuses")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/projects/{project_id}/members")
-def get_project_members(project_id: int, slug: str = None):
+def get_project_members(request: Request, project_id: int, slug: str = None):
     """Get project members"""
     try:
         members = taiga_service.get_project_members(project_id, slug)
-        return {"success": True, "data": members}
+        return conditional_json(request, {"success": True, "data": members}, "members")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
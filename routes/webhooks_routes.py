@@ -0,0 +1,39 @@
+"""
+Taiga Webhook Routes
+"""
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Request
+from app import webhooks
+from app.taiga_service import taiga_service
+
+router = APIRouter()
+
+
+@router.post("/webhooks/taiga")
+async def receive_taiga_webhook(request: Request,
+                                signature: Optional[str] = Header(None, alias="X-TAIGA-WEBHOOK-SIGNATURE")):
+    """
+    Receive a Taiga project webhook
+
+    Configure it in Taiga (Admin > Integrations > Webhooks) with this URL and
+    the key set in TAIGA_WEBHOOK_SECRET. Task, user story and epic events
+    update the cached lists and change feeds within TAIGA_WEBHOOK_BATCH_WINDOW
+    seconds; other events are acknowledged and ignored.
+    """
+    if not webhooks.WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="TAIGA_WEBHOOK_SECRET is not configured")
+    body = await request.body()
+    if not webhooks.verify_signature(webhooks.WEBHOOK_SECRET, body, signature):
+        raise HTTPException(status_code=403, detail="Invalid webhook signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+
+    event = webhooks.decode(payload)
+    if event is not None:
+        taiga_service.webhooks.add(event)
+    return {"success": True, "queued": event is not None}
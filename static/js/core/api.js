@@ -47,6 +47,9 @@ class TaigaAPI {
             // Get user info
             await this.getCurrentUser();
 
+            // Log the backend in too, so lists can come trimmed from /api
+            await this.loginBackend(username, password);
+
             return data;
         } catch (error) {
             console.error('Login error:', error);
@@ -54,6 +57,27 @@ class TaigaAPI {
         }
     }
 
+    async loginBackend(username, password) {
+        try {
+            const response = await fetch('/api/auth/login', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    username: username,
+                    password: password,
+                    taiga_url: config.getApiUrl()
+                })
+            });
+            if (!response.ok) {
+                console.warn('Backend login failed, lists will come straight from Taiga');
+            }
+        } catch (error) {
+            console.warn('Backend unavailable, lists will come straight from Taiga:', error);
+        }
+    }
+
     async logout() {
         this.authToken = null;
         this.refreshToken = null;
@@ -207,6 +231,20 @@ class TaigaAPI {
 
     // Tasks
     async getTasks(projectId, userStoryId = null) {
+        // The backend trims each task to the compact view the task cards use
+        let compactEndpoint = `/api/projects/${projectId}/tasks?fields=compact`;
+        if (userStoryId) {
+            compactEndpoint += `&user_story_id=${userStoryId}`;
+        }
+        try {
+            const response = await fetch(compactEndpoint);
+            if (response.ok) {
+                return (await response.json()).data;
+            }
+        } catch (error) {
+            console.warn('Backend task list unavailable, asking Taiga:', error);
+        }
+
         try {
             let endpoint = `/tasks?project=${projectId}`;
             if (userStoryId) {
@@ -0,0 +1,53 @@
+"""
+Shared fakes for the tests that run without a Taiga server
+"""
+import json
+from types import SimpleNamespace
+
+import requests
+
+from app.taiga_service import TaigaService
+
+OPEN = {"name": "New", "color": "#999999", "is_closed": False}
+DONE = {"name": "Done", "color": "#00aa00", "is_closed": True}
+
+
+class FakeResponse:
+    """Enough of requests.Response for the service and the upstream policy"""
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = "" if data is None else json.dumps(data)
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+
+def task(task_id, ref, status=1, version=1, **fields):
+    """Task JSON as Taiga lists it (status 2 is the closed one)"""
+    return {
+        "id": task_id, "ref": ref, "subject": f"Task {ref}", "description": "", "status": status,
+        "status_extra_info": DONE if status == 2 else OPEN, "assigned_to": None, "user_story": 10,
+        "project": 1, "created_date": "2024-01-01T00:00:00Z",
+        "modified_date": f"2024-01-{version:02d}T00:00:00Z", "version": version, **fields,
+    }
+
+
+def make_service(request=None, **api):
+    """
+    TaigaService that counts as logged in and never reaches Taiga
+
+    request, when given, replaces _request (method, path, **kwargs) -> FakeResponse;
+    api adds python-taiga style attributes (e.g. user_stories=...).
+    """
+    service = TaigaService()
+    service.api = SimpleNamespace(token="token", **api)
+    if request is not None:
+        service._request = request
+    return service
@@ -0,0 +1,62 @@
+"""
+Tests for batch task fetching (no Taiga server needed)
+"""
+from app.taiga_service import BATCH_LIST_THRESHOLD
+from tests.helpers import FakeResponse, make_service
+
+
+def task_list_service(tasks):
+    """Service whose upstream calls are served from a task list"""
+    service = make_service()
+    service.calls = []
+
+    def fake_request(method, path, params=None, **kwargs):
+        service.calls.append((path, params))
+        if path == "/tasks/by_ref":
+            match = [t for t in tasks if t["project"] == params["project"] and t["ref"] == params["ref"]]
+        else:
+            task_id = int(path.rsplit("/", 1)[1])
+            match = [t for t in tasks if t["id"] == task_id]
+        return FakeResponse(200, match[0]) if match else FakeResponse(404)
+
+    def fake_get_tasks(project_id, user_story_id=None):
+        service.calls.append(("list", project_id))
+        return [t for t in tasks if t["project"] == project_id]
+
+    service._request = fake_request
+    service.get_tasks = fake_get_tasks
+    return service
+
+
+TASKS = [{"id": 100 + i, "ref": i, "project": 1, "subject": f"T{i}"} for i in range(1, 31)]
+
+
+class TestBatchGetTasks:
+    """batch_get_tasks behaviour"""
+
+    def test_01_ids_and_missing(self):
+        """Ids are fetched individually and unknown ones reported"""
+        service = task_list_service(TASKS)
+        result = service.batch_get_tasks(ids=[101, 102, 999])
+
+        assert set(result["tasks"]) == {101, 102}
+        assert result["missing"]["ids"] == [999]
+        assert len(service.calls) == 3
+
+    def test_02_few_refs_use_by_ref(self):
+        """A handful of refs resolves through by_ref lookups"""
+        service = task_list_service(TASKS)
+        result = service.batch_get_tasks(refs=[{"project": 1, "ref": 3}, {"project": 1, "ref": 99}])
+
+        assert set(result["tasks"]) == {103}
+        assert result["missing"]["refs"] == [{"project": 1, "ref": 99}]
+        assert all(call[0] == "/tasks/by_ref" for call in service.calls)
+
+    def test_03_many_refs_list_project_once(self):
+        """Many refs in one project cost a single list call"""
+        service = task_list_service(TASKS)
+        refs = [{"project": 1, "ref": r} for r in range(1, BATCH_LIST_THRESHOLD + 1)]
+        result = service.batch_get_tasks(ids=[101], refs=refs)
+
+        assert len(result["tasks"]) == BATCH_LIST_THRESHOLD
+        assert service.calls == [("list", 1)]
@@ -0,0 +1,70 @@
+"""
+Tests for the in-memory TTL cache
+"""
+import threading
+import time
+
+from app.cache import TTLCache
+
+
+class TestTTLCache:
+    """TTLCache behaviour"""
+
+    def test_01_set_and_expire(self):
+        """Entries expire after their TTL"""
+        cache = TTLCache(ttl=0.05)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        time.sleep(0.06)
+        assert cache.get("key") is None
+
+    def test_02_invalidate(self):
+        """invalidate() drops one key or everything"""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.invalidate()
+        assert cache.get("b") is None
+
+    def test_03_get_or_load_is_single_flight(self):
+        """Concurrent callers share one loader call"""
+        cache = TTLCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return "loaded"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["loaded"] * 5
+        assert len(calls) == 1
+
+    def test_04_max_entries_evicts_least_recently_used(self):
+        """A bounded cache drops expired entries first, then the least recently used"""
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+        cache.set("short", 4, ttl=0.01)
+        time.sleep(0.02)
+        cache.set("d", 5)
+        assert (cache.get("a"), cache.get("c"), cache.get("d")) == (None, 3, 5)
@@ -0,0 +1,98 @@
+"""
+Tests for the per-project change feeds (no Taiga server needed)
+"""
+import threading
+
+from app.changes import ChangeFeed, diff
+from tests.helpers import FakeResponse, make_service, task
+
+
+def listing_service(listing):
+    """Service whose fake Taiga lists whatever is in listing (tasks only, no stories)"""
+    def request(method, path, **kwargs):
+        if method == "GET" and path == "/tasks":
+            return FakeResponse(200, list(listing))
+        if method == "POST":
+            return FakeResponse(201, task(9, 19, subject=kwargs["json"]["subject"]))
+        if method == "DELETE":
+            return FakeResponse(204)
+        raise AssertionError(path)
+
+    service = make_service(request)
+    # Stories are already cached, so get_changes only refreshes tasks
+    service.record_cache.set((service.host, "userstory", 1), object())
+    return service
+
+
+class TestFeed:
+    """Cursors and collapsing"""
+
+    def test_01_changes_collapse_per_item(self):
+        feed = ChangeFeed()
+        cursor = feed.since(1)["cursor"]
+        feed.publish(1, "task", [("created", 1, {"id": 1, "v": 1}), ("updated", 1, {"id": 1, "v": 2}),
+                                 ("updated", 2, {"id": 2}), ("created", 3, {"id": 3}),
+                                 ("deleted", 3, {"id": 3}), ("deleted", 4, {"id": 4, "ref": 14})])
+        feed.publish(2, "task", [("created", 5, {"id": 5})])
+        result = feed.since(1, cursor)
+        assert result["tasks"] == {"created": [{"id": 1, "v": 2}], "updated": [{"id": 2}],
+                                   "deleted": [{"id": 4, "ref": 14}]}
+        assert result["reset"] is False
+        assert not ChangeFeed.has_changes(feed.since(1, result["cursor"]))
+
+    def test_02_unknown_or_expired_cursors_reset(self):
+        """Cursors from another epoch or older than the retained window"""
+        feed = ChangeFeed(retention=2)
+        cursor = feed.since(1)["cursor"]
+        assert feed.since(1, "0000-1")["reset"] is True
+        feed.publish(1, "task", [("updated", i, {"id": i}) for i in range(3)])
+        assert feed.since(1, cursor)["reset"] is True
+        feed.reset(1)
+        assert feed.since(1, feed.cursor(2))["reset"] is True
+        assert feed.since(1, feed.cursor())["reset"] is False
+
+    def test_03_diff_by_version(self):
+        previous = {1: task(1, 11), 2: task(2, 12), 3: task(3, 13)}
+        current = {1: task(1, 11), 2: task(2, 12, version=2), 4: task(4, 14)}
+        ops = {(op, item_id) for op, item_id, _ in diff(previous, current)}
+        assert ops == {("updated", 2), ("created", 4), ("deleted", 3)}
+
+    def test_04_wait_wakes_on_publish(self):
+        feed = ChangeFeed()
+        cursor = feed.cursor()
+        assert feed.wait(1, cursor, 0.01) is False
+        timer = threading.Timer(0.05, feed.publish, (1, "task", [("created", 1, {"id": 1})]))
+        timer.start()
+        assert feed.wait(1, cursor, 2) is True
+
+
+class TestService:
+    """Feeds driven by our writes and by refreshes from Taiga"""
+
+    def test_01_own_writes_and_refresh_differences(self):
+        listing = [task(1, 11), task(2, 12)]
+        service = listing_service(listing)
+        cursor = service.get_changes(1)["cursor"]
+
+        service.create_task(1, "Added", status=1)
+        service.delete_task(2, project_id=1, ref=12)
+        result = service.get_changes(1, cursor)
+        assert [t["subject"] for t in result["tasks"]["created"]] == ["Added"]
+        assert result["tasks"]["deleted"] == [{"id": 2, "ref": 12}]
+
+        # Someone else edits task 1 and deletes the new one in Taiga; the next refresh finds out
+        listing[:] = [task(1, 11, version=2, subject="Edited")]
+        service.record_cache.invalidate((service.host, "task", 1))
+        result = service.get_changes(1, result["cursor"])
+        assert [t["subject"] for t in result["tasks"]["updated"]] == ["Edited"]
+        assert result["tasks"]["deleted"] == [{"id": 9, "ref": 19}]
+        assert result["tasks"]["created"] == []
+
+    def test_02_stream_yields_batches_and_heartbeats(self):
+        service = listing_service([task(1, 11)])
+        batches = service.iter_changes(1, heartbeat=0.01)
+        first = next(batches)
+        assert first["reset"] is False and not ChangeFeed.has_changes(first)
+        assert next(batches) is None
+        service.create_task(1, "Live", status=1)
+        assert [t["subject"] for t in next(batches)["tasks"]["created"]] == ["Live"]
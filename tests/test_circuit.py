@@ -0,0 +1,165 @@
+"""
+Tests for the per-host circuit breaker and stale reads (no Taiga server needed)
+"""
+import json
+import time
+
+import pytest
+import requests
+from starlette.requests import Request
+from taiga.exceptions import TaigaRestException
+
+from app import request_context
+from app.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_unavailable
+from app.http_cache import conditional_json
+from app.taiga_service import TaigaService
+from app.upstream import UpstreamPolicy
+from tests.helpers import FakeResponse
+
+URL = "https://taiga.example/api/v1/tasks"
+
+
+def make_breaker(**kwargs):
+    clock = [0.0]
+    options = dict(window=10, min_calls=4, failure_ratio=0.5, cooldown=30, slow_call=2)
+    options.update(kwargs)
+    return CircuitBreaker("taiga.example", clock=lambda: clock[0], **options), clock
+
+
+@pytest.fixture
+def context():
+    token = request_context._current.set(request_context.RequestContext())
+    yield request_context.current()
+    request_context._current.reset(token)
+
+
+class TestBreaker:
+    """State transitions"""
+
+    def test_01_trips_on_failure_ratio(self):
+        """Opens once enough recent calls failed, not before min_calls"""
+        breaker, _ = make_breaker()
+        for success in (True, False, False):
+            breaker.before_call()
+            breaker.record(success)
+        assert breaker.state == CLOSED
+        breaker.before_call()
+        breaker.record(False)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_02_slow_calls_count_as_failures(self):
+        """Successful calls slower than slow_call trip the breaker too"""
+        breaker, _ = make_breaker()
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(True, duration=5)
+        assert breaker.state == OPEN
+
+    def test_03_half_open_single_probe(self):
+        """After the cooldown one probe goes through; success closes, failure reopens"""
+        breaker, clock = make_breaker(min_calls=1)
+        breaker.before_call()
+        breaker.record(False)
+        clock[0] = 31
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record(False)
+        assert breaker.state == OPEN and breaker.trips == 2
+
+        clock[0] = 62
+        breaker.before_call()
+        breaker.record(True)
+        assert breaker.state == CLOSED
+        breaker.before_call()
+
+
+class TestPolicy:
+    """Breaker wired into UpstreamPolicy"""
+
+    def test_01_fails_fast_without_sending(self):
+        """Once the host's breaker is open, requests are not sent at all"""
+        sent = []
+
+        def send(method, url, **kwargs):
+            sent.append(method)
+            return FakeResponse(500)
+
+        policy = UpstreamPolicy(rate=1000, max_rate=1000, max_retries=0, send=send, sleep=lambda s: None)
+        for _ in range(5):
+            assert policy.request("GET", URL).status_code == 500
+        with pytest.raises(CircuitOpenError):
+            policy.request("GET", URL)
+        assert len(sent) == 5
+        assert policy.open_circuits()["taiga.example"]["state"] == OPEN
+        assert policy.stats()["hosts"]["taiga.example"]["breaker"]["trips"] == 1
+
+    def test_02_probe_released_on_unexpected_error(self):
+        """A half-open probe that blows up with a non-HTTP error doesn't wedge the breaker"""
+        shift = [0.0]
+        failing = [True]
+
+        def send(method, url, **kwargs):
+            if failing[0]:
+                raise ValueError("bad response")
+            return FakeResponse(200)
+
+        policy = UpstreamPolicy(rate=1000, max_rate=1000, max_retries=0, send=send, sleep=lambda s: None,
+                                clock=lambda: time.monotonic() + shift[0])
+        breaker = policy.breaker(URL)
+        breaker._open()
+        shift[0] = breaker.cooldown + 1
+        with pytest.raises(ValueError):
+            policy.request("GET", URL)
+        assert breaker.state == HALF_OPEN and not breaker._probing
+        failing[0] = False
+        assert policy.request("GET", URL).status_code == 200
+        assert breaker.state == CLOSED
+
+    def test_03_unavailable_errors(self):
+        """Only outages count as unavailable, not rejected requests"""
+        assert is_unavailable(CircuitOpenError("taiga.example", 10))
+        assert is_unavailable(requests.ConnectionError())
+        assert is_unavailable(TaigaRestException(URL, 503, "down"))
+        assert is_unavailable(TaigaRestException(URL, 400, "Network error!"))
+        assert not is_unavailable(TaigaRestException(URL, 404, "Not found"))
+        assert not is_unavailable(ValueError("bad"))
+
+
+class TestStaleReads:
+    """Serving the last good copy while Taiga is unavailable"""
+
+    def test_01_read_falls_back_to_last_good(self, context):
+        """A failed reload returns the kept copy and marks the request stale"""
+        service = TaigaService()
+        assert service._read(("k",), lambda: [1, 2]) == [1, 2]
+        assert not context.stale
+
+        def down():
+            raise CircuitOpenError("taiga.example", 30)
+
+        assert service._read(("k",), down) == [1, 2]
+        assert context.stale
+
+    def test_02_other_errors_are_raised(self, context):
+        """Rejections and reads without a kept copy still fail"""
+        service = TaigaService()
+        service._read(("k",), lambda: 1)
+        with pytest.raises(ValueError):
+            service._read(("k",), lambda: (_ for _ in ()).throw(ValueError("bad")))
+        with pytest.raises(CircuitOpenError):
+            service._read(("other",), lambda: (_ for _ in ()).throw(CircuitOpenError("taiga.example", 1)))
+        assert not context.stale
+
+    def test_03_response_carries_stale_flag(self, context):
+        """conditional_json adds the flag and a Warning header, and disables caching"""
+        context.mark_stale(42.4)
+        response = conditional_json(Request({"type": "http", "headers": []}), {"success": True, "data": []}, "tasks")
+        body = json.loads(response.body)
+        assert body["stale"] is True and body["stale_age_seconds"] == 42
+        assert response.headers["Warning"].startswith("110")
+        assert response.headers["Cache-Control"] == "private, no-store"
@@ -0,0 +1,102 @@
+"""
+Tests for task write coalescing (no Taiga server needed)
+"""
+import threading
+import time
+
+from app.coalesce import WriteCoalescer
+from tests.helpers import FakeResponse, make_service
+
+
+def submit_concurrently(coalescer, submissions, gap=0.01):
+    """Submit (key, fields) pairs from separate threads, a little apart"""
+    results = [None] * len(submissions)
+
+    def run(index, key, fields):
+        try:
+            results[index] = coalescer.submit(key, fields)
+        except Exception as e:
+            results[index] = e
+
+    threads = []
+    for index, (key, fields) in enumerate(submissions):
+        thread = threading.Thread(target=run, args=(index, key, fields))
+        thread.start()
+        threads.append(thread)
+        time.sleep(gap)
+    for thread in threads:
+        thread.join(2)
+    return results
+
+
+class TestWriteCoalescer:
+    """Merging within the window"""
+
+    def test_01_edits_merged_into_one_write(self):
+        """Status then assignee within the window: one write, same result for both"""
+        writes = []
+
+        def write(key, fields):
+            writes.append((key, fields))
+            return {"id": key, **fields}
+
+        coalescer = WriteCoalescer(write, window=0.1)
+        results = submit_concurrently(coalescer, [(7, {"status": 2}), (7, {"assigned_to": 5}), (8, {"status": 3})])
+        assert sorted(writes, key=lambda w: w[0]) == [(7, {"status": 2, "assigned_to": 5}), (8, {"status": 3})]
+        assert results[0] == results[1] == ({"id": 7, "status": 2, "assigned_to": 5}, 2)
+        assert coalescer.stats() == {"requests": 3, "writes": 2, "saved": 1, "pending": 0}
+
+    def test_02_later_values_win_and_writes_do_not_overlap(self):
+        """Edits during an in-flight write form the next batch, written after it"""
+        active, overlaps, writes = [], [], []
+
+        def write(key, fields):
+            if active:
+                overlaps.append(fields)
+            active.append(1)
+            time.sleep(0.1)
+            writes.append(fields)
+            active.pop()
+            return fields
+
+        coalescer = WriteCoalescer(write, window=0.03)
+        submit_concurrently(coalescer, [(1, {"status": 1}), (1, {"status": 2}), (1, {"subject": "x"}),
+                                        (1, {"subject": "y"})], gap=0.02)
+        assert not overlaps
+        assert writes[0]["status"] == 2
+        assert writes[-1]["subject"] == "y"
+
+    def test_03_errors_reach_every_waiter(self):
+        def write(key, fields):
+            raise RuntimeError("conflict")
+
+        coalescer = WriteCoalescer(write, window=0.05)
+        results = submit_concurrently(coalescer, [(1, {"status": 1}), (1, {"status": 2})])
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+class TestTaskWrites:
+    """Latest known version"""
+
+    def test_01_refetches_version_on_conflict(self):
+        """A stale known version costs one GET and a second PATCH"""
+        calls = []
+        current = {"version": 9}
+
+        def request(method, path, **kwargs):
+            calls.append((method, kwargs.get("json", {}).get("version")))
+            if method == "GET":
+                return FakeResponse(200, {"id": 1, **current})
+            if kwargs["json"]["version"] != current["version"]:
+                return FakeResponse(400, {"version": "The version doesn't match with the current one"})
+            current["version"] += 1
+            return FakeResponse(200, {"id": 1, **kwargs["json"], **current})
+
+        service = make_service(request)
+        service.task_versions.set(1, 3)
+        task = service._write_task_fields(1, {"status": 4})
+        assert task["version"] == 10 and task["status"] == 4
+        assert calls == [("PATCH", 3), ("GET", None), ("PATCH", 9)]
+        # The new version is remembered: the next write needs no GET
+        service._write_task_fields(1, {"status": 5})
+        assert calls[3:] == [("PATCH", 10)]
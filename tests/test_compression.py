@@ -0,0 +1,67 @@
+"""
+Tests for response compression and the static asset build
+"""
+import asyncio
+import gzip
+import os
+
+from starlette.responses import JSONResponse
+
+from app.compression import CompressionMiddleware, choose_encoding
+from app.static_assets import build
+
+
+def call_app(app, headers):
+    """Run an ASGI app once and collect the messages it sends"""
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+class TestCompression:
+    """CompressionMiddleware and static build behaviour"""
+
+    def test_01_negotiation(self):
+        """gzip is chosen when brotli is not acceptable"""
+        assert choose_encoding("gzip;q=1.0, br;q=0") == "gzip"
+        assert choose_encoding("identity") is None
+
+    def test_02_large_json_is_gzipped(self):
+        """Responses above the threshold are compressed, small ones are not"""
+        big = JSONResponse({"data": ["x" * 50] * 100})
+        app = CompressionMiddleware(big, minimum_size=500)
+        start, body = call_app(app, [(b"accept-encoding", b"gzip")])
+
+        assert (b"content-encoding", b"gzip") in start["headers"]
+        assert gzip.decompress(body["body"]) == big.body
+
+        small = CompressionMiddleware(JSONResponse({"ok": True}), minimum_size=500)
+        start, _ = call_app(small, [(b"accept-encoding", b"gzip")])
+        assert not any(name == b"content-encoding" for name, _ in start["headers"])
+
+    def test_03_build_fingerprints_and_rewrites(self, tmp_path):
+        """References in HTML/JS point at fingerprinted names"""
+        source = tmp_path / "static"
+        (source / "js").mkdir(parents=True)
+        (source / "index.html").write_text('<link href="styles.css"><script src="app.js"></script>')
+        (source / "styles.css").write_text("body { color: red; }" * 20)
+        (source / "app.js").write_text("import { a } from './js/a.js';\n")
+        (source / "js" / "a.js").write_text("export const a = 1;\n")
+
+        target = tmp_path / "dist"
+        manifest = build(str(source), str(target))
+
+        index = (target / "index.html").read_text()
+        assert os.path.basename(manifest["styles.css"]) in index
+        assert os.path.basename(manifest["app.js"]) in index
+        app_js = (target / manifest["app.js"]).read_text()
+        assert os.path.basename(manifest["js/a.js"]) in app_js
+        assert (target / (manifest["styles.css"] + ".gz")).exists()
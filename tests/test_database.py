@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite engine setup and async favorites sessions (temporary databases)
+"""
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (Base, FavoriteProject, FavoriteUserStory, ThreadedAsyncSession,
+                          create_async_sqlite_engine, create_sqlite_engine)
+from routes import favorites_routes
+
+
+def make_engine(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'favorites.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+class TestEngine:
+    """WAL, pragmas and pooling"""
+
+    def test_01_pragmas_on_every_connection(self, tmp_path):
+        engine = make_engine(tmp_path)
+        with engine.connect() as first, engine.connect() as second:
+            for connection in (first, second):
+                assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+                assert connection.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+    def test_02_concurrent_writers_and_readers(self, tmp_path):
+        """Writers queue on the lock instead of failing; readers aren't blocked"""
+        Session = sessionmaker(bind=make_engine(tmp_path))
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(20):
+                    with Session() as db:
+                        db.add(FavoriteUserStory(user_story_id=worker * 100 + i, user_story_ref=i,
+                                                 user_story_subject=f"US {i}", project_id=worker))
+                        db.commit()
+                        db.query(FavoriteUserStory).filter(FavoriteUserStory.project_id == worker).all()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        with Session() as db:
+            assert db.query(FavoriteUserStory).count() == 160
+
+
+class TestThreadedAsyncSession:
+    """Async session calls over a sync session"""
+
+    def test_01_crud(self, tmp_path):
+        Session = sessionmaker(bind=make_engine(tmp_path))
+
+        async def scenario():
+            db = ThreadedAsyncSession(Session())
+            favorite = FavoriteProject(project_id=1, project_name="Demo", project_slug="demo")
+            db.add(favorite)
+            await db.commit()
+            await db.refresh(favorite)
+            found = await db.scalar(select(FavoriteProject).where(FavoriteProject.project_id == 1))
+            listed = (await db.scalars(select(FavoriteProject))).all()
+            await db.delete(found)
+            await db.commit()
+            remaining = (await db.scalars(select(FavoriteProject))).all()
+            await db.close()
+            return favorite.id, found.project_slug, [f.project_id for f in listed], remaining
+
+        favorite_id, slug, listed, remaining = asyncio.run(scenario())
+        assert favorite_id is not None and slug == "demo"
+        assert listed == [1] and remaining == []
+
+
+class TestAsyncEngine:
+    """The aiosqlite engine behind the favorites routes"""
+
+    def test_01_routes_on_aiosqlite_with_pragmas(self, tmp_path):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        engine = create_async_sqlite_engine(f"sqlite:///{tmp_path / 'favorites.db'}")
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def scenario():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with engine.connect() as first, engine.connect() as second:
+                pragmas = [((await connection.execute(text("PRAGMA journal_mode"))).scalar(),
+                            (await connection.execute(text("PRAGMA synchronous"))).scalar())
+                           for connection in (first, second)]
+
+            async with Session() as db:
+                added = await favorites_routes.add_favorite_project(
+                    favorites_routes.FavoriteProjectCreate(project_id=1, project_name="Demo", project_slug="demo"),
+                    db=db)
+                await favorites_routes.add_favorite_user_story(
+                    favorites_routes.FavoriteUserStoryCreate(user_story_id=10, user_story_ref=5,
+                                                             user_story_subject="Painel", project_id=1),
+                    db=db)
+            async with Session() as db:
+                projects = await favorites_routes.get_favorite_projects(db=db)
+                stories = await favorites_routes.get_favorite_user_stories(project_id=1, db=db)
+                await favorites_routes.remove_favorite_project(1, db=db)
+                remaining = await favorites_routes.get_favorite_projects(db=db)
+            await engine.dispose()
+            return pragmas, added, projects, stories, remaining
+
+        pragmas, added, projects, stories, remaining = asyncio.run(scenario())
+        assert pragmas == [("wal", 1), ("wal", 1)]
+        assert added.id is not None and [p.project_slug for p in projects] == ["demo"]
+        assert [s.user_story_id for s in stories] == [10] and remaining == []
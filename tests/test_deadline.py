@@ -0,0 +1,168 @@
+"""
+Tests for request deadlines and client-disconnect cancellation (no Taiga server needed)
+"""
+import asyncio
+import time
+
+import pytest
+import requests
+
+from app import request_context
+from app.request_context import DeadlineExceeded, RequestContext, RequestContextMiddleware, timeout_for
+from app.scheduler import BULK
+from app.taiga_service import TaigaService
+from app.upstream import UpstreamPolicy
+from tests.helpers import FakeResponse
+
+URL = "https://taiga.example/api/v1/tasks"
+
+
+def recording_policy(outcomes=None):
+    calls = []
+    outcomes = list(outcomes or [])
+
+    def send(method, url, **kwargs):
+        calls.append(kwargs["timeout"])
+        outcome = outcomes.pop(0) if outcomes else FakeResponse()
+        if callable(outcome):
+            outcome = outcome()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return UpstreamPolicy(rate=1000, max_rate=1000, send=send, sleep=lambda s: None), calls
+
+
+class TestContext:
+    """Deadline bookkeeping"""
+
+    def test_01_check_and_annotate(self):
+        """A passed deadline raises and marks the response partial"""
+        context = RequestContext(timeout=0.01)
+        time.sleep(0.02)
+        with request_context.use(context):
+            with pytest.raises(DeadlineExceeded):
+                context.check()
+            body = request_context.annotate({"success": True})
+        assert body["partial"] is True and body["partial_reason"] == "deadline exceeded"
+
+    def test_02_timeout_from_header_or_lane(self):
+        """X-Request-Timeout wins; otherwise per-lane defaults, none for streams"""
+        scope = {"path": "/api/projects", "headers": [(b"x-request-timeout", b"2.5")]}
+        assert timeout_for(scope, "interactive") == 2.5
+        assert timeout_for({"path": "/api/tasks/bulk", "headers": []}, BULK) == request_context.REQUEST_TIMEOUT_BULK
+        assert timeout_for({"path": "/api/projects/1/export", "headers": []}, BULK) is None
+
+    def test_03_full_listings_get_the_listing_default(self):
+        """Whole-project reads aren't held to the 30 s interactive default"""
+        for method, path in (("GET", "/api/projects/1/tasks"), ("GET", "/api/projects/1/userstories"),
+                             ("GET", "/api/projects/1/epics"), ("GET", "/api/projects/1/stats"),
+                             ("GET", "/api/projects/1/changes"), ("GET", "/api/projects/1/userstories/10/workspace"),
+                             ("GET", "/api/workload"), ("POST", "/api/tasks/batch-get")):
+            scope = {"method": method, "path": path, "headers": []}
+            assert timeout_for(scope, "interactive") == request_context.REQUEST_TIMEOUT_LISTING
+        assert timeout_for({"method": "POST", "path": "/api/projects/1/tasks", "headers": []},
+                           "interactive") == request_context.REQUEST_TIMEOUT
+        for path in ("/api/projects/1/userstories/search", "/api/tasks/1", "/api/projects/1/tasks/by-ref/7"):
+            scope = {"method": "GET", "path": path, "headers": []}
+            assert timeout_for(scope, "interactive") == request_context.REQUEST_TIMEOUT
+        scope = {"method": "GET", "path": "/api/projects/1/tasks", "headers": [(b"x-request-timeout", b"5")]}
+        assert timeout_for(scope, "interactive") == 5
+
+
+class TestPolicy:
+    """Upstream calls under a deadline"""
+
+    def test_01_timeouts_shrink_to_time_left(self):
+        policy, calls = recording_policy()
+        with request_context.use(RequestContext(timeout=2)):
+            policy.request("GET", URL)
+        connect, read = calls[0]
+        assert connect <= 2 and read <= 2
+        policy.request("GET", URL)
+        assert calls[1] == policy.timeout
+
+    def test_02_no_call_after_deadline_or_disconnect(self):
+        """Expired or cancelled requests fail fast without sending"""
+        policy, calls = recording_policy()
+        context = RequestContext()
+        context.cancelled.set()
+        with request_context.use(context), pytest.raises(DeadlineExceeded):
+            policy.request("GET", URL)
+        assert calls == [] and context.interrupted == "client disconnected"
+
+    def test_03_no_retry_past_deadline(self):
+        """No retry whose wait outlasts the deadline; a timeout cut short by it is not a Taiga failure"""
+        policy, calls = recording_policy([FakeResponse(503, headers={"Retry-After": "5"})])
+        with request_context.use(RequestContext(timeout=1)):
+            response = policy.request("GET", URL)
+        assert response.status_code == 503 and len(calls) == 1
+
+        def read_until_deadline():
+            time.sleep(0.1)
+            return requests.ReadTimeout()
+
+        policy, calls = recording_policy([read_until_deadline])
+        with request_context.use(RequestContext(timeout=0.1)), pytest.raises(DeadlineExceeded):
+            policy.request("GET", URL)
+        assert len(calls) == 1
+        assert policy.breaker(URL).snapshot()["recent_failures"] == 0
+
+    def test_04_timeout_with_budget_left_is_retried_and_counted(self):
+        """A connect timeout well inside the deadline is a Taiga failure, not the deadline"""
+        policy, calls = recording_policy([requests.ConnectTimeout(), requests.ConnectTimeout()])
+        context = RequestContext(timeout=30)
+        with request_context.use(context):
+            response = policy.request("GET", URL)
+        assert response.status_code == 200 and len(calls) == 3
+        assert context.interrupted is None
+        breaker = policy.breaker(URL).snapshot()
+        assert (breaker["recent_calls"], breaker["recent_failures"]) == (3, 2)
+
+
+class TestPartialResults:
+    """Bulk creation cut short"""
+
+    def test_01_remaining_items_reported_skipped(self):
+        service = TaigaService()
+        created = []
+
+        def create_task(project_id, **data):
+            if len(created) == 2:
+                raise DeadlineExceeded("Request deadline exceeded")
+            created.append(data)
+            return {"id": len(created), **data}
+
+        service.create_task = create_task
+        results = service._bulk_create_fallback(1, [{"subject": f"T{i}"} for i in range(5)])
+        assert [r.get("id") for r in results[:2]] == [1, 2]
+        assert all(r.get("skipped") for r in results[2:]) and len(results) == 5
+
+
+class TestMiddleware:
+    """Client disconnects cancel the request's context"""
+
+    def test_01_disconnect_sets_cancelled(self):
+        seen = {}
+
+        async def app(scope, receive, send):
+            context = request_context.current()
+            for _ in range(100):
+                if context.cancelled.is_set():
+                    break
+                await asyncio.sleep(0.01)
+            seen["cancelled"] = context.cancelled.is_set()
+            seen["body"] = await receive()
+
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        scope = {"type": "http", "method": "GET", "path": "/api/projects", "headers": []}
+        asyncio.run(RequestContextMiddleware(app)(scope, receive, None))
+        assert seen["cancelled"] is True
+        assert seen["body"]["type"] == "http.request"
@@ -0,0 +1,81 @@
+"""
+Tests for streaming export (no Taiga server needed)
+"""
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.export import build_params, stream
+from tests.helpers import FakeResponse, make_service
+
+TASKS = [
+    {"id": i, "ref": i, "subject": f"T{i}", "status": 1, "status_extra_info": {"name": "Novo"},
+     "assigned_to": 7 if i % 2 else None,
+     "assigned_to_extra_info": {"full_name_display": "Maria Silva"} if i % 2 else None}
+    for i in range(1, 6)
+]
+METADATA = {"task_statuses": [{"id": 1, "name": "Novo"}],
+            "members": [{"user": 7, "full_name_display": "Maria Silva"}]}
+
+
+class TestStream:
+    """Format encoders"""
+
+    def test_01_csv_resolves_names(self):
+        """CSV has a header and resolved status/assignee names"""
+        body = b"".join(stream([TASKS[:2], TASKS[2:]], "tasks", "csv")).decode("utf-8-sig")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert len(rows) == 5
+        assert rows[0]["status"] == "Novo" and rows[0]["assigned_to"] == "Maria Silva"
+        assert rows[1]["assigned_to"] == ""
+
+    def test_02_one_chunk_per_page(self):
+        """Each page is emitted as soon as it is encoded"""
+        chunks = list(stream([TASKS[:2], TASKS[2:]], "tasks", "ndjson"))
+        assert [len(chunk.splitlines()) for chunk in chunks] == [2, 3]
+        assert json.loads(chunks[0].splitlines()[0])["subject"] == "T1"
+
+    def test_03_columnar_row_groups(self):
+        """Columnar output is a schema line, row groups, then a total"""
+        lines = [json.loads(line) for chunk in stream([TASKS[:2], TASKS[2:]], "tasks", "columnar")
+                 for line in chunk.splitlines()]
+        assert lines[0]["columns"][:3] == ["id", "ref", "subject"]
+        assert lines[1]["rows"] == 2 and lines[1]["columns"]["id"] == [1, 2]
+        assert lines[-1] == {"total_rows": 5}
+
+    def test_04_empty_csv_still_has_header(self):
+        """An empty export is just the header"""
+        body = b"".join(stream([], "tasks", "csv")).decode("utf-8-sig")
+        assert body.startswith("id,ref,subject")
+
+
+class TestExportParams:
+    """Filters and paging"""
+
+    def test_01_names_resolved_to_ids(self):
+        """Status and assignee names become Taiga filter ids"""
+        service = SimpleNamespace(_get_project_metadata=lambda project_id: METADATA)
+        params = build_params(service, 3, "tasks", user_story_id=9, status="novo", assigned_to="Maria Silva")
+        assert params == {"project": 3, "user_story": 9, "status": 1, "assigned_to": 7}
+        with pytest.raises(ValueError):
+            build_params(service, 3, "tasks", status="Pronto")
+
+    def test_02_iter_pages_follows_pagination(self):
+        """Pages are requested lazily until Taiga reports no next page"""
+        requested = []
+
+        def fake_request(method, path, params=None, **kwargs):
+            requested.append(params["page"])
+            start = (params["page"] - 1) * 2
+            more = start + 2 < len(TASKS)
+            return FakeResponse(200, TASKS[start:start + 2],
+                                headers={"x-paginated": "true", "x-pagination-next": "next" if more else ""})
+
+        service = make_service(fake_request)
+        pages = service.iter_pages("/tasks", {"project": 1}, kind="task", page_size=2)
+        assert len(next(pages)) == 2 and requested == [1]
+        assert sum(len(page) for page in pages) == 3 and requested == [1, 2, 3]
+        assert service.ref_index.lookup("task", 1, 5) == 5
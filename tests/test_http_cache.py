@@ -0,0 +1,90 @@
+"""
+Tests for ETag / conditional request helpers
+"""
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app.http_cache import conditional_json, get_cache_control
+from app.projection import parse_fields, project
+from app.records import StoryStore
+from routes import taiga_routes
+from tests.helpers import OPEN, make_service
+
+
+def make_request(if_none_match=None):
+    headers = []
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestConditionalJson:
+    """conditional_json behaviour"""
+
+    def test_01_content_etag_roundtrip(self):
+        """A repeated request with the returned ETag gets a 304"""
+        content = {"success": True, "data": [{"id": 1, "name": "Novo"}]}
+        first = conditional_json(make_request(), content, "task_statuses")
+
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == get_cache_control("task_statuses")
+        etag = first.headers["etag"]
+
+        second = conditional_json(make_request(etag), content, "task_statuses")
+        assert second.status_code == 304
+        assert second.body == b""
+
+    def test_02_version_etag_changes_with_version(self):
+        """Record versions drive the ETag when available"""
+        tasks = [{"id": 1, "version": 3, "modified_date": "2024-01-01T00:00:00Z"}]
+        first = conditional_json(make_request(), {"data": tasks}, "tasks", records=tasks)
+        etag = first.headers["etag"]
+        assert etag.startswith('"v-')
+
+        tasks[0]["version"] = 4
+        second = conditional_json(make_request(etag), {"data": tasks}, "tasks", records=tasks)
+        assert second.status_code == 200
+        assert second.headers["etag"] != etag
+
+    def test_03_cache_control_env_override(self, monkeypatch):
+        """Cache-Control can be tuned per route"""
+        monkeypatch.setenv("HTTP_CACHE_CONTROL_PROJECTS", "private, max-age=5")
+        assert get_cache_control("projects") == "private, max-age=5"
+
+    def test_04_fields_projection_changes_version_etag(self):
+        """Same versions, different projection: different ETag; same projection spelled differently: same"""
+        tasks = [{"id": 1, "ref": 7, "version": 3, "modified_date": "2024-01-01T00:00:00Z"}]
+
+        def respond(fields, if_none_match=None):
+            tree = parse_fields(fields, "task")
+            return conditional_json(make_request(if_none_match), {"data": project(tasks, tree)}, "tasks",
+                                    records=tasks, variant={"fields": tree})
+
+        full = respond(None).headers["etag"]
+        narrow = respond("id,ref").headers["etag"]
+        assert full != narrow and full.startswith('"v-')
+        assert respond("ref, id").headers["etag"] == narrow
+        assert respond("id", narrow).status_code == 200
+        assert respond("ref,id", narrow).status_code == 304
+
+    def test_05_story_and_epic_lists_get_version_etags(self, monkeypatch):
+        """Stories and epics carry Taiga's version, and fields= is part of the epics ETag"""
+        item = SimpleNamespace(id=1, ref=7, subject="Painel", description="", status=1, status_extra_info=OPEN,
+                               version=3, modified_date="2024-01-01T00:00:00Z")
+        service = make_service(
+            user_stories=SimpleNamespace(list=lambda project, page, page_size: [item] if page == 1 else []),
+            epics=SimpleNamespace(list=lambda project: [item]),
+        )
+        monkeypatch.setattr(taiga_routes, "taiga_service", service)
+
+        stories = taiga_routes.get_user_stories(make_request(), 1)
+        assert stories.headers["etag"].startswith('"v-')
+        epics = taiga_routes.get_epics(make_request(), 1).headers["etag"]
+        compact = taiga_routes.get_epics(make_request(), 1, fields="compact").headers["etag"]
+        assert epics.startswith('"v-') and compact != epics
+        assert taiga_routes.get_epics(make_request(compact), 1, fields="compact").status_code == 304
+
+        story = service.get_user_stories(1)[0]
+        store = StoryStore(1, [story])
+        assert store.to_dict(store.get(1)) == story
@@ -0,0 +1,120 @@
+"""
+Tests for Idempotency-Key storage (no Taiga server needed)
+"""
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.idempotency import IdempotencyStore, IdempotencyConflict
+from routes import taiga_routes
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'idem.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return IdempotencyStore(session_factory=sessionmaker(bind=engine))
+
+
+class TestIdempotencyStore:
+    """IdempotencyStore behaviour"""
+
+    def test_01_retry_replays_without_creating(self, store):
+        """A retry with the same key returns stored results"""
+        created = []
+
+        def create(item):
+            created.append(item["subject"])
+            return {"id": len(created), "subject": item["subject"]}
+
+        items = [{"subject": "A"}, {"subject": "B"}]
+        first, replayed = store.run_batch("k1", items, create)
+        second, replayed_again = store.run_batch("k1", items, create)
+
+        assert first == second
+        assert (replayed, replayed_again) == (0, 2)
+        assert created == ["A", "B"]
+
+    def test_02_partial_batch_creates_only_missing_items(self, store):
+        """Items that failed before are the only ones created on retry"""
+        fail = {"B"}
+
+        def create(item):
+            if item["subject"] in fail:
+                raise Exception("timeout")
+            return {"subject": item["subject"]}
+
+        items = [{"subject": "A"}, {"subject": "B"}, {"subject": "C"}]
+        first, _ = store.run_batch("k2", items, create)
+        assert first[1]["error"] == "timeout"
+
+        fail.clear()
+        calls = []
+        second, replayed = store.run_batch("k2", items, lambda item: calls.append(item) or {"subject": item["subject"]})
+        assert calls == [{"subject": "B"}]
+        assert replayed == 2
+        assert [r["subject"] for r in second] == ["A", "B", "C"]
+
+    def test_03_key_reuse_with_other_body_conflicts(self, store):
+        """Reusing a key for a different request is rejected"""
+        store.run_batch("k3", [{"subject": "A"}], lambda item: {"ok": True})
+        with pytest.raises(IdempotencyConflict):
+            store.run_batch("k3", [{"subject": "Other"}], lambda item: {"ok": True})
+
+    def test_04_run_once(self, store):
+        """Background starts happen once per key"""
+        starts = []
+        first, replayed = store.run_once("k4", {"a": 1}, lambda: starts.append(1) or {"job_id": "x"})
+        second, replayed_again = store.run_once("k4", {"a": 1}, lambda: starts.append(1) or {"job_id": "y"})
+        assert first == second == {"job_id": "x"}
+        assert (replayed, replayed_again, len(starts)) == (False, True, 1)
+
+    def test_05_key_reuse_in_another_context_conflicts(self, store):
+        """The same body under the same key but for another project is not a replay"""
+        store.run_batch("k5", [{"subject": "A"}], lambda item: {"project": 1}, context={"project": 1})
+        replay, replayed = store.run_batch("k5", [{"subject": "A"}], lambda item: {"project": 9},
+                                           context={"project": 1})
+        assert (replay, replayed) == ([{"project": 1}], 1)
+        with pytest.raises(IdempotencyConflict):
+            store.run_batch("k5", [{"subject": "A"}], lambda item: {"project": 2}, context={"project": 2})
+
+    def test_06_key_locks_are_released(self, store):
+        """Per-key locks only live while a request holds or waits for them"""
+        inside = threading.Event()
+        release = threading.Event()
+
+        def slow(item):
+            inside.set()
+            release.wait(5)
+            return {"ok": True}
+
+        worker = threading.Thread(target=store.run_batch, args=("k6", [{"subject": "A"}], slow))
+        worker.start()
+        inside.wait(5)
+        assert list(store._key_locks) == ["k6"]
+        release.set()
+        worker.join()
+        store.run_once("k7", {"a": 1}, lambda: {"job_id": "x"})
+        assert store._key_locks == {}
+
+
+class TestCreateTaskRoute:
+    """Idempotency-Key on POST /tasks"""
+
+    def test_01_same_key_other_project_is_rejected(self, store, monkeypatch):
+        created = []
+        monkeypatch.setattr(taiga_routes, "idempotency_store", store)
+        monkeypatch.setattr(taiga_routes.taiga_service, "create_task",
+                            lambda project_id, **task: created.append(project_id) or {"id": 1, "project": project_id})
+
+        first = taiga_routes.create_task(taiga_routes.TaskCreate(subject="A", project=1), idempotency_key="k")
+        retry = taiga_routes.create_task(taiga_routes.TaskCreate(subject="A", project=1), idempotency_key="k")
+        assert first.body == retry.body and retry.headers["idempotent-replayed"] == "true"
+        with pytest.raises(HTTPException) as error:
+            taiga_routes.create_task(taiga_routes.TaskCreate(subject="A", project=2), idempotency_key="k")
+        assert error.value.status_code == 422
+        assert created == [1]
@@ -0,0 +1,118 @@
+"""
+Tests for streaming task import (no Taiga server needed)
+"""
+import threading
+from types import SimpleNamespace
+
+from app.importer import ChunkPipe, RowValidator, import_tasks, iter_lines, iter_rows
+
+STATUSES = [{"id": 1, "name": "Novo"}, {"id": 2, "name": "Em Análise"}]
+MEMBERS = [{"user": 7, "full_name_display": "Maria Silva", "full_name": "Maria Silva"}]
+
+
+def importing_service(fail_subjects=()):
+    """Stand-in for the service: records created tasks, fails the given subjects"""
+    created = []
+    lock = threading.Lock()
+
+    def create_task(project_id, subject, **kwargs):
+        if subject in fail_subjects:
+            raise Exception("upstream error")
+        with lock:
+            created.append({"subject": subject, **kwargs})
+            return {"id": len(created), "ref": 100 + len(created)}
+
+    service = SimpleNamespace(
+        created=created,
+        create_task=create_task,
+        _ensure_authenticated=lambda: None,
+        _get_project_metadata=lambda project_id: {"task_statuses": STATUSES, "members": MEMBERS},
+    )
+    return service
+
+
+class TestParsing:
+    """Incremental decoding and row parsing"""
+
+    def test_01_lines_across_chunk_boundaries(self):
+        """Lines and multi-byte characters split across chunks are rejoined"""
+        data = "a,b\nção,2\n3,4".encode()
+        chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+        assert list(iter_lines(chunks)) == ["a,b\n", "ção,2\n", "3,4"]
+
+    def test_02_csv_with_semicolons_and_quotes(self):
+        """Delimiter is detected from the header; quoted newlines are kept"""
+        lines = iter_lines([b'Subject;Description\nA;"linha 1\nlinha 2"\n'])
+        rows = list(iter_rows(lines, "csv"))
+        assert rows[0][1] == {"subject": "A", "description": "linha 1\nlinha 2"}
+
+    def test_03_ndjson_errors_are_per_row(self):
+        """A bad line is reported without stopping the import"""
+        rows = list(iter_rows(iter_lines([b'{"subject": "A"}\nnot json\n\n[1]\n']), "ndjson"))
+        assert [(number, error is None) for number, _, error in rows] == [(1, True), (2, False), (4, False)]
+
+    def test_04_only_newline_ends_a_row(self):
+        """U+2028, U+0085 and form feeds inside a field don't split the row"""
+        data = "subject,description\nA,um\u2028dois\x85três\x0cquatro\n".encode()
+        rows = list(iter_rows(iter_lines([data]), "csv"))
+        assert [row for _, row, _ in rows] == [{"subject": "A", "description": "um\u2028dois\x85três\x0cquatro"}]
+
+    def test_05_crlf_split_across_chunks(self):
+        """A "\r\n" cut between two chunks is one line ending, not an extra empty row"""
+        chunks = [b"subject\r", b"\nA\r", b"\nB\r\n"]
+        assert list(iter_lines(chunks)) == ["subject\n", "A\n", "B\n"]
+        rows = list(iter_rows(iter_lines(chunks), "ndjson"))
+        assert [number for number, _, _ in rows] == [1, 2, 3]
+
+
+class TestRowValidator:
+    """Name resolution against project metadata"""
+
+    def test_01_resolves_names_and_ids(self):
+        """Statuses and assignees may be given by name (any case) or id"""
+        validator = RowValidator(STATUSES, MEMBERS, user_story_id=5)
+        fields, error = validator.validate({"subject": " A ", "status": "em análise", "assignee": "maria silva"})
+        assert error is None
+        assert fields == {"subject": "A", "status": 2, "assigned_to": 7, "user_story": 5}
+        assert validator.validate({"subject": "B", "status": "1"})[0]["status"] == 1
+
+    def test_02_rejects_unknown_values(self):
+        """Unknown names and missing subjects are row errors"""
+        validator = RowValidator(STATUSES, MEMBERS)
+        assert validator.validate({"subject": "A", "status": "Pronto"})[1] == "Unknown status 'Pronto'"
+        assert validator.validate({"subject": "A", "assigned_to": "99"})[1] == "Unknown assignee '99'"
+        assert validator.validate({"description": "x"})[1] == "Missing subject"
+
+
+class TestImportTasks:
+    """import_tasks end to end"""
+
+    def test_01_row_level_report(self):
+        """Every row gets a created/invalid/failed entry, in row order"""
+        service = importing_service(fail_subjects={"C"})
+        body = b"subject,status\nA,Novo\nB,Pronto\nC,Novo\nD,\n"
+        result = import_tasks(service, 1, [body], "csv")
+        assert [(e["row"], e["status"]) for e in result["report"]] == [
+            (2, "created"), (3, "invalid"), (4, "failed"), (5, "created")
+        ]
+        assert (result["created"], result["invalid"], result["failed"]) == (2, 1, 1)
+        # Rows without a status get the project's first status
+        assert {t["subject"]: t["status"] for t in service.created} == {"A": 1, "D": 1}
+
+    def test_02_creates_while_upload_is_still_streaming(self):
+        """Rows are created before the body has been fully received"""
+        service = importing_service()
+        pipe = ChunkPipe(maxsize=2)
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(import_tasks(service, 1, pipe, "ndjson")))
+        worker.start()
+        pipe.put(b'{"subject": "first"}\n')
+        for _ in range(100):
+            if service.created:
+                break
+            threading.Event().wait(0.02)
+        assert [t["subject"] for t in service.created] == ["first"]
+        pipe.put(b'{"subject": "second"}\n')
+        pipe.finish()
+        worker.join(5)
+        assert result["created"] == 2
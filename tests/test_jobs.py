@@ -0,0 +1,111 @@
+"""
+Tests for the background job manager (no Taiga server needed)
+"""
+import json
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.jobs as jobs
+from app.database import Base, JobItem
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    calls = []
+
+    def handler(payload, params):
+        calls.append(payload["n"])
+        if payload["n"] == 3:
+            raise Exception("boom")
+        return {"n": payload["n"], "project": params.get("project_id")}
+
+    monkeypatch.setitem(jobs.HANDLERS, "create_tasks", handler)
+    manager = jobs.JobManager(session_factory=sessionmaker(bind=engine), workers=3, is_ready=lambda: True)
+    manager.calls = calls
+    return manager
+
+
+class TestJobManager:
+    """JobManager behaviour"""
+
+    def test_01_run_reports_per_item_outcomes(self, manager):
+        """Every item ends done or failed and counters add up"""
+        job = manager.enqueue("create_tasks", [{"n": i} for i in range(5)], {"project_id": 133})
+        assert job["status"] == "queued"
+
+        manager.run(job["id"])
+        result = manager.get(job["id"], include_items=True)
+
+        assert result["status"] == "completed"
+        assert (result["succeeded"], result["failed"], result["pending"]) == (4, 1, 0)
+        assert result["items"][3]["error"] == "boom"
+        assert result["items"][0]["result"] == {"n": 0, "project": 133}
+        assert sorted(item["seq"] for item in result["items"]) == [1, 2, 3, 4, 5]
+
+    def test_02_resume_processes_only_pending_items(self, manager):
+        """A job interrupted mid-way continues from the remaining items"""
+        job = manager.enqueue("create_tasks", [{"n": i} for i in (0, 1, 2)])
+        db = manager.session_factory()
+        first = db.query(JobItem).filter(JobItem.job_id == job["id"], JobItem.position == 0).one()
+        db.close()
+        manager._finish_item(job["id"], first.id, {"n": 0}, None)
+
+        manager.run(job["id"])
+
+        assert sorted(manager.calls) == [1, 2]
+        assert manager.get(job["id"])["succeeded"] == 3
+
+    def test_03_event_stream_ends_with_done(self, manager):
+        """The SSE stream emits one item event per item and a final done"""
+        job = manager.enqueue("create_tasks", [{"n": i} for i in range(2)])
+        manager.run(job["id"])
+
+        events = list(manager.events(job["id"]))
+        assert sum(e.startswith("event: item") for e in events) == 2
+        assert events[-1].startswith("event: done")
+
+    def test_04_unknown_kind_rejected(self, manager):
+        with pytest.raises(ValueError):
+            manager.enqueue("nope", [{"n": 1}])
+
+    def test_05_live_stream_follows_a_running_job(self, manager, monkeypatch):
+        """Items stream from memory as they finish, each exactly once, without polling"""
+        release = threading.Event()
+
+        def slow(payload, params):
+            release.wait(5)
+            return {"n": payload["n"]}
+
+        monkeypatch.setitem(jobs.HANDLERS, "create_tasks", slow)
+        job = manager.enqueue("create_tasks", [{"n": i} for i in range(6)])
+        runner = threading.Thread(target=manager.run, args=(job["id"],))
+        runner.start()
+        stream = manager.events(job["id"])
+        events = [next(stream)]  # first progress, read while the workers are blocked
+        release.set()
+        events += list(stream)
+        runner.join()
+
+        items = [json.loads(e.split("data: ", 1)[1]) for e in events if e.startswith("event: item")]
+        assert sorted(item["seq"] for item in items) == [1, 2, 3, 4, 5, 6]
+        assert sorted(item["payload"]["n"] for item in items) == list(range(6))
+        assert events[-1].startswith("event: done")
+
+    def test_06_item_writes_happen_outside_the_manager_lock(self, manager):
+        factory = manager.session_factory
+        held = []
+
+        def session_factory():
+            held.append(manager._lock.locked())
+            return factory()
+
+        manager.session_factory = session_factory
+        job = manager.enqueue("create_tasks", [{"n": i} for i in range(4)])
+        manager.run(job["id"])
+        assert manager.get(job["id"])["succeeded"] == 3
+        assert not any(held)
@@ -0,0 +1,27 @@
+"""
+Tests for the fast JSON response
+"""
+import json
+from datetime import datetime
+
+import app.json_response as json_response
+
+
+class TestFastJSONResponse:
+    """FastJSONResponse rendering"""
+
+    def test_01_same_document_with_and_without_orjson(self, monkeypatch):
+        """orjson and the stdlib fallback produce equivalent JSON"""
+        content = {"success": True, "data": [{"id": 1, "subject": "Tarefa Ação", "tags": []}], "by_id": {7: "x"}}
+        fast = json.loads(json_response.FastJSONResponse(content).body)
+
+        monkeypatch.setattr(json_response, "orjson", None)
+        fallback = json.loads(json_response.FastJSONResponse(content).body)
+
+        assert fast == fallback == json.loads(json.dumps(content))
+
+    def test_02_non_native_values_fall_back_to_encoder(self, monkeypatch):
+        """Dates and similar values are still serialized"""
+        monkeypatch.setattr(json_response, "orjson", None)
+        body = json_response.FastJSONResponse({"when": datetime(2024, 1, 2, 3, 4, 5)}).body
+        assert json.loads(body) == {"when": "2024-01-02T03:04:05"}
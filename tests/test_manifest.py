@@ -0,0 +1,112 @@
+"""
+Tests for declarative task manifests (no Taiga server needed)
+"""
+import pytest
+
+from app.manifest import plan_manifest
+from tests.helpers import FakeResponse, make_service
+
+CURRENT = [
+    {"id": 1, "ref": 10, "project": 5, "user_story": 7, "subject": "A", "description": "a",
+     "status": 1, "assigned_to": None, "version": 3},
+    {"id": 2, "ref": 11, "project": 5, "user_story": 7, "subject": "B", "description": "",
+     "status": 1, "assigned_to": 9, "version": 1},
+    {"id": 3, "ref": 12, "project": 5, "user_story": 7, "subject": "C", "description": "c",
+     "status": 2, "assigned_to": None, "version": 2},
+]
+
+
+def recording_service(current):
+    """Service whose list comes from `current` and whose writes are recorded"""
+    service = make_service()
+    service.writes = []
+
+    def fake_request(method, path, **kwargs):
+        if method == "GET":
+            task_id = int(path.rsplit("/", 1)[1])
+            return FakeResponse(200, {**next(t for t in current if t["id"] == task_id), "description": "full"})
+        service.writes.append((method, path, kwargs.get("json")))
+        if method == "PATCH":
+            task_id = int(path.rsplit("/", 1)[1])
+            return FakeResponse(200, {**next(t for t in current if t["id"] == task_id), **kwargs["json"]})
+        return FakeResponse(204)
+
+    def fake_create(project_id, subject, **kwargs):
+        service.writes.append(("POST", "/tasks", {"subject": subject, **kwargs}))
+        return {"id": 99, "ref": 99, "subject": subject, "project": project_id}
+
+    service._request = fake_request
+    service._fetch_tasks = lambda project_id, user_story_id=None: [dict(t) for t in current]
+    service.create_task = fake_create
+    return service
+
+
+class TestPlanManifest:
+    """plan_manifest diffing"""
+
+    def test_01_unchanged_manifest_plans_nothing(self):
+        """Entries matching current tasks are unchanged"""
+        desired = [{"subject": "A", "description": "a"}, {"subject": "B"}, {"subject": "C", "status": 2}]
+        plan = plan_manifest(CURRENT, desired)
+        assert plan["create"] == plan["update"] == plan["delete"] == []
+        assert [item["id"] for item in plan["unchanged"]] == [1, 2, 3]
+
+    def test_02_minimal_diff(self):
+        """Only differing fields are updated; unlisted tasks are deleted"""
+        desired = [{"subject": "A", "status": 2, "description": "a"}, {"subject": "B", "assigned_to": None},
+                   {"subject": "D"}]
+        plan = plan_manifest(CURRENT, desired)
+        assert plan["create"] == [{"subject": "D"}]
+        assert [(u["id"], sorted(u["changes"])) for u in plan["update"]] == [(1, ["status"]), (2, ["assigned_to"])]
+        assert [d["id"] for d in plan["delete"]] == [3]
+
+    def test_03_keep_missing_and_duplicates(self):
+        """delete_missing=False keeps extra tasks; duplicate keys are rejected"""
+        plan = plan_manifest(CURRENT, [{"subject": "A"}], delete_missing=False)
+        assert plan["delete"] == []
+        with pytest.raises(ValueError):
+            plan_manifest(CURRENT, [{"subject": "A"}, {"subject": "A "}])
+
+    def test_04_external_key(self):
+        """key_field="key" matches on external_reference"""
+        current = [dict(CURRENT[0], external_reference=["manifest", "x1"])]
+        plan = plan_manifest(current, [{"key": "x1", "subject": "Renamed"}], key_field="key")
+        assert plan["update"][0]["changes"] == {"subject": {"from": "A", "to": "Renamed"}}
+
+
+class TestSyncTaskManifest:
+    """TaigaService.sync_task_manifest execution"""
+
+    def test_01_reapplying_makes_zero_writes(self):
+        """An unchanged manifest makes no write calls"""
+        service = recording_service(CURRENT)
+        desired = [{"subject": t["subject"], "status": t["status"]} for t in CURRENT]
+        result = service.sync_task_manifest(5, 7, desired)
+        assert service.writes == []
+        assert result["summary"]["write_calls"] == 0
+
+    def test_02_dry_run_does_not_write(self):
+        """dry_run returns the plan only"""
+        service = recording_service(CURRENT)
+        result = service.sync_task_manifest(5, 7, [{"subject": "New"}], dry_run=True)
+        assert service.writes == []
+        assert result["summary"]["create"] == 1 and result["summary"]["delete"] == 3
+
+    def test_03_executes_plan(self):
+        """Creates, PATCHes (with version) and deletes run once each"""
+        service = recording_service(CURRENT)
+        desired = [{"subject": "A", "status": 2}, {"subject": "B"}, {"subject": "D"}]
+        result = service.sync_task_manifest(5, 7, desired)
+        assert sorted(w[0] for w in service.writes) == ["DELETE", "PATCH", "POST"]
+        patch = next(w for w in service.writes if w[0] == "PATCH")
+        assert patch[2] == {"status": 2, "version": 3}
+        assert result["results"]["errors"] == []
+        assert service.writes[[w[0] for w in service.writes].index("POST")][2]["user_story"] == 7
+
+    def test_04_fetches_fields_missing_from_list(self):
+        """Descriptions absent from the list payload are read before diffing"""
+        current = [{k: v for k, v in t.items() if k != "description"} for t in CURRENT[:1]]
+        service = recording_service(current)
+        result = service.sync_task_manifest(5, 7, [{"subject": "A", "description": "full"}])
+        assert service.writes == []
+        assert result["summary"]["unchanged"] == 1
@@ -0,0 +1,72 @@
+"""
+Tests for list field projection
+"""
+import json
+import re
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.requests import Request
+
+from app.projection import parse_fields, project
+from routes import taiga_routes
+
+STATIC_JS = Path(__file__).resolve().parent.parent / "static" / "js"
+
+TASK = {
+    "id": 1,
+    "ref": 4871,
+    "subject": "Tarefa",
+    "status": 10,
+    "status_extra_info": {"name": "Novo", "color": "#999", "is_closed": False},
+    "assigned_to": None,
+    "assigned_to_extra_info": None,
+    "description": "Detalhes",
+    "watchers": [1, 2, 3],
+    "version": 2,
+}
+
+
+class TestProjection:
+    """parse_fields / project behaviour"""
+
+    def test_01_no_fields_returns_records_untouched(self):
+        """Without fields= the records are returned as-is"""
+        records = [TASK]
+        assert project(records, parse_fields(None, "task")) is records
+        assert project(records, parse_fields("all", "task")) is records
+
+    def test_02_nested_fields(self):
+        """Dotted paths trim nested objects"""
+        result = project([TASK], parse_fields("id, ref,status_extra_info.name,missing", "task"))
+        assert result == [{"id": 1, "ref": 4871, "status_extra_info": {"name": "Novo"}}]
+
+    def test_03_compact_preset(self):
+        """The compact view keeps what the UI shows and drops the rest"""
+        result = project([TASK], parse_fields("compact", "task"))[0]
+        assert "watchers" not in result
+        assert result["status_extra_info"] == {"name": "Novo", "color": "#999"}
+        assert result["assigned_to_extra_info"] is None
+        assert result["version"] == 2
+
+
+class TestUiTaskList:
+    """The task list request the UI actually sends"""
+
+    def test_01_ui_requests_compact_tasks_with_every_card_field(self, monkeypatch):
+        """static/js asks for fields=compact, and that view has everything the task cards read"""
+        api_js = (STATIC_JS / "core" / "api.js").read_text()
+        query = re.search(r"`/api/projects/\$\{projectId\}/tasks\?([^`]*)`", api_js).group(1)
+        fields = parse_qs(query)["fields"][0]
+        assert fields == "compact"
+
+        card_js = (STATIC_JS / "components" / "taskCard.js").read_text()
+        card_js = card_js[:card_js.index("export async function showTaskDetails")]
+        read = set(re.findall(r"\btask\.(\w+)", card_js))
+
+        monkeypatch.setattr(taiga_routes.taiga_service, "get_tasks", lambda project_id, user_story_id: [TASK])
+        request = Request({"type": "http", "method": "GET", "path": "/api/projects/1/tasks", "headers": []})
+        response = taiga_routes.get_tasks(request, 1, fields=fields)
+        listed = json.loads(response.body)["data"][0]
+        assert read <= set(listed)
+        assert "watchers" not in listed
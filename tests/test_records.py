@@ -0,0 +1,43 @@
+"""
+Tests for compact cached records
+"""
+from app.records import TaskStore, StoryStore
+from app.taiga_service import TaigaService
+from benchmarks.wire_bytes import sample_tasks
+
+
+class TestRecords:
+    """TaskStore / StoryStore behaviour"""
+
+    def test_01_task_roundtrip_keeps_the_full_payload(self):
+        """Records expand back to the service's task dict shape plus every other upstream field"""
+        tasks = sample_tasks(20)
+        store = TaskStore(133, tasks)
+        service = TaigaService()
+
+        expected = {t["id"]: {**t, **service._task_to_dict_from_json(t)} for t in tasks}
+        actual = {d["id"]: d for d in store.iter_dicts()}
+        assert actual == expected
+
+    def test_02_extra_info_is_shared_per_id(self):
+        """Tasks with the same status share one status_extra_info dict"""
+        store = TaskStore(133, sample_tasks(20))
+        same_status = [store.to_dict(r) for r in store.records() if r.status == 1500]
+
+        assert len(same_status) > 1
+        assert all(d["status_extra_info"] is same_status[0]["status_extra_info"] for d in same_status)
+
+    def test_03_upsert_remove_and_filter(self):
+        """Stores update in place and filter by user story"""
+        store = TaskStore(133, sample_tasks(5))
+        task = dict(sample_tasks(1)[0], subject="Renamed", version=9)
+        store.upsert(task)
+        assert store.get(task["id"]).subject == "Renamed"
+
+        store.remove(task["id"])
+        assert len(store) == 4
+        assert all(r.user_story == 5259 for r in store.records(user_story_id=5259))
+
+        stories = StoryStore(133, [{"id": 1, "ref": 2, "subject": "US", "status": 3,
+                                    "status_extra_info": {"name": "Novo", "color": "#fff"}}])
+        assert list(stories.iter_dicts())[0]["status_extra_info"] == {"name": "Novo", "color": "#fff"}
@@ -0,0 +1,94 @@
+"""
+Tests for the ref -> id index (no Taiga server needed)
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from taiga.exceptions import TaigaRestException
+
+from app.ref_index import RefIndex
+from app.taiga_service import NotFoundError, TaigaService
+from routes import taiga_routes
+from tests.helpers import FakeResponse, make_service, task
+
+
+class TestRefIndex:
+    """RefIndex and TaigaService.resolve_refs behaviour"""
+
+    def test_01_record_lookup_forget(self):
+        """Entries are scoped per kind and project"""
+        index = RefIndex()
+        index.record("task", 1, [{"id": 10, "ref": 4871}, {"id": 11, "ref": 4872}])
+
+        assert index.lookup("task", 1, 4871) == 10
+        assert index.lookup("task", 2, 4871) is None
+        assert index.lookup("userstory", 1, 4871) is None
+
+        index.forget("task", 1, item_id=11)
+        assert index.lookup_many("task", 1, [4871, 4872]) == ({4871: 10}, [4872])
+
+    def test_02_resolve_refs_hits_taiga_only_for_unknown_refs(self):
+        """Known refs are answered locally, unknown ones via by_ref"""
+        service = TaigaService()
+        service.api = SimpleNamespace(token="token")
+        service.ref_index.record("task", 1, [{"id": 10, "ref": 1}])
+        calls = []
+
+        def fake_request(method, path, params=None, **kwargs):
+            calls.append(params["ref"])
+            found = params["ref"] == 2
+            return SimpleNamespace(
+                status_code=200 if found else 404,
+                json=lambda: {"id": 20, "ref": 2},
+                raise_for_status=lambda: None,
+            )
+
+        service._request = fake_request
+        result = service.resolve_refs(1, [1, 2, 3])
+
+        assert result == {"resolved": {1: 10, 2: 20}, "missing": [3]}
+        assert sorted(calls) == [2, 3]
+
+        calls.clear()
+        service.resolve_refs(1, [2])
+        assert calls == []
+
+
+class TestByRefRoutes:
+    """/projects/{id}/tasks/by-ref/{ref}: 404 only when the task doesn't exist"""
+
+    @pytest.fixture
+    def status_of(self, monkeypatch):
+        def status_of(service, call):
+            monkeypatch.setattr(taiga_routes, "taiga_service", service)
+            with pytest.raises(HTTPException) as error:
+                call()
+            return error.value.status_code
+        return status_of
+
+    def test_01_missing_ref_is_404(self, status_of):
+        service = make_service(lambda method, path, **kwargs: FakeResponse(404))
+        assert status_of(service, lambda: taiga_routes.get_task_by_ref(1, 7)) == 404
+        assert status_of(service, lambda: taiga_routes.update_task_by_ref(1, 7, taiga_routes.TaskUpdate())) == 404
+        assert status_of(service, lambda: taiga_routes.delete_task_by_ref(1, 7)) == 404
+
+    def test_02_upstream_failure_is_not_404(self, status_of):
+        service = make_service(lambda method, path, **kwargs: FakeResponse(502))
+        assert status_of(service, lambda: taiga_routes.get_task_by_ref(1, 7)) == 500
+        assert status_of(service, lambda: taiga_routes.update_task_by_ref(1, 7, taiga_routes.TaskUpdate())) == 500
+        assert status_of(service, lambda: taiga_routes.delete_task_by_ref(1, 7)) == 500
+
+    def test_03_task_gone_after_resolving_is_404(self, status_of):
+        def get(task_id):
+            raise TaigaRestException("/tasks/20", 404, "Not found")
+
+        def down(task_id):
+            raise TaigaRestException("/tasks/20", 503, "Unavailable")
+
+        for fetch, status in ((get, 404), (down, 500)):
+            service = make_service(tasks=SimpleNamespace(get=fetch))
+            service.ref_index.record("task", 1, [task(20, 7)])
+            assert status_of(service, lambda: taiga_routes.get_task_by_ref(1, 7)) == status
+        with pytest.raises(NotFoundError):
+            make_service(tasks=SimpleNamespace(get=get)).get_task(20)
@@ -0,0 +1,108 @@
+"""
+Tests for the fair upstream scheduler (no Taiga server needed)
+"""
+import threading
+import time
+
+from app import request_context
+from app.request_context import ContextThreadPoolExecutor, RequestContext, lane_for
+from app.scheduler import BACKGROUND, BULK, INTERACTIVE, FairScheduler
+from app.upstream import UpstreamPolicy
+from tests.helpers import FakeResponse
+
+
+def queue_in_order(scheduler, callers):
+    """Queue (lane, user, name) callers one after another; returns the grant order"""
+    order = []
+    threads = []
+    for lane, user, name in callers:
+        queued = scheduler.snapshot()["queued"]
+
+        def run(lane=lane, user=user, name=name):
+            with scheduler.slot(lane, user):
+                order.append(name)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        threads.append(thread)
+        while scheduler.snapshot()["queued"] == queued:
+            time.sleep(0.001)
+    return order, threads
+
+
+class TestFairScheduler:
+    """Slot grants"""
+
+    def test_01_lanes_by_priority(self):
+        """Interactive calls overtake queued bulk and background calls"""
+        scheduler = FairScheduler(limit=1)
+        scheduler.acquire(BULK, "a")
+        order, threads = queue_in_order(scheduler, [
+            (BACKGROUND, "sync", "warm"), (BULK, "a", "bulk"), (INTERACTIVE, "b", "read"),
+        ])
+        scheduler.release()
+        for thread in threads:
+            thread.join(1)
+        assert order == ["read", "bulk", "warm"]
+
+    def test_02_round_robin_across_users(self):
+        """A user with many queued calls alternates with other users"""
+        scheduler = FairScheduler(limit=1)
+        scheduler.acquire(BULK, "a")
+        order, threads = queue_in_order(scheduler, [
+            (BULK, "a", "a1"), (BULK, "a", "a2"), (BULK, "a", "a3"), (BULK, "b", "b1"), (BULK, "b", "b2"),
+        ])
+        scheduler.release()
+        for thread in threads:
+            thread.join(1)
+        assert order == ["a1", "b1", "a2", "b2", "a3"]
+
+    def test_03_limit_and_metrics(self):
+        """Free slots are granted without waiting; metrics count per lane"""
+        scheduler = FairScheduler(limit=2)
+        assert scheduler.acquire(INTERACTIVE, "a") == 0.0
+        assert scheduler.acquire(BULK, "b") == 0.0
+        snapshot = scheduler.snapshot()
+        assert snapshot["in_flight"] == 2 and snapshot["queued"] == 0
+        assert snapshot["lanes"][BULK]["granted"] == 1
+        scheduler.release()
+        scheduler.release()
+        assert scheduler.snapshot()["in_flight"] == 0
+
+
+class TestContext:
+    """Lane and user of upstream calls"""
+
+    def test_01_lane_for_route(self):
+        assert lane_for("GET", "/api/projects") == INTERACTIVE
+        assert lane_for("POST", "/api/tasks") == INTERACTIVE
+        assert lane_for("POST", "/api/tasks/bulk") == BULK
+        assert lane_for("GET", "/api/projects/1/export") == BULK
+
+    def test_02_policy_uses_caller_lane(self):
+        """Calls are scheduled in the lane of the context they run in, also from worker threads"""
+        policy = UpstreamPolicy(rate=1000, max_rate=1000, send=lambda *a, **k: FakeResponse(200))
+        url = "https://taiga.example/api/v1/tasks"
+        with request_context.use(RequestContext(BULK, "a")):
+            with ContextThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda _: policy.request("GET", url), range(3)))
+        policy.request("GET", url)
+        lanes = policy.stats()["hosts"]["taiga.example"]["scheduler"]["lanes"]
+        assert lanes[BULK]["granted"] == 3
+        assert lanes[BACKGROUND]["granted"] == 1
+
+    def test_03_no_slot_held_while_rate_limited(self):
+        """A call waiting for a token doesn't keep one of the host's slots busy"""
+        now = [0.0]
+        in_flight = []
+        url = "https://taiga.example/api/v1/tasks"
+
+        def sleep(seconds):
+            in_flight.append(policy.scheduler(url).in_flight)
+            now[0] += seconds
+
+        policy = UpstreamPolicy(rate=1, max_rate=1, send=lambda *a, **k: FakeResponse(200),
+                                clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            policy.request("GET", url)
+        assert in_flight and set(in_flight) == {0}
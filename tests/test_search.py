@@ -0,0 +1,127 @@
+"""
+Tests for the federated user story search (no Taiga server needed)
+"""
+import re
+import time
+
+import pytest
+
+from app.search import normalize, rank
+from tests.helpers import FakeResponse, make_service
+
+STORIES = {
+    1: [{"id": 11, "ref": 4861, "subject": "Painel de tensão", "description": "", "tags": [],
+         "is_closed": False},
+        {"id": 12, "ref": 4862, "subject": "Relatório do painel", "description": "", "tags": [["bi", None]],
+         "is_closed": False}],
+    2: [{"id": 21, "ref": 10, "subject": "Painel", "description": "", "tags": [], "is_closed": True},
+        {"id": 22, "ref": 11, "subject": "Login", "description": "", "tags": [], "is_closed": False}],
+}
+
+
+def taiga_matches(story, query):
+    """Taiga's ?q=: each query word starts a word of the ref, subject, tags or description (accents count)"""
+    text = " ".join([str(story["ref"]), story["subject"], story["description"]] + [t[0] for t in story["tags"]])
+    story_words = re.findall(r"\w+", text.casefold())
+    return all(any(w.startswith(q) for w in story_words) for q in re.findall(r"\w+", query.casefold()))
+
+
+def search_service(delays=None, failing=(), stories=STORIES):
+    """Service whose fake Taiga searches stories (optionally slow or failing per project)"""
+    calls = []
+
+    def fake_request(method, path, params=None, **kwargs):
+        project_id, query = params["project"], params["q"]
+        calls.append((project_id, query))
+        time.sleep((delays or {}).get(project_id, 0))
+        if project_id in failing:
+            raise Exception("upstream error")
+        return FakeResponse(200, [s for s in stories[project_id] if taiga_matches(s, query)])
+
+    service = make_service(fake_request)
+    service.calls = calls
+    return service
+
+
+class TestRanking:
+    """Scoring of hits"""
+
+    def test_01_exact_then_prefix_then_substring(self):
+        """Exact subject beats prefix beats substring; ref matches win"""
+        stories = STORIES[1] + STORIES[2]
+        assert [s["id"] for s in rank(stories, "painel")] == [21, 11, 12, 22]
+        assert rank(stories, "#4862")[0]["id"] == 12
+
+    def test_02_accent_insensitive(self):
+        """Accents and case are ignored"""
+        assert normalize("Relatório") == normalize("RELATORIO")
+
+
+class TestFederatedSearch:
+    """TaigaService.federated_search"""
+
+    def test_01_hits_stream_as_projects_answer(self):
+        """The fast project's hits come first; done merges everything"""
+        service = search_service(delays={1: 0.2})
+        events = list(service.federated_search([1, 2], "painel"))
+        assert [(e["type"], e.get("project", {}).get("id")) for e in events] == [
+            ("hits", 2), ("hits", 1), ("done", None)
+        ]
+        assert [hit["id"] for hit in events[-1]["results"]] == [21, 11, 12]
+
+    def test_02_refined_query_uses_cached_results(self):
+        """Refining a query filters the cached complete result locally"""
+        service = search_service()
+        list(service.federated_search([1, 2], "pain"))
+        events = list(service.federated_search([1, 2], "painel de"))
+        assert sorted(service.calls) == [(1, "pain"), (2, "pain")]
+        assert [hit["id"] for hit in events[-1]["results"]] == [11]
+
+    def test_03_refined_query_keeps_description_matches(self):
+        """Local narrowing searches the same fields as Taiga, not just the subject"""
+        stories = {1: STORIES[1] + [{"id": 13, "ref": 4863, "subject": "Ajustar cores", "tags": [],
+                                     "description": "Cores do painel principal", "is_closed": False}]}
+        service = search_service(stories=stories)
+        list(service.federated_search([1], "pain"))
+        events = list(service.federated_search([1], "painel princ"))
+        assert service.calls == [(1, "pain")]
+        assert [hit["id"] for hit in events[-1]["results"]] == [13]
+
+    def test_04_substring_of_query_is_not_reused(self):
+        """A cached "ne" (words starting with ne) says nothing about "painel" """
+        service = search_service()
+        assert service.search_project_stories(1, "ne") == []
+        assert [s["id"] for s in service.search_project_stories(1, "painel")] == [11, 12]
+        assert service.calls == [(1, "ne"), (1, "painel")]
+
+    def test_05_stories_without_searched_fields_are_not_narrowed(self):
+        """A cached list lacking descriptions can't be filtered like Taiga would"""
+        stories = {1: [{key: value for key, value in story.items() if key != "description"}
+                       for story in STORIES[1]]}
+        service = search_service(stories={1: STORIES[1]})
+        service.search_cache.set((service.host, "search", 1, "pain"), (stories[1], True))
+        service.search_project_stories(1, "painel")
+        assert service.calls == [(1, "painel")]
+
+    def test_06_failing_project_reported(self):
+        """A failing project yields an error event, others still answer"""
+        service = search_service(failing={2})
+        events = list(service.federated_search([1, 2], "painel", {1: "DASA"}))
+        assert events[-1]["errors"] == {2: "upstream error"}
+        assert {e["type"] for e in events} == {"hits", "error", "done"}
+
+    def test_07_cache_is_keyed_on_the_query_sent(self):
+        """Queries differing only in accents are different Taiga searches"""
+        service = search_service()
+        assert service.search_project_stories(1, "relatorio") == []
+        assert [s["id"] for s in service.search_project_stories(1, "relatório")] == [12]
+        assert [s["id"] for s in service.search_project_stories(1, "relatório do")] == [12]
+        assert service.calls == [(1, "relatorio"), (1, "relatório")]
+
+    def test_08_not_logged_in_raises_before_streaming(self):
+        """The login check runs when called, not on the first event"""
+        service = search_service()
+        service.api = None
+        with pytest.raises(Exception, match="Not authenticated"):
+            service.federated_search([1], "painel")
+        assert service.calls == []
@@ -0,0 +1,58 @@
+"""
+Tests for columnar task analytics (no Taiga server needed)
+"""
+from collections import Counter
+
+from app.records import TaskStore
+from app.stats import DAY, parse_timestamp
+from benchmarks.wire_bytes import sample_tasks
+
+NOW = parse_timestamp("2024-03-11T12:00:00Z")
+
+
+class TestTaskColumns:
+    """TaskColumns group-bys and incremental updates"""
+
+    def test_01_counts_match_naive_grouping(self):
+        """Group-by counts equal a straightforward count over the dicts"""
+        tasks = sample_tasks(500)
+        stats = TaskStore(133, tasks).columns.compute(NOW)
+
+        assert stats["total"] == 500
+        assert stats["closed"] == sum(t["is_closed"] for t in tasks)
+        expected = Counter(t["assigned_to"] for t in tasks)
+        assert {k: v["total"] for k, v in stats["by_assignee"].items()} == dict(expected)
+        closed_status = stats["by_status"][1503]
+        assert closed_status["closed_ratio"] == 1.0 and closed_status["open"] == 0
+
+    def test_02_age_distribution(self):
+        """Ages fall into day buckets relative to now"""
+        tasks = sample_tasks(3)
+        tasks[1]["created_date"] = "2024-03-11T00:00:00Z"
+        tasks[2]["created_date"] = None
+        ages = TaskStore(133, tasks).columns.compute(NOW)["age_days"]["all"]
+
+        counts = {bucket["label"]: bucket["count"] for bucket in ages["buckets"]}
+        assert counts["0-1d"] == 1 and counts["7-30d"] == 1
+        assert ages["unknown"] == 1
+
+    def test_03_updates_are_incremental(self):
+        """Upserts and removals change the columns in place and refresh results"""
+        tasks = sample_tasks(10)
+        store = TaskStore(133, tasks)
+        first = store.columns.compute(NOW)
+        assert store.columns.compute(NOW) is first
+
+        store.upsert(dict(tasks[0], status=1503, is_closed=True))
+        store.remove(tasks[5]["id"])
+        second = store.columns.compute(NOW)
+
+        assert second is not first
+        assert second["total"] == 9 and len(store.columns) == 9
+        assert second["closed"] == first["closed"] + 1 - (1 if tasks[5]["is_closed"] else 0)
+        assert sorted(store.columns.ids) == sorted(t["id"] for t in tasks if t is not tasks[5])
+
+    def test_04_open_ages_exclude_closed(self):
+        """The open age distribution only counts open tasks"""
+        stats = TaskStore(133, sample_tasks(50)).columns.compute(NOW + 400 * DAY)
+        assert sum(b["count"] for b in stats["age_days"]["open"]["buckets"]) == stats["open"]
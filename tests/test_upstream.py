@@ -0,0 +1,117 @@
+"""
+Tests for the upstream retry / rate limiting policy (no Taiga server needed)
+"""
+import pytest
+import requests
+from taiga.exceptions import TaigaRestException
+
+from app.upstream import AdaptiveTokenBucket, PolicyRequestMaker, UpstreamPolicy, parse_retry_after
+from tests.helpers import FakeResponse
+
+
+def make_policy(outcomes):
+    """Policy whose sends return/raise the given outcomes in order"""
+    calls, sleeps = [], []
+    outcomes = list(outcomes)
+    clock = [0.0]
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    def send(method, url, **kwargs):
+        calls.append((method, kwargs))
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    policy = UpstreamPolicy(rate=1000, max_rate=1000, max_retries=3, send=send,
+                            clock=lambda: clock[0], sleep=sleep)
+    return policy, calls, sleeps
+
+
+class TestRetries:
+    """Which failures are retried"""
+
+    def test_01_get_retried_on_transient_errors(self):
+        """Idempotent requests retry 502s and read timeouts with backoff"""
+        policy, calls, sleeps = make_policy([FakeResponse(502), requests.ReadTimeout(), FakeResponse(200)])
+        response = policy.request("GET", "https://taiga.example/api/v1/tasks")
+        assert response.status_code == 200
+        assert len(calls) == 3 and len(sleeps) == 2
+        assert calls[0][1]["timeout"] == policy.timeout
+
+    def test_02_post_only_retried_when_not_applied(self):
+        """POST retries 503 and unreachable hosts, but not 502 or read timeouts"""
+        policy, calls, _ = make_policy([FakeResponse(502)])
+        assert policy.request("POST", "https://taiga.example/api/v1/tasks", json={}).status_code == 502
+        assert len(calls) == 1
+
+        policy, calls, _ = make_policy([FakeResponse(503), requests.ConnectTimeout(), FakeResponse(201)])
+        assert policy.request("POST", "https://taiga.example/api/v1/tasks", json={}).status_code == 201
+        assert len(calls) == 3
+
+        policy, calls, _ = make_policy([requests.ReadTimeout()])
+        with pytest.raises(requests.ReadTimeout):
+            policy.request("POST", "https://taiga.example/api/v1/tasks", json={})
+
+    def test_03_patch_with_version_is_retryable(self):
+        """A versioned PATCH retries a 504 (Taiga rejects a replay)"""
+        policy, calls, _ = make_policy([FakeResponse(504), FakeResponse(200)])
+        policy.request("PATCH", "https://taiga.example/api/v1/tasks/1", json={"status": 2, "version": 3})
+        assert len(calls) == 2
+
+    def test_04_gives_up_after_max_retries(self):
+        """The last response is returned once retries are exhausted"""
+        policy, calls, _ = make_policy([FakeResponse(502)] * 4)
+        assert policy.request("GET", "https://taiga.example/api/v1/tasks").status_code == 502
+        assert len(calls) == 4 and policy.retries == 3
+
+    def test_05_retry_after_throttles_the_host(self):
+        """A 429 halves the host's rate and blocks it for Retry-After"""
+        policy, calls, sleeps = make_policy([FakeResponse(429, headers={"Retry-After": "2"}), FakeResponse(200)])
+        policy.request("GET", "https://taiga.example/api/v1/tasks")
+        bucket = policy.bucket("https://taiga.example/x")
+        assert bucket.rate == 500 and bucket.throttled == 1
+        assert len(calls) == 2 and sleeps and sleeps[0] == pytest.approx(2, abs=0.1)
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestAdaptiveTokenBucket:
+    """Rate pacing"""
+
+    def make_bucket(self, rate):
+        clock = [0.0]
+        bucket = AdaptiveTokenBucket(rate=rate, max_rate=10, clock=lambda: clock[0],
+                                     sleep=lambda seconds: clock.__setitem__(0, clock[0] + seconds))
+        return bucket, clock
+
+    def test_01_paces_to_rate(self):
+        """Once the burst is used, tokens arrive at the configured rate"""
+        bucket, clock = self.make_bucket(rate=2)
+        for _ in range(6):
+            bucket.acquire()
+        assert clock[0] == pytest.approx(2.0)
+
+    def test_02_grows_back_after_successes(self):
+        """Additive increase: one request/second per second of successes"""
+        bucket, _ = self.make_bucket(rate=4)
+        bucket.on_throttle()
+        assert bucket.rate == 2
+        for _ in range(2):
+            bucket.on_success()
+        assert bucket.rate == 3
+
+
+class TestPolicyRequestMaker:
+    """python-taiga calls through the policy"""
+
+    def test_01_errors_and_payloads(self):
+        """Bad responses become TaigaRestException; payloads are sent as JSON"""
+        policy, calls, _ = make_policy([FakeResponse(200, data={}), FakeResponse(404)])
+        maker = PolicyRequestMaker(policy, "/api/v1", "https://taiga.example", "token")
+        maker.put("/tasks/{id}", payload={"subject": "A"}, id=5)
+        assert calls[0][1]["json"] == {"subject": "A"}
+        with pytest.raises(TaigaRestException):
+            maker.get("/tasks/{id}", id=6)
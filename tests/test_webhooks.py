@@ -0,0 +1,125 @@
+"""
+Tests for the Taiga webhook receiver's decoding and batching (no Taiga server needed)
+
+Replays the recorded payloads in tests/fixtures/taiga_webhooks.json.
+"""
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from app.records import StoryStore
+from app.webhooks import WebhookBatcher, decode, verify_signature
+from tests.helpers import FakeResponse, make_service, task
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "taiga_webhooks.json")
+SECRET = "webhook-key"
+
+
+def recorded_bodies():
+    """Each recorded payload as the raw body Taiga would send"""
+    with open(FIXTURES, encoding="utf-8") as f:
+        return [json.dumps(payload).encode("utf-8") for payload in json.load(f)]
+
+
+def sign(body, secret=SECRET):
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha1).hexdigest()
+
+
+def cached_service():
+    """Service with project 1's tasks and user stories cached; any other call to Taiga fails the test"""
+    def request(method, path, **kwargs):
+        if method == "GET" and path == "/tasks":
+            return FakeResponse(200, [task(1, 11, version=4), task(2, 12, version=4)])
+        raise AssertionError(f"unexpected call {method} {path}")
+
+    service = make_service(request)
+    service.get_task_store(1)
+    service.task_versions.set(1, 4)
+    story = {"id": 10, "ref": 5, "subject": "Painel", "description": "", "status": 19,
+             "status_extra_info": {"name": "New", "color": "#999999"}}
+    service.record_cache.set((service.host, "userstory", 1), StoryStore(1, [story]))
+    service.last_good.set((service.host, "userstories", 1), (time.time(), [story]))
+    service.search_cache.set((service.host, "search", 1, "painel"), ([story], True))
+    service.search_cache.set((service.host, "search", 2, "painel"), ([], True))
+    return service
+
+
+class TestSignature:
+    """X-TAIGA-WEBHOOK-SIGNATURE"""
+
+    def test_01_hmac_sha1_of_body(self):
+        body = recorded_bodies()[0]
+        assert verify_signature(SECRET, body, sign(body))
+        assert not verify_signature(SECRET, body, sign(body, "other-key"))
+        assert not verify_signature(SECRET, body + b" ", sign(body))
+        assert not verify_signature(SECRET, body, None)
+        assert not verify_signature("", body, sign(body, ""))
+
+
+class TestDecode:
+    """Recorded payloads to cached dict shapes"""
+
+    def test_01_replayed_payloads(self):
+        events = [decode(json.loads(body)) for body in recorded_bodies()]
+        assert [(e.kind, e.op) if e else None for e in events] == [
+            ("task", "created"), ("task", "updated"), ("task", "updated"), ("task", "deleted"),
+            ("userstory", "updated"), ("epic", "created"), None, None,
+        ]
+        changed = events[1].item
+        assert changed["project"] == 1 and changed["user_story"] == 10
+        assert changed["status"] == 2 and changed["status_extra_info"]["is_closed"] is True
+        assert changed["assigned_to"] == 5
+        assert changed["assigned_to_extra_info"]["full_name_display"] == "Bruno Lima"
+        assert "version" not in changed
+        assert set(events[4].item) == {"id", "ref", "subject", "description", "status", "status_extra_info"}
+
+
+class TestBatching:
+    """One pass per window, patching caches and feeds"""
+
+    def test_01_replay_patches_caches_without_calling_taiga(self):
+        service = cached_service()
+        cursor = service.changes.since(1)["cursor"]
+        for body in recorded_bodies():
+            event = decode(json.loads(body))
+            if event is not None:
+                service.webhooks.add(event)
+        assert service.webhooks.flush() == 5  # two edits of task 1 collapse into one
+
+        store = service.get_task_store(1)
+        tasks = {t["id"]: t for t in store.iter_dicts()}
+        assert sorted(tasks) == [1, 3]
+        assert tasks[1]["subject"] == "Revisar painel" and tasks[1]["status"] == 2
+        assert tasks[1]["version"] == 4 and tasks[1]["assigned_to_extra_info"]["username"] == "bruno"
+        assert store.columns.compute()["closed"] == 1
+        assert service.task_versions.get(1) is None
+        assert service.ref_index.lookup("task", 1, 13) == 3 and service.ref_index.lookup("task", 1, 12) is None
+        assert service.ref_index.lookup("epic", 1, 30) == 50
+
+        story = service.record_cache.get((service.host, "userstory", 1)).get(10)
+        assert story.subject == "Painel de indicadores" and story.status == 20
+        assert service.last_good.get((service.host, "userstories", 1))[1][0]["subject"] == "Painel de indicadores"
+        assert service.search_cache.get((service.host, "search", 1, "painel")) is None
+        assert service.search_cache.get((service.host, "search", 2, "painel")) is not None
+
+        changes = service.changes.since(1, cursor)
+        assert [t["id"] for t in changes["tasks"]["created"]] == [3]
+        assert [t["id"] for t in changes["tasks"]["updated"]] == [1]
+        assert changes["tasks"]["deleted"] == [{"id": 2, "ref": 12}]
+        assert [s["id"] for s in changes["userstories"]["updated"]] == [10]
+        assert [e["id"] for e in changes["epics"]["created"]] == [50]
+        assert service.webhooks.stats() == {"received": 6, "batches": 1, "applied": 5, "pending": 0}
+
+    def test_02_burst_applied_once_after_window(self):
+        batches = []
+        batcher = WebhookBatcher(batches.append, window=0.05)
+        events = [decode(json.loads(body)) for body in recorded_bodies()[:4]]
+        for event in events:
+            batcher.add(event)
+        deadline = time.monotonic() + 2
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        assert len(batches) == 1 and len(batches[0]) == 3
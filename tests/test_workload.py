@@ -0,0 +1,114 @@
+"""
+Tests for the cross-project workload aggregation (no Taiga server needed)
+"""
+import threading
+import time
+
+from app.records import TaskStore
+from app.workload import aggregate
+from benchmarks.wire_bytes import sample_tasks
+from tests.helpers import make_service
+
+
+def project_tasks(project_id, count):
+    tasks = sample_tasks(count)
+    for task in tasks:
+        task["id"] += project_id * 1000
+        task["project"] = project_id
+    return tasks
+
+
+def fetching_service(delay=0.0, failing=()):
+    """Service whose task lists are generated per project (optionally slow or failing)"""
+    service = make_service()
+    service.fetches = []
+
+    def fake_fetch(project_id, user_story_id=None):
+        service.fetches.append(project_id)
+        time.sleep(delay)
+        if project_id in failing:
+            raise Exception("upstream error")
+        return project_tasks(project_id, 12)
+
+    service._fetch_tasks = fake_fetch
+    return service
+
+
+class TestAggregate:
+    """aggregate() counting"""
+
+    def test_01_counts_per_member_and_status(self):
+        """Each member's totals add up across projects"""
+        stores = {1: TaskStore(1, project_tasks(1, 24)), 2: TaskStore(2, project_tasks(2, 12))}
+        result = aggregate(stores)
+
+        assert result["totals"]["total"] == 36
+        member = next(m for m in result["members"] if m["member_id"] == 170)
+        assert member["total"] == 3 and member["by_project"] == {1: 2, 2: 1}
+        assert member["name"] == "Usuário 0"
+        assert sum(s["total"] for s in result["by_status"].values()) == 36
+
+    def test_02_single_member_lists_open_tasks(self):
+        """member_id filters counts and lists that member's open tasks"""
+        result = aggregate({1: TaskStore(1, project_tasks(1, 60))}, member_id=171)
+        assert [m["member_id"] for m in result["members"]] == [171]
+        assert len(result["tasks"]) == result["members"][0]["open"]
+
+    def test_03_consistent_while_tasks_change(self):
+        """Concurrent upserts/removals never misalign columns or hit a removed task"""
+        tasks = project_tasks(1, 60)
+        store = TaskStore(1, tasks)
+        stop = threading.Event()
+
+        def churn():
+            while not stop.is_set():
+                for task in tasks[:20]:
+                    store.remove(task["id"])
+                store.upsert_many(tasks[:20])
+
+        writer = threading.Thread(target=churn)
+        writer.start()
+        try:
+            for _ in range(200):
+                result = aggregate({1: store}, member_id=171)
+                member = result["members"][0] if result["members"] else {"open": 0}
+                assert len(result["tasks"]) <= member["open"]
+                assert sum(s["total"] for s in aggregate({1: store})["by_status"].values()) <= 60
+        finally:
+            stop.set()
+            writer.join()
+
+    def test_04_task_removed_after_snapshot_is_skipped(self, monkeypatch):
+        store = TaskStore(1, project_tasks(1, 60))
+        monkeypatch.setattr(store, "get", lambda task_id: None)
+        result = aggregate({1: store}, member_id=171)
+        assert result["tasks"] == [] and result["members"][0]["open"] > 0
+
+
+class TestGetWorkload:
+    """TaigaService.get_workload fan-out"""
+
+    def test_01_projects_fetched_concurrently(self):
+        """Total time tracks the slowest project, not the sum"""
+        service = fetching_service(delay=0.2)
+        start = time.monotonic()
+        result = service.get_workload([1, 2, 3, 4])
+        assert time.monotonic() - start < 0.6
+        assert result["totals"]["total"] == 48
+
+    def test_02_repeat_served_from_cache(self):
+        """A second request does not refetch the projects"""
+        service = fetching_service()
+        service.get_workload([1, 2])
+        service.get_workload([1, 2])
+        assert sorted(service.fetches) == [1, 2]
+
+    def test_03_failing_project_is_reported(self):
+        """One failing project does not fail the whole dashboard"""
+        service = fetching_service(failing={2})
+        result = service.get_workload([1, 2], project_names={1: "DASA"})
+        assert result["totals"]["total"] == 12
+        assert result["projects"] == [
+            {"id": 1, "name": "DASA", "error": None},
+            {"id": 2, "name": None, "error": "upstream error"},
+        ]
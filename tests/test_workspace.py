@@ -0,0 +1,53 @@
+"""
+Tests for the user story workspace lookup (no Taiga server needed)
+"""
+from types import SimpleNamespace
+
+import pytest
+from taiga.exceptions import TaigaRestException
+
+from app.taiga_service import NotFoundError
+from tests.helpers import make_service
+
+
+class Story:
+    def __init__(self, story_id, project):
+        self.id = story_id
+        self.ref = 5
+        self.subject = "Painel"
+        self.description = ""
+        self.status = 1
+        self.status_extra_info = {"name": "New", "color": "#999"}
+        self.project = project
+
+
+def workspace_service(get_story):
+    """Service whose story comes from get_story(story_id); tasks and metadata are canned"""
+    service = make_service(user_stories=SimpleNamespace(get=get_story))
+    service.get_tasks = lambda project_id, story_id: [{"id": 1, "user_story": story_id}]
+    service._get_project_metadata = lambda project_id: {"task_statuses": [], "members": []}
+    return service
+
+
+class TestWorkspace:
+    """Not found vs other failures"""
+
+    def test_01_story_of_the_project(self):
+        workspace = workspace_service(lambda story_id: Story(story_id, 1)).get_user_story_workspace(1, 10)
+        assert workspace["user_story"]["id"] == 10 and workspace["tasks"] == [{"id": 1, "user_story": 10}]
+
+    def test_02_story_of_another_project_is_not_found(self):
+        with pytest.raises(NotFoundError):
+            workspace_service(lambda story_id: Story(story_id, 2)).get_user_story_workspace(1, 10)
+
+    def test_03_only_404_is_not_found(self):
+        def missing(story_id):
+            raise TaigaRestException("/userstories/10", 404, "Not found")
+
+        def down(story_id):
+            raise TaigaRestException("/userstories/10", 502, "Bad gateway")
+
+        with pytest.raises(NotFoundError):
+            workspace_service(missing).get_user_story_workspace(1, 10)
+        with pytest.raises(TaigaRestException):
+            workspace_service(down).get_user_story_workspace(1, 10)
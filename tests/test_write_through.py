@@ -0,0 +1,99 @@
+"""
+Tests for write-through updates of cached task sets (no Taiga server needed)
+"""
+from app.projection import parse_fields, project
+from app.records import TaskStore
+from tests.helpers import FakeResponse, make_service, task
+
+
+def counting_service():
+    """Service with a project of two tasks and a fake Taiga that counts list fetches"""
+    calls = []
+
+    def request(method, path, **kwargs):
+        calls.append((method, path))
+        if method == "GET" and path == "/tasks":
+            return FakeResponse(200, [task(1, 11), task(2, 12, status=2)])
+        if method == "POST":
+            return FakeResponse(201, task(3, 13, subject=kwargs["json"]["subject"]))
+        if method == "PATCH":
+            return FakeResponse(200, task(1, 11, version=2, **{k: v for k, v in kwargs["json"].items()
+                                                               if k != "version"}))
+        if method == "DELETE":
+            return FakeResponse(204)
+        raise AssertionError(path)
+
+    return make_service(request), calls
+
+
+class TestWriteThrough:
+    """List endpoints serve the written state without refetching"""
+
+    def test_01_create_update_delete_without_refetch(self):
+        service, calls = counting_service()
+        service.get_tasks(1)
+        service.create_task(1, "Added", status=1)
+        service.patch_task(1, 1, {"status": 2})
+        service.delete_task(2, project_id=1, ref=12)
+
+        tasks = {t["id"]: t for t in service.get_tasks(1)}
+        assert calls.count(("GET", "/tasks")) == 1
+        assert sorted(tasks) == [1, 3]
+        assert tasks[3]["subject"] == "Added"
+        assert tasks[1]["status"] == 2 and tasks[1]["version"] == 2
+        assert tasks[1]["status_extra_info"]["name"] == "Done"
+        assert [t["id"] for t in service.get_tasks(1, user_story_id=10)] == [1, 3]
+
+    def test_02_ref_index_versions_and_counters(self):
+        service, _ = counting_service()
+        store = service.get_task_store(1)
+        service.create_task(1, "Added", status=1)
+        service.patch_task(1, 1, {"status": 2})
+        service.delete_task(2, project_id=1, ref=12)
+
+        assert service.ref_index.lookup("task", 1, 13) == 3
+        assert service.ref_index.lookup("task", 1, 12) is None
+        assert service.task_versions.get(1) == 2
+        stats = store.columns.compute()
+        assert stats["total"] == 2 and stats["closed"] == 1
+
+    def test_03_apply_keeps_fields_missing_from_response(self):
+        """python-taiga update responses lack dates and project; the cached values stay"""
+        store = TaskStore(1, [task(1, 11)])
+        store.apply({"id": 1, "ref": 11, "subject": "Renamed", "status": 2, "version": 5})
+        record = store.to_dict(store.get(1))
+        assert record["subject"] == "Renamed" and record["version"] == 5
+        assert record["created_date"] == "2024-01-01T00:00:00Z" and record["project"] == 1
+
+    def test_04_cold_and_warm_reads_have_the_same_shape(self):
+        """A fresh fetch and the cached task set return the same fields"""
+        listing = [task(1, 11, is_closed=False, tags=[["ui", None]], milestone=7, watchers=[5]),
+                   task(2, 12, status=2, is_closed=True, tags=[], milestone=None, watchers=[])]
+        service = make_service(lambda method, path, **kwargs: FakeResponse(200, listing))
+        for_story = service.get_tasks(1, user_story_id=10)
+        cold = service.get_tasks(1)
+        warm = service.get_tasks(1)
+        assert cold == warm == for_story
+        assert all(set(t) == set(warm[0]) for t in cold + warm)
+        assert {"is_closed", "tags", "milestone", "watchers", "assigned_to_extra_info"} <= set(warm[0])
+        assert (warm[0]["tags"], warm[0]["milestone"], warm[1]["is_closed"]) == ([["ui", None]], 7, True)
+
+        service.get_task_store(1).apply({"id": 1, "status": 2, "status_extra_info": warm[1]["status_extra_info"]})
+        assert service.get_tasks(1)[0]["is_closed"] is True
+
+    def test_05_full_listing_round_trips_unknown_fields(self):
+        """Fields the records don't model (due_date, is_blocked, ...) survive caching and writes"""
+        listing = [task(1, 11, due_date="2024-02-01", is_blocked=True, blocked_note="waiting",
+                        user_story_extra_info={"ref": 5, "subject": "Painel"}, external_reference=None)]
+        service = make_service(lambda method, path, **kwargs: FakeResponse(200, listing[0] if method == "PATCH"
+                                                                             else listing))
+        cold = service.get_tasks(1)
+        warm = service.get_tasks(1)
+        for tasks in (cold, warm):
+            assert tasks[0]["due_date"] == "2024-02-01" and tasks[0]["is_blocked"] is True
+            assert tasks[0]["user_story_extra_info"] == {"ref": 5, "subject": "Painel"}
+            assert "external_reference" in tasks[0]
+        assert project(warm, parse_fields("id,blocked_note", "task")) == [{"id": 1, "blocked_note": "waiting"}]
+
+        service.patch_task(1, 1, {"subject": "Renamed"})
+        assert service.get_tasks(1)[0]["due_date"] == "2024-02-01"